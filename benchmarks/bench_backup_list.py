@@ -0,0 +1,55 @@
+"""
+Compare BackupList lookups and queries with the linear scans they replaced.
+
+    PYTHONPATH=src python benchmarks/bench_backup_list.py [N]
+"""
+import sys
+import timeit
+
+from jsonpath_ng import parse
+
+from dcos_migrate.system import Backup, BackupList
+
+
+def linear_backups(bl, pluginName):
+    return [b for b in bl if b.plugin_name == pluginName]
+
+
+def linear_backup(bl, pluginName, backupName):
+    for b in linear_backups(bl, pluginName):
+        if b.name == backupName:
+            return b
+    return None
+
+
+def linear_match_jsonpath(bl, jsonPath):
+    expr = parse(jsonPath)
+    return [b for b in bl if expr.find([b.data])]
+
+
+def main(n=50000):
+    plugins = ["marathon", "metronome", "secret", "edgelb"]
+    bl = BackupList()
+    for i in range(n):
+        data = {"labels": {"DCOS_PACKAGE_NAME": "pkg-{}".format(i % 100)}} if i % 10 == 0 else {}
+        bl.append(Backup(pluginName=plugins[i % len(plugins)], backupName="app-{}".format(i), data=data))
+    names = ["app-{}".format(i) for i in range(0, n, 4)]
+
+    lookups = 200
+    print("{} backups, {} lookups of marathon backups".format(n, lookups))
+    for label, stmt in [
+        ("linear backup()", lambda: [linear_backup(bl, "marathon", name) for name in names[:lookups]]),
+        ("indexed backup()", lambda: [bl.backup("marathon", name) for name in names[:lookups]]),
+        ("linear backups()", lambda: [linear_backups(bl, "marathon") for _ in range(lookups)]),
+        ("view backups()", lambda: [bl.backups("marathon") for _ in range(lookups)]),
+        ("linear jsonpath", lambda: [linear_match_jsonpath(bl, "[*].labels.DCOS_PACKAGE_NAME") for _ in range(10)]),
+        ("match_jsonpath()", lambda: [bl.match_jsonpath("[*].labels.DCOS_PACKAGE_NAME") for _ in range(10)]),
+        ("match_field()",
+         lambda: [bl.match_field("labels.DCOS_PACKAGE_NAME", "pkg-{}".format(i)) for i in range(lookups)]),
+    ]:
+        seconds = min(timeit.repeat(stmt, number=1, repeat=3))
+        print("{:<20} {:>10.3f}ms".format(label, seconds * 1000))
+
+
+if __name__ == "__main__":
+    main(*[int(a) for a in sys.argv[1:]])
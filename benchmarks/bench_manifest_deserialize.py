@@ -0,0 +1,48 @@
+"""
+Deserialize a multiDocManifest.yaml style file with a few thousand documents using
+the libyaml parser and the cached model builder, and using the pure python parser and
+an ApiClient per document.
+
+    PYTHONPATH=src python benchmarks/bench_manifest_deserialize.py [N]
+"""
+import sys
+import time
+
+import yaml
+from kubernetes.client import ApiClient
+
+from dcos_migrate.system import Manifest
+
+
+def legacy_deserialize(data):
+    docs = []
+    for d in yaml.safe_load_all(data):
+        docs.append(ApiClient()._ApiClient__deserialize(d, Manifest.getModel(d['kind'], d['apiVersion'])))
+    return docs
+
+
+def measure(name, func, data):
+    start = time.perf_counter()
+    result = func(data)
+    print("{:<20} {:>10.3f}s".format(name, time.perf_counter() - start))
+    return result
+
+
+def deserialize(data):
+    m = Manifest(pluginName="bench", manifestName="bench")
+    m.deserialize(data)
+    return list(m)
+
+
+def main(n=1000):
+    with open("tests/examples/multiDocManifest.yaml") as f:
+        docs = f.read().strip().strip("-").strip()
+    data = "\n---\n".join([docs] * n)
+    print("{} documents".format(data.count("\n---\n") + 1))
+    legacy = measure("legacy", legacy_deserialize, data)
+    current = measure("Manifest.deserialize", deserialize, data)
+    assert legacy == current, "results differ"
+
+
+if __name__ == "__main__":
+    main(*[int(a) for a in sys.argv[1:]])
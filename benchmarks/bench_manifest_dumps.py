@@ -0,0 +1,59 @@
+"""
+Serialize a few thousand translated deployments with the shared sanitizer and the
+libyaml emitter, and with an ApiClient and the pure python emitter per document.
+
+    PYTHONPATH=src python benchmarks/bench_manifest_dumps.py [N]
+"""
+import sys
+import time
+
+import yaml
+from kubernetes.client import ApiClient
+
+from dcos_migrate.plugins.marathon import MarathonMigrator
+from dcos_migrate.system import Manifest
+from dcos_migrate.system.manifest import DOCUMENT_KEYS, _extract_comment
+
+
+def legacy_dumps(manifest):
+    docs = []
+    for d in manifest:
+        doc = ApiClient().sanitize_for_serialization(d)
+        ordered = {k: doc[k] for k in DOCUMENT_KEYS if k in doc.keys()}
+        docs.append(_extract_comment(d) + yaml.dump(ordered, sort_keys=False))
+    return "---\n" + '\n---\n'.join(docs)
+
+
+def manifests(n):
+    result = []
+    for i in range(n):
+        app = {
+            "id": "/bench/app-{}".format(i),
+            "cmd": "sleep 3600",
+            "cpus": 0.5,
+            "mem": 256,
+            "instances": 2,
+            "env": {"FOO": "bar", "INDEX": str(i)},
+            "labels": {"team": "bench"},
+        }
+        result.append(MarathonMigrator(object=app).migrate())
+    return result
+
+
+def measure(name, dumps, ms):
+    start = time.perf_counter()
+    out = [dumps(m) for m in ms]
+    print("{:<20} {:>10.3f}s".format(name, time.perf_counter() - start))
+    return out
+
+
+def main(n=2000):
+    ms = manifests(n)
+    print("{} manifests with {} documents".format(n, sum([len(m) for m in ms])))
+    legacy = measure("legacy", legacy_dumps, ms)
+    current = measure("Manifest.dumps", lambda m: Manifest.dumps(m, None), ms)
+    assert legacy == current, "outputs differ"
+
+
+if __name__ == "__main__":
+    main(*[int(a) for a in sys.argv[1:]])
@@ -0,0 +1,53 @@
+"""
+Load a few thousand manifests from disk, resolving model classes with the registry
+and with the inspect.getmembers scan it replaced, and without parsing them at all.
+
+    PYTHONPATH=src python benchmarks/bench_manifest_load.py [N]
+"""
+import inspect
+import sys
+import tempfile
+import time
+from unittest import mock
+
+import kubernetes.client.models
+from kubernetes.client.models import V1ConfigMap, V1ObjectMeta, V1Secret
+
+from dcos_migrate.system import Manifest, ManifestList
+
+
+def scan_model(kind, apiVersion):
+    for cls in inspect.getmembers(kubernetes.client.models, inspect.isclass):
+        if cls[0] == Manifest.genModelName(apiVersion, kind):
+            return cls[1]
+    return None
+
+
+def write_manifests(path, n):
+    ml = ManifestList(path=path)
+    for i in range(n):
+        name = "item-{}".format(i)
+        secret = V1Secret(api_version="v1", kind="Secret", metadata=V1ObjectMeta(name=name), data={"k": "dg=="})
+        cfg = V1ConfigMap(api_version="v1", kind="ConfigMap", metadata=V1ObjectMeta(name=name), data={"k": "v"})
+        ml.append(Manifest(pluginName="bench", manifestName=name, data=[secret, cfg]))
+    ml.store()
+
+
+def load(path, lazy=False):
+    start = time.perf_counter()
+    ManifestList(path=path).load(lazy=lazy)
+    return time.perf_counter() - start
+
+
+def main(n=3000):
+    with tempfile.TemporaryDirectory() as path:
+        write_manifests(path, n)
+        print("{} manifests with 2 documents each".format(n))
+        with mock.patch.object(Manifest, "getModel", side_effect=scan_model):
+            print("{:<20} {:>10.3f}s".format("getmembers scan", load(path)))
+        print("{:<20} {:>10.3f}s".format("model registry", load(path)))
+        print("{:<20} {:>10.3f}s".format("lazy", load(path, lazy=True)))
+
+
+if __name__ == "__main__":
+    main(*[int(a) for a in sys.argv[1:]])
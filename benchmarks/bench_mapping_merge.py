@@ -0,0 +1,113 @@
+"""
+Translate Marathon apps with many volumes, env vars, ports and constraints with the
+single pass Merger, and with a new result built by deep_merge on every merge as before.
+
+    PYTHONPATH=src python benchmarks/bench_mapping_merge.py [N] [VOLUMES]
+"""
+import logging
+import sys
+import time
+from unittest import mock
+
+from dcos_migrate.plugins.marathon import app_translator, mapping_utils
+from dcos_migrate.plugins.marathon.app_secrets import TrackingAppSecretMapping
+from dcos_migrate.plugins.marathon.mapping_utils import ListExtension, Translated, UpdateConflict
+
+
+def legacy_deep_merge(first, second, debug_prefix=''):
+    if all(isinstance(_, dict) for _ in (first, second)):
+
+        def iter_items(first, second):
+            for key in first.keys() - second.keys():
+                yield key, first[key]
+            for key in second.keys() - first.keys():
+                yield key, second[key]
+            for key in first.keys() & second.keys():
+                yield key, legacy_deep_merge(first[key], second[key], debug_prefix + '.' + str(key))
+
+        return dict(iter_items(first, second))
+
+    if isinstance(first, list) and isinstance(second, list):
+        min_len = min(len(first), len(second))
+        return [legacy_deep_merge(first[n], second[n], '{}[{}]'.format(debug_prefix, n))
+                for n in range(min_len)] + first[min_len:] + second[min_len:]
+
+    if any(isinstance(_, ListExtension) for _ in (first, second)):
+        base, extension = (first, second) if isinstance(second, ListExtension) else (second, first)
+        if isinstance(base, ListExtension):
+            return ListExtension(base.items + extension.items)
+        if isinstance(base, list):
+            return base + extension.items
+
+    if first == second:
+        return first
+
+    raise UpdateConflict('Conflicting values for {}: {} and {}'.format(debug_prefix, first, second))
+
+
+class LegacyMerger(object):
+    def __init__(self):
+        self.result = {}
+
+    def add(self, update):
+        self.result = legacy_deep_merge(self.result, update)
+
+
+def legacy_merged_with(self, other):
+    return Translated(update=legacy_deep_merge(self.update, other.update), warnings=self.warnings + other.warnings)
+
+
+def app(i, volumes):
+    secrets = {"secret{}".format(v): {"source": "bench/secret-{}".format(v)} for v in range(volumes)}
+    return {
+        "id": "/bench/app-{}".format(i),
+        "cmd": "sleep 3600",
+        "cpus": 0.5,
+        "mem": 256,
+        "instances": 2,
+        "env": dict({"VAR_{}".format(v): str(v) for v in range(volumes)}, **{
+            "SECRET_{}".format(v): {"secret": "secret{}".format(v)} for v in range(volumes)}),
+        "secrets": secrets,
+        "labels": {"team": "bench"},
+        "portDefinitions": [{"port": 10000 + p, "name": "port-{}".format(p), "protocol": "tcp"}
+                            for p in range(volumes)],
+        "constraints": [["rack-{}".format(v), "IS", "r{}".format(v)] for v in range(volumes)],
+        "container": {
+            "type": "MESOS",
+            "volumes": [{"containerPath": "/host-{}".format(v), "hostPath": "/srv/{}".format(v), "mode": "RO"}
+                        for v in range(volumes)] +
+                       [{"containerPath": "/secret-{}".format(v), "secret": "secret{}".format(v)}
+                        for v in range(volumes)],
+        },
+    }
+
+
+def translate(apps):
+    result = []
+    for a in apps:
+        settings = app_translator.Settings(app_translator.ContainerDefaults(image="busybox", working_dir="."),
+                                           app_secret_mapping=TrackingAppSecretMapping(a["id"], a["secrets"]))
+        result.append(app_translator.translate_app(a, settings).deployment)
+    return result
+
+
+def measure(name, apps):
+    start = time.perf_counter()
+    result = translate(apps)
+    print("{:<20} {:>10.3f}s".format(name, time.perf_counter() - start))
+    return result
+
+
+def main(n=200, volumes=50):
+    logging.disable(logging.WARNING)
+    apps = [app(i, volumes) for i in range(n)]
+    print("{} apps with {} volumes, env vars, ports and constraints".format(n, volumes))
+    with mock.patch.object(mapping_utils, "Merger", LegacyMerger), \
+            mock.patch.object(Translated, "merged_with", legacy_merged_with):
+        legacy = measure("deep_merge", apps)
+    current = measure("Merger", apps)
+    assert legacy == current, "results differ"
+
+
+if __name__ == "__main__":
+    main(*[int(a) for a in sys.argv[1:]])
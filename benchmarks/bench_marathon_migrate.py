@@ -0,0 +1,51 @@
+"""
+Translate a large Marathon app export in the plugin thread and in worker processes.
+
+    PYTHONPATH=src python benchmarks/bench_marathon_migrate.py [N] [PROCESSES]
+"""
+import logging
+import sys
+import time
+
+from dcos_migrate.plugins.marathon import MarathonPlugin
+from dcos_migrate.system import Backup, BackupList, ManifestList
+
+
+def backups(n):
+    bl = BackupList()
+    for i in range(n):
+        app = {
+            "id": "/bench/group-{}/app-{}".format(i % 50, i),
+            "cmd": "sleep 3600",
+            "cpus": 0.5,
+            "mem": 256,
+            "instances": 2,
+            "env": {"FOO": "bar", "INDEX": str(i)},
+            "labels": {"team": "bench"},
+            "portDefinitions": [{"port": 10000 + i, "name": "http", "protocol": "tcp"}],
+            "healthChecks": [{"protocol": "HTTP", "path": "/health", "portIndex": 0}],
+        }
+        bl.append(Backup(pluginName="marathon", backupName=Backup.renderBackupName(app["id"]), data=app))
+    return bl
+
+
+def measure(name, processes, bl):
+    plugin = MarathonPlugin()
+    plugin.config = {"marathon": {"processes": processes}}
+    start = time.perf_counter()
+    ml = plugin.migrate(backupList=bl, manifestList=ManifestList())
+    print("{:<20} {:>10.3f}s".format(name, time.perf_counter() - start))
+    return [m.serialize() for m in ml]
+
+
+def main(n=3000, processes=4):
+    logging.disable(logging.WARNING)
+    bl = backups(n)
+    print("{} apps".format(n))
+    serial = measure("plugin thread", 0, bl)
+    parallel = measure("{} processes".format(processes), processes, bl)
+    assert serial == parallel, "outputs differ"
+
+
+if __name__ == "__main__":
+    main(*[int(a) for a in sys.argv[1:]])
@@ -0,0 +1,60 @@
+"""
+Translate a large Metronome job export with the compiled translate keys, and with
+every JSONPath expression parsed again for every job as before.
+
+    PYTHONPATH=src python benchmarks/bench_migrator_jsonpath.py [N]
+"""
+import json
+import logging
+import sys
+import time
+
+from jsonpath_ng.ext import parse
+
+from dcos_migrate.plugins.metronome import MetronomeMigrator
+from dcos_migrate.system import Migrator
+
+sys.path.insert(0, "tests")
+from test_metronome_migrator import create_manifest_list_cluster  # noqa: E402
+
+
+def legacy_migrate(self):
+    if not self.valid():
+        return None
+    for k, v in self.translate.items():
+        for match in parse(k).find(self.object):
+            v(str(match.path), match.value, str(match.full_path))
+    return self.manifest
+
+
+def jobs(n):
+    with open("tests/examples/job.json") as f:
+        job = json.load(f)
+    result = []
+    for i in range(n):
+        j = json.loads(json.dumps(job))
+        j["id"] = "bench.job-{}".format(i)
+        result.append(j)
+    return result
+
+
+def measure(name, migrate, export, ml):
+    start = time.perf_counter()
+    out = [migrate(MetronomeMigrator(object=j, manifest_list=ml)).serialize() for j in export]
+    print("{:<20} {:>10.3f}s".format(name, time.perf_counter() - start))
+    return out
+
+
+def main(n=50):
+    # every job warns about fields without an equivalent
+    logging.disable(logging.WARNING)
+    export = jobs(n)
+    ml = create_manifest_list_cluster()
+    print("{} jobs with {} translate keys".format(n, len(MetronomeMigrator(object=export[0]).translate)))
+    legacy = measure("parse per job", legacy_migrate, export, ml)
+    current = measure("compiled", Migrator.migrate, export, ml)
+    assert legacy == current, "outputs differ"
+
+
+if __name__ == "__main__":
+    main(*[int(a) for a in sys.argv[1:]])
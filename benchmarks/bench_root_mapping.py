@@ -0,0 +1,66 @@
+"""
+Translate many small Marathon apps with the root mapping compiled once, and with the
+mapping built and sorted again for every app as before.
+
+    PYTHONPATH=src python benchmarks/bench_root_mapping.py [N]
+"""
+import logging
+import sys
+import time
+from unittest import mock
+
+from dcos_migrate.plugins.marathon import app_translator
+from dcos_migrate.plugins.marathon.app_secrets import TrackingAppSecretMapping
+from dcos_migrate.plugins.marathon.mapping_utils import CompiledMapping
+
+
+class PerAppMapping(object):
+    """builds the tables of a mapping for every app, like generate_root_mapping did"""
+    def __init__(self, compiled):
+        self.mapping = dict(compiled.groups)
+
+    def apply(self, data, error_location, *context):
+        return CompiledMapping(dict(self.mapping)).apply(data, error_location, *context)
+
+
+def app(i):
+    return {
+        "id": "/bench/group-{}/app-{}".format(i % 50, i),
+        "cmd": "sleep 3600",
+        "cpus": 0.1,
+        "mem": 32,
+        "instances": 1,
+        "labels": {"team": "bench"},
+        "container": {"type": "DOCKER", "docker": {"image": "busybox", "forcePullImage": False}},
+    }
+
+
+def translate(apps):
+    result = []
+    for a in apps:
+        settings = app_translator.Settings(app_translator.ContainerDefaults(image="busybox", working_dir="."),
+                                           app_secret_mapping=TrackingAppSecretMapping(a["id"], {}))
+        result.append(app_translator.translate_app(a, settings))
+    return result
+
+
+def measure(name, apps):
+    start = time.perf_counter()
+    result = translate(apps)
+    print("{:<20} {:>10.3f}s".format(name, time.perf_counter() - start))
+    return result
+
+
+def main(n=20000):
+    logging.disable(logging.WARNING)
+    apps = [app(i) for i in range(n)]
+    print("{} apps".format(n))
+    with mock.patch.object(app_translator, "ROOT_MAPPING", PerAppMapping(app_translator.ROOT_MAPPING)), \
+            mock.patch.object(app_translator, "CONTAINER_MAPPING", PerAppMapping(app_translator.CONTAINER_MAPPING)):
+        legacy = measure("mapping per app", apps)
+    current = measure("compiled", apps)
+    assert legacy == current, "results differ"
+
+
+if __name__ == "__main__":
+    main(*[int(a) for a in sys.argv[1:]])
@@ -15,8 +15,8 @@ from typing import Any
 import yaml
 
 from dcos_migrate.plugins.marathon.app_secrets import TrackingAppSecretMapping, SecretReference
-from dcos_migrate.plugins.marathon.app_translator import ContainerDefaults, Settings, load, translate_app, marathon_app_id_to_k8s_app_id
-from dcos_migrate.plugins.marathon.service_translator import translate_service
+from dcos_migrate.plugins.marathon.app_translator import ContainerDefaults, Settings, load
+from dcos_migrate.plugins.marathon.batch import translate_apps
 from dcos_migrate.plugins.marathon import app_secrets
 
 log = logging.getLogger(__name__)  #pylint: disable=invalid-name
@@ -30,30 +30,32 @@ class FakeAppSecretMapping(app_secrets.AppSecretMapping):
         return app_secret_name
 
 
+def dcos_package_name(app: Any) -> Any:
+    return app.get('labels', {}).get("DCOS_PACKAGE_NAME")
+
+
 def translate(path: str, settings: Settings, selected_app_id: str) -> None:
-    apps = load(path)
+    apps = [app for app in load(path) if not selected_app_id or selected_app_id == app.get('id', "(NO ID)")]
+    # translated lazily, in the order of the loop below
+    translated_apps = translate_apps((app for app in apps if dcos_package_name(app) is None), settings)
+
     for app in apps:
         app_id = app.get('id', "(NO ID)")
-        if selected_app_id and selected_app_id != app_id:
-            continue
-        app_label = marathon_app_id_to_k8s_app_id(app_id)
-        dcos_package_name = app.get('labels', {}).get("DCOS_PACKAGE_NAME")
+        package_name = dcos_package_name(app)
 
-        if dcos_package_name is None:
-            translated = translate_app(app, settings)
+        if package_name is None:
+            resources = next(translated_apps)
             print("# Converted from an app {}".format(app_id))
-            print("\n\n".join([''] + translated.warnings).replace('\n', '\n# '))
-            print(yaml.safe_dump(translated.deployment))
+            print("\n\n".join([''] + resources.translated.warnings).replace('\n', '\n# '))
+            print(yaml.safe_dump(resources.deployment))
             print("---")
 
-            k8s_app_id: str = translated.deployment['metadata']['labels']['app']
-            result, warnings = translate_service(k8s_app_id, app)
-            if result:
+            if resources.service:
                 print("# Converted from an app {}".format(app_id))
-                print("\n\n".join([''] + list(warnings)).replace('\n', '\n# '))
-                print(yaml.safe_dump(result))
+                print("\n\n".join([''] + list(resources.service_warnings)).replace('\n', '\n# '))
+                print(yaml.safe_dump(resources.service))
         else:
-            print('# Skipped an app {}: it is installed from a DCOS package "{}"'.format(app_id, dcos_package_name))
+            print('# Skipped an app {}: it is installed from a DCOS package "{}"'.format(app_id, package_name))
 
         print('---')
 
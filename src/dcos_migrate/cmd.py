@@ -1,10 +1,21 @@
 import logging
 import sys
 
-from typing import Iterable, List, Optional, Callable
+from dcos import http  # type: ignore
+from typing import Any, Iterable, List, Optional, Callable
 
-from dcos_migrate.system import DCOSClient, BackupList, ManifestList, ArgParse, Arg
-from dcos_migrate.plugins.plugin_manager import PluginManager
+from dcos_migrate.system import (DCOSClient, BackupList, ManifestList, StorableList, StoreSummary, ArgParse, Arg,
+                                 BoolArg, PACKED_SUFFIX)
+from dcos_migrate.plugins.plugin import MigratePlugin
+from dcos_migrate.plugins.migrate_cache import MigrateCache
+from dcos_migrate.plugins.plugin_manager import PluginManager, PluginResult, run_dependency_graph, timing_report
+
+
+def convert_storage(src: str, dst: str) -> StoreSummary:
+    """copies all items stored at src to dst. Items are neither parsed nor rendered so they stay byte identical"""
+    target = StorableList(dst)
+    target.extend(StorableList(src).load(lazy=True))
+    return target.store(prune=True)
 
 
 class DCOSMigrate(object):
@@ -23,7 +34,37 @@ class DCOSMigrate(object):
             alternatives=["-v"],
             action="count",
             default=1,
-            help="log verbosity. Default to critical and warnings")
+            help="log verbosity. Default to critical and warnings"),
+        Arg(name="parallelism",
+            alternatives=["-j"],
+            type=int,
+            default=4,
+            metavar="N",
+            help="maximum number of plugins running concurrently. 1 runs them sequentially"),
+        Arg(name="http-timeout",
+            type=float,
+            metavar="SECONDS",
+            help="read timeout of requests sent to the cluster. Defaults to the DC/OS CLI core.timeout"),
+        Arg(name="http-retries",
+            type=int,
+            default=3,
+            metavar="N",
+            help="retries of idempotent requests failing with connection errors, 429 or 5xx"),
+        Arg(name="http-metrics",
+            metavar="FILE",
+            help="write per endpoint request counts, retries, bytes and latencies as JSON to FILE"),
+        BoolArg(name="cache",
+                default=True,
+                help="reuse manifests of unchanged backups translated by a previous migrate run"),
+        Arg(name="storage",
+            choices=["dir", "sqlite"],
+            default="dir",
+            help="store backups and manifests as one file per item or packed into a single SQLite file each"),
+        Arg(name="convert",
+            nargs=2,
+            metavar="PATH",
+            help="convert stored items from the first to the second path and exit. Paths ending with " +
+            PACKED_SUFFIX + " are packed files, all others directories"),
     ]
 
     def __init__(self) -> None:
@@ -32,6 +73,7 @@ class DCOSMigrate(object):
         self.pm = PluginManager()
         self.manifest_list = ManifestList()
         self.backup_list = BackupList()
+        self.failed_plugins: List[str] = []
 
         config = self.pm.config_options
         config.extend(self.config_defaults)
@@ -49,6 +91,10 @@ class DCOSMigrate(object):
         """returns the int(index) of the selected phase or 0"""
         return self.phases_choices.index(self.pm.config['global'].get('phase', "all"))
 
+    @property
+    def parallelism(self) -> int:
+        return int(self.pm.config['global'].get('parallelism', 1))
+
     def _end_process(self, message: str, exit_code: int = 0) -> int:
         print("Ending DC/OS migration - {}".format(message))
         return exit_code
@@ -58,12 +104,28 @@ class DCOSMigrate(object):
         self.handleArgparse(args)
         self.handleGlobal()
 
+        convert = self.pm.config['global'].get('convert')
+        if convert:
+            summary = convert_storage(*convert)
+            return self._end_process("converted {} to {}: {}".format(convert[0], convert[1], summary))
+
+        try:
+            return self.runPhases()
+        finally:
+            self.reportHTTPMetrics()
+
+    def runPhases(self) -> int:
         for i, p in enumerate(self.phases):
             if self.selected_phase > i:
                 p(None, True)
                 continue
             p(None, False)
 
+            if self.failed_plugins:
+                return self._end_process(
+                    "phase {} failed for plugins {}".format(self.phases_choices[i], ", ".join(self.failed_plugins)),
+                    1)
+
             if self.selected_phase and self.selected_phase == i:
                 return self._end_process("selected phase {} reached".format(self.phases_choices[i]))
 
@@ -77,11 +139,48 @@ class DCOSMigrate(object):
         level = levels[min(len(levels) - 1, v)]
         logging.basicConfig(level=level, force=True)
 
+        transport = self.client.transport
+        # every plugin thread may hold a connection, plus the fetch threads of plugins with own concurrency
+        pool_size = self.parallelism + sum(
+            [int(c.get('concurrency', 0)) for n, c in self.pm.config.items() if n != 'global'])
+        transport.resize_pool(max(transport.pool_size, pool_size))
+        transport.retries = int(self.pm.config['global'].get('http-retries', 0))
+        timeout = self.pm.config['global'].get('http-timeout')
+        if timeout:
+            self.client.timeout = (http.DEFAULT_CONNECT_TIMEOUT, float(timeout))
+
+        if self.pm.config['global'].get('storage') == 'sqlite':
+            self.backup_list = BackupList(path='./dcos-migrate/backup' + PACKED_SUFFIX)
+            self.manifest_list = ManifestList(path='./dcos-migrate/migrate' + PACKED_SUFFIX)
+
+    def reportHTTPMetrics(self) -> None:
+        metrics = self.client.transport.metrics
+        logging.info("HTTP requests:\n{}".format(metrics.report()))
+        path = self.pm.config['global'].get('http-metrics')
+        if path:
+            metrics.dump(path)
+
     def handleArgparse(self, args: Optional[List[str]] = None) -> None:
         if args is None:
             args = []
         self.pm.config = self.argparse.parse_args(args)
 
+    def _run_plugins(self, depattr: str, func: Callable[[MigratePlugin], Any], target: StorableList) -> None:
+        """runs func for all plugins along their dependencies and merges the results into target"""
+        def merge(r: PluginResult) -> None:
+            if r.error is not None:
+                self.failed_plugins.append(r.plugin.plugin_name)
+            elif r.result:
+                target.extend(r.result)
+
+        results = run_dependency_graph(self.pm.plugins, depattr, func, self.parallelism, on_result=merge)
+
+        # plugins finish in any order. Keep the list in dependency order so the outcome is deterministic
+        position = {r.plugin.plugin_name: i for i, r in enumerate(results)}
+        target.sort(key=lambda b: position.get(b.plugin_name, len(position)))
+
+        logging.info("Plugin timings:\n{}".format(timing_report(results, depattr)))
+
     def initPhase(self, pluginName: Optional[str] = None, skip: bool = False) -> None:
         """currently unused and empty method to cover all choice"""
         pass
@@ -92,17 +191,13 @@ class DCOSMigrate(object):
             self.backup_list.load()
             return
 
-        logging.info("Calling {} Backup Batches".format(len(self.pm.backup_batch)))
-        for batch in self.pm.backup_batch:
-            # each batch could also be executed in parallel.
-            # But for now just start sequential
-            for plugin in batch:
-                logging.info("Calling backup for plugin {}".format(plugin.plugin_name))
-                blist = plugin.backup(client=self.client, backupList=self.backup_list)
-                if blist:
-                    self.backup_list.extend(blist)
+        def backup(plugin: MigratePlugin) -> BackupList:
+            logging.info("Calling backup for plugin {}".format(plugin.plugin_name))
+            return plugin.backup(client=self.client, backupList=self.backup_list)
 
-        self.backup_list.store()
+        self._run_plugins("backup_depends", backup, self.backup_list)
+
+        print("backup files: {}".format(self.backup_list.store(prune=True)))
 
     def backup_data(self, pluginName: Optional[str] = None, skip: bool = False) -> None:
         if skip:
@@ -121,15 +216,19 @@ class DCOSMigrate(object):
             self.manifest_list.load()
             return
 
-        for batch in self.pm.migrate_batch:
-            # each batch could also be executed in parallel.
-            # But for not just start sequencial
-            for plugin in batch:
-                mlist = plugin.migrate(backupList=self.backup_list, manifestList=self.manifest_list)
-                if mlist:
-                    self.manifest_list.extend(mlist)
+        cache = None
+        if self.pm.config['global'].get('cache'):
+            cache = MigrateCache(config=self.pm.config)
+
+        def migrate(plugin: MigratePlugin) -> ManifestList:
+            logging.info("Calling migrate for plugin {}".format(plugin.plugin_name))
+            if cache is not None and plugin.migrate_cacheable:
+                return cache.migrate(plugin, backupList=self.backup_list, manifestList=self.manifest_list)
+            return plugin.migrate(backupList=self.backup_list, manifestList=self.manifest_list)
+
+        self._run_plugins("migrate_depends", migrate, self.manifest_list)
 
-        self.manifest_list.store()
+        print("manifest files: {}".format(self.manifest_list.store(prune=True)))
 
     def migrate_data(self, pluginName: Optional[str] = None, skip: bool = False) -> None:
         if skip:
@@ -12,6 +12,7 @@ from typing import Any
 class ClusterPlugin(MigratePlugin):
     """docstring for ClusterPlugin."""
     plugin_name = "cluster"
+    migrate_cacheable = True
 
     # No depends wanna run first
 
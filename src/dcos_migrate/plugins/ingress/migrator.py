@@ -145,11 +145,8 @@ class Ingress(system.Migrator):
         assert self.object is not None
         objects = migrate(self.object)
 
-        cluster_annotations = {}
         assert self.manifest_list is not None
-        cluster_metadata = self.manifest_list.clusterMeta()
-        if cluster_metadata is not None and cluster_metadata.annotations:
-            cluster_annotations = cluster_metadata.annotations
+        cluster_annotations = dict(self.manifest_list.clusterAnnotations())
 
         if not any(objects):
             return
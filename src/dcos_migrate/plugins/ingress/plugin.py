@@ -2,6 +2,7 @@ import logging
 from typing import Any
 
 from dcos_migrate.plugins import plugin
+from dcos_migrate.plugins.cluster import ClusterPlugin
 from dcos_migrate import system
 
 from dcos.errors import DCOSHTTPException  # type: ignore
@@ -12,6 +13,8 @@ from . import migrator
 
 class EdgeLBPlugin(plugin.MigratePlugin):
     plugin_name = "edgelb"
+    migrate_cacheable = True
+    migrate_depends = [ClusterPlugin.plugin_name]
 
     def backup(self, client: system.DCOSClient, backupList: system.BackupList, **kwargs: Any) -> system.BackupList:
         service_path = "/service/edgelb"
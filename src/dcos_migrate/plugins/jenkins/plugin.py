@@ -19,23 +19,22 @@ class JenkinsPlugin(MigratePlugin):
 
     def backup(self, client: DCOSClient, backupList: BackupList, **kwargs: Any) -> BackupList:
         bl = BackupList()
-        for b in backupList.backups(pluginName="marathon"):
+        for b in backupList.match_field("labels.DCOS_PACKAGE_NAME", "jenkins",
+                                        pluginName=MarathonPlugin.plugin_name):
             assert isinstance(b, Backup)
-            if (b.data and 'labels' in b.data and "DCOS_PACKAGE_NAME" in b.data['labels']
-                    and b.data['labels']['DCOS_PACKAGE_NAME'] == "jenkins"):
-                # we found a jenkins package lets extract the config
-                if 'DCOS_PACKAGE_OPTIONS' in b.data['labels']:
-                    options_str = b64decode(b.data['labels']['DCOS_PACKAGE_OPTIONS'])
-
-                    options = json.loads(options_str)
-                    data = {
-                        "packageName": b.data['labels']['DCOS_PACKAGE_NAME'],
-                        "version": b.data['labels']['DCOS_PACKAGE_VERSION'],
-                        "options": options
-                    }
-
-                    bl.append(
-                        Backup(pluginName=self.plugin_name,
-                               backupName=Backup.renderBackupName(b.data['labels']['DCOS_SERVICE_NAME']),
-                               data=data))
+            # we found a jenkins package lets extract the config
+            if 'DCOS_PACKAGE_OPTIONS' in b.data['labels']:
+                options_str = b64decode(b.data['labels']['DCOS_PACKAGE_OPTIONS'])
+
+                options = json.loads(options_str)
+                data = {
+                    "packageName": b.data['labels']['DCOS_PACKAGE_NAME'],
+                    "version": b.data['labels']['DCOS_PACKAGE_VERSION'],
+                    "options": options
+                }
+
+                bl.append(
+                    Backup(pluginName=self.plugin_name,
+                           backupName=Backup.renderBackupName(b.data['labels']['DCOS_SERVICE_NAME']),
+                           data=data))
         return bl
@@ -4,7 +4,8 @@ import os.path
 
 from .app_secrets import AppSecretMapping
 from .common import (InvalidAppDefinition, AdditionalFlagNeeded, pod_spec_update, main_container, try_oneline_dump)
-from .mapping_utils import (ListExtension, finalize_unmerged_list_extensions, MappingKey, Translated, apply_mapping)
+from .mapping_utils import (ListExtension, finalize_unmerged_list_extensions, CompiledMapping, MappingKey, Translated,
+                            apply_mapping)
 
 from .constraints import translate_constraints
 from .network_helpers import get_ports_from_app, effective_port, AppPort
@@ -24,6 +25,18 @@ class Settings(NamedTuple):
     app_secret_mapping: AppSecretMapping
 
 
+class AppContext(NamedTuple):
+    """Per-app values passed to the mappers of ROOT_MAPPING and CONTAINER_MAPPING"""
+    k8s_app_id: str
+    container_defaults: ContainerDefaults
+    app_secret_mapping: AppSecretMapping
+    error_location: str
+    network_ports: Sequence[AppPort]
+    # node labels required by the constraints of the app are added here
+    node_labels: Set[str]
+    is_resident: bool
+
+
 log = logging.getLogger(__name__)  # pylint: disable=invalid-name
 
 
@@ -62,7 +75,8 @@ def translate_resources(fields: Dict[str, Any]) -> Translated:
                 yield RESOURCE_TRANSLATION[key](value)
 
     def iter_limits() -> Iterator[Tuple[str, str]]:
-        for key in app_requests.keys() | app_limits.keys():
+        # a set union would emit the limits in a different order on every run
+        for key in list(app_requests) + [k for k in app_limits if k not in app_requests]:
             if key in app_limits:
                 limit = app_limits[key]
                 if limit != "unlimited":
@@ -322,20 +336,21 @@ def translate_health_checks(fields: Dict[str, Any], error_location: str) -> Tran
     return Translated(update=main_container({'livenessProbe': liveness_probe}), warnings=warnings)
 
 
-def skip_quietly(_: Any) -> Translated:
+# the helpers below ignore the context passed by CompiledMapping.apply
+def skip_quietly(_: Any, *context: Any) -> Translated:
     return Translated()
 
 
-def not_translatable(_: Any) -> Translated:
+def not_translatable(_: Any, *context: Any) -> Translated:
     return Translated(warnings=["field not translatable"])
 
 
-def skip_if_equals(default: Any) -> Callable[[Any], Translated]:
+def skip_if_equals(default: Any) -> Callable[..., Translated]:
     if not default:
-        return lambda value: Translated(warnings=[] if not value else
-                                        ['Cannot translate non-empty value\n{}'.format(try_oneline_dump(value))])
+        return lambda value, *_: Translated(warnings=[] if not value else
+                                            ['Cannot translate non-empty value\n{}'.format(try_oneline_dump(value))])
 
-    return lambda value: Translated(warnings=[] if value == default else [
+    return lambda value, *_: Translated(warnings=[] if value == default else [
         'A value\n{}\ndifferent from the default\n{}\ncannot be translated.'.format(
             try_oneline_dump(value), try_oneline_dump(default))
     ])
@@ -408,72 +423,15 @@ def translate_upgrade_strategy(strategy: Dict[str, Any]) -> Translated:
                       warnings=[])
 
 
-def get_constraint_translator(
-        register_node_labels: Callable[[
-            Set[str],
-        ], None]) -> Callable[[
-            Mapping[str, Any],
-        ], Translated]:
-    def translate(fields: Mapping[str, Any]) -> Translated:
-        result, labels = translate_constraints(pod_selector_labels(fields['id']), fields.get('constraints', []))
+def translate_app_constraints(fields: Mapping[str, Any], ctx: AppContext) -> Translated:
+    result, labels = translate_constraints(pod_selector_labels(fields['id']), fields.get('constraints', []))
 
-        register_node_labels(labels)
-        return result
+    ctx.node_labels.update(labels)
+    return result
 
-    return translate
 
-
-def generate_root_mapping(k8s_app_id: str, container_defaults: ContainerDefaults,
-                          app_secrets_mapping: AppSecretMapping, error_location: str, network_ports: Sequence[AppPort],
-                          register_node_labels: Callable[[
-                              Set[str],
-                          ], None], is_resident: bool) -> Dict[MappingKey, Any]:
-
-    container_mappings: Dict[MappingKey, Any] = {
-        ('args', 'cmd'): translate_container_command,
-        ('backoffFactor', 'backoffSeconds'): skip_if_equals({
-            'backoffFactor': 1.0,
-            'backoffSeconds': 1.0
-        }),
-        ('constraints', 'id'): get_constraint_translator(register_node_labels),
-        ('container', ): get_container_translator(k8s_app_id, container_defaults, app_secrets_mapping, error_location),
-        ('cpus', 'mem', 'disk', 'gpus', 'resourceLimits'): translate_resources,
-        'dependencies': skip_if_equals([]),
-        'deployments': skip_quietly,
-        ('env', ): lambda fields: translate_env(fields.get("env", {}), app_secrets_mapping, network_ports),
-        'executor': skip_if_equals(""),
-        'fetch': lambda fetches: translate_fetch(fetches, container_defaults, error_location),
-        ('healthChecks', 'container', 'portDefinitions'):
-        lambda fields: translate_health_checks(fields, error_location),
-        'readinessChecks': lambda readinessChecks: translate_readiness_checks(readinessChecks, error_location),
-        ('acceptedResourceRoles', 'id', 'role'): translate_multitenancy,
-        'instances': lambda n: Translated(update={'spec': {
-            'replicas': n
-        }}),
-        'killSelection': skip_if_equals("YOUNGEST_FIRST"),
-        'ports': skip_if_equals(None),
-        'labels': skip_if_equals({}),  # translate_labels,
-        'maxLaunchDelaySeconds': skip_if_equals(300),
-        ('networks', 'portDefinitions', 'requirePorts'): skip_quietly,  # translate_networking,
-        'residency': skip_quietly,
-
-        # 'secrets' do not map to anything and are used only in combination with other fields.
-        'secrets': skip_quietly,
-        'taskKillGracePeriodSeconds': lambda t: Translated(pod_spec_update({'terminationGracePeriodSeconds': t})),
-        'tasksHealthy': skip_quietly,
-        'tasksRunning': skip_quietly,
-        'tasksStaged': skip_quietly,
-        'tasksUnhealthy': skip_quietly,
-        'unreachableStrategy': translate_unreachable_strategy,
-        'upgradeStrategy': skip_quietly if is_resident else translate_upgrade_strategy,
-        'user': skip_if_equals("nobody"),
-        'version': skip_quietly,
-        'versionInfo': skip_quietly,
-    }
-
-    all_mappings = {}
-    all_mappings.update(container_mappings)
-    return all_mappings
+def translate_app_upgrade_strategy(strategy: Dict[str, Any], ctx: AppContext) -> Translated:
+    return skip_quietly(strategy) if ctx.is_resident else translate_upgrade_strategy(strategy)
 
 
 EXTRACT_COMMAND = dict([('.zip', 'gunzip')] + [(ext, 'tar -xf')
@@ -554,59 +512,103 @@ def translate_fetch(fetches: Sequence[Dict[str, Any]], defaults: ContainerDefaul
     )
 
 
-def get_container_translator(
-    k8s_app_id: str,
-    defaults: ContainerDefaults,
-    app_secret_mapping: AppSecretMapping,
-    error_location: str,
-) -> Callable[[Mapping[str, Any]], Translated]:
-    def translate_image(image_fields: Mapping[MappingKey, Any]) -> Translated:
-        if 'docker.image' in image_fields:
-            return Translated(main_container({'image': image_fields['docker.image']}))
-
-        if not defaults.image:
-            raise AdditionalFlagNeeded('{} has no image; please specify non-empty'
-                                       ' `--default-image` and run again'.format(error_location))
-        container_update = {'image': defaults.image}
-
-        # TODO (asekretenko): This sets 'workingDir' only if 'docker.image' is
-        # not specified. Figure out how we want to treat a combination of
-        # a 'fetch' with a non-default 'docker.image'.
-        if defaults.working_dir:
-            container_update['workingDir'] = defaults.working_dir
-        return Translated(main_container(container_update))
-
-    def translate_container(fields: Mapping[str, Any]) -> Translated:
-        update, warnings = apply_mapping(mapping={
-            "docker.forcePullImage":
-            lambda _: Translated(main_container({'imagePullPolicy': "Always" if _ else "IfNotPresent"})),
-            ("docker.image", ):
-            translate_image,
-            "docker.parameters":
-            skip_if_equals([]),
-            "docker.privileged":
-            skip_if_equals(False),
-            "docker.pullConfig.secret":
-            lambda dcos_name: Translated(
-                pod_spec_update(
-                    {'imagePullSecrets': [{
-                        'name': app_secret_mapping.get_image_pull_secret_name(dcos_name)
-                    }]})),
-            "linuxInfo":
-            skip_if_equals({}),
-            "portMappings":
-            skip_quietly,
-            "volumes":
-            lambda _: volumes.translate_volumes(_, app_secret_mapping),
-            "type":
-            skip_quietly,
-        },
-                                         data=flatten(fields.get('container', {})),
-                                         error_location=error_location + ", container")
-
-        return Translated(update, warnings)
-
-    return translate_container
+def translate_image(image_fields: Mapping[MappingKey, Any], ctx: AppContext) -> Translated:
+    if 'docker.image' in image_fields:
+        return Translated(main_container({'image': image_fields['docker.image']}))
+
+    defaults = ctx.container_defaults
+    if not defaults.image:
+        raise AdditionalFlagNeeded('{} has no image; please specify non-empty'
+                                   ' `--default-image` and run again'.format(ctx.error_location))
+    container_update = {'image': defaults.image}
+
+    # TODO (asekretenko): This sets 'workingDir' only if 'docker.image' is
+    # not specified. Figure out how we want to treat a combination of
+    # a 'fetch' with a non-default 'docker.image'.
+    if defaults.working_dir:
+        container_update['workingDir'] = defaults.working_dir
+    return Translated(main_container(container_update))
+
+
+CONTAINER_MAPPING = CompiledMapping({
+    "docker.forcePullImage":
+    lambda _, ctx: Translated(main_container({'imagePullPolicy': "Always" if _ else "IfNotPresent"})),
+    ("docker.image", ):
+    translate_image,
+    "docker.parameters":
+    skip_if_equals([]),
+    "docker.privileged":
+    skip_if_equals(False),
+    "docker.pullConfig.secret":
+    lambda dcos_name, ctx: Translated(
+        pod_spec_update(
+            {'imagePullSecrets': [{
+                'name': ctx.app_secret_mapping.get_image_pull_secret_name(dcos_name)
+            }]})),
+    "linuxInfo":
+    skip_if_equals({}),
+    "portMappings":
+    skip_quietly,
+    "volumes":
+    lambda _, ctx: volumes.translate_volumes(_, ctx.app_secret_mapping),
+    "type":
+    skip_quietly,
+})
+
+
+def translate_container(fields: Mapping[str, Any], ctx: AppContext) -> Translated:
+    update, warnings = CONTAINER_MAPPING.apply(flatten(fields.get('container', {})), ctx.error_location + ", container",
+                                               ctx)
+    return Translated(update, warnings)
+
+
+# mappers of the fields of an app. Compiled once, the per-app values are passed in an AppContext
+ROOT_MAPPING = CompiledMapping({
+    ('args', 'cmd'): lambda fields, ctx: translate_container_command(fields),
+    ('backoffFactor', 'backoffSeconds'): skip_if_equals({
+        'backoffFactor': 1.0,
+        'backoffSeconds': 1.0
+    }),
+    ('constraints', 'id'): translate_app_constraints,
+    ('container', ): translate_container,
+    ('cpus', 'mem', 'disk', 'gpus', 'resourceLimits'): lambda fields, ctx: translate_resources(fields),
+    'dependencies': skip_if_equals([]),
+    'deployments': skip_quietly,
+    ('env', ): lambda fields, ctx: translate_env(fields.get("env", {}), ctx.app_secret_mapping, ctx.network_ports),
+    'executor': skip_if_equals(""),
+    'fetch': lambda fetches, ctx: translate_fetch(fetches, ctx.container_defaults, ctx.error_location),
+    ('healthChecks', 'container', 'portDefinitions'):
+    lambda fields, ctx: translate_health_checks(fields, ctx.error_location),
+    'readinessChecks': lambda checks, ctx: translate_readiness_checks(checks, ctx.error_location),
+    ('acceptedResourceRoles', 'id', 'role'): lambda fields, ctx: translate_multitenancy(fields),
+    'instances': lambda n, ctx: Translated(update={'spec': {
+        'replicas': n
+    }}),
+    'killSelection': skip_if_equals("YOUNGEST_FIRST"),
+    # embedded into backups by `--marathon-embed`
+    'lastTaskFailure': skip_quietly,
+    'ports': skip_if_equals(None),
+    'labels': skip_if_equals({}),  # translate_labels,
+    'maxLaunchDelaySeconds': skip_if_equals(300),
+    ('networks', 'portDefinitions', 'requirePorts'): skip_quietly,  # translate_networking,
+    'residency': skip_quietly,
+
+    # 'secrets' do not map to anything and are used only in combination with other fields.
+    'secrets': skip_quietly,
+    'taskKillGracePeriodSeconds': lambda t, ctx: Translated(pod_spec_update({'terminationGracePeriodSeconds': t})),
+    'readinessCheckResults': skip_quietly,
+    'tasks': skip_quietly,
+    'taskStats': skip_quietly,
+    'tasksHealthy': skip_quietly,
+    'tasksRunning': skip_quietly,
+    'tasksStaged': skip_quietly,
+    'tasksUnhealthy': skip_quietly,
+    'unreachableStrategy': lambda strategy, ctx: translate_unreachable_strategy(strategy),
+    'upgradeStrategy': translate_app_upgrade_strategy,
+    'user': skip_if_equals("nobody"),
+    'version': skip_quietly,
+    'versionInfo': skip_quietly,
+})
 
 
 def flatten(dictionary: Dict[str, Any]) -> Dict[str, Any]:
@@ -658,23 +660,15 @@ def translate_app(app: Dict[str, Any], settings: Settings) -> TranslatedApp:
 
     network_ports = get_ports_from_app(app)
 
-    node_labels = set()
-    register_node_labels = lambda labels: node_labels.update(labels)
+    node_labels: Set[str] = set()
     is_resident = volumes.is_resident(app)
     k8s_app_id = marathon_app_id_to_k8s_app_id(app['id'])
 
-    mapping = generate_root_mapping(
-        k8s_app_id,
-        settings.container_defaults,
-        settings.app_secret_mapping,
-        error_location,
-        network_ports,
-        register_node_labels,
-        is_resident,
-    )
+    ctx = AppContext(k8s_app_id, settings.container_defaults, settings.app_secret_mapping, error_location,
+                     network_ports, node_labels, is_resident)
 
     try:
-        deployment, warnings = apply_mapping(mapping, app, error_location)
+        deployment, warnings = ROOT_MAPPING.apply(app, error_location, ctx)
     except InvalidAppDefinition as err:
         raise InvalidAppDefinition('{} at {}'.format(err, error_location))
 
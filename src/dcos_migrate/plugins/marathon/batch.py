@@ -0,0 +1,77 @@
+from dcos_migrate.system import with_comment
+from dcos_migrate.system.manifest import build_model
+from kubernetes.client.models import V1Deployment, V1Service  # type: ignore
+from kubernetes.client import V1StatefulSet  # type: ignore
+
+from .app_secrets import AppSecretMapping
+from .app_translator import Settings, TranslatedApp, translate_app
+from .service_translator import translate_service
+
+from typing import Any, Callable, Dict, Iterable, Iterator, NamedTuple, Optional, Sequence
+
+
+@with_comment
+class V1ServiceWithComment(V1Service):  # type: ignore
+    pass
+
+
+@with_comment
+class V1DeploymentWithComment(V1Deployment):  # type: ignore
+    pass
+
+
+@with_comment
+class V1StatefulSetWithComment(V1StatefulSet):  # type: ignore
+    pass
+
+
+class AppResources(NamedTuple):
+    """
+    The K8s resources of a Marathon app as plain dicts. Kubernetes model objects are only
+    built by deployment_model and service_model, callers dumping YAML do not need them.
+    """
+    app_id: str
+    translated: TranslatedApp
+    service: Optional[Dict[str, Any]]
+    service_warnings: Sequence[str]
+
+    @property
+    def deployment(self) -> Dict[str, Any]:
+        return self.translated.deployment
+
+    def deployment_model(self, deployment: Optional[Dict[str, Any]] = None) -> Any:
+        """the Deployment or StatefulSet with the warnings as comment. deployment replaces the translated one"""
+        data = self.deployment if deployment is None else deployment
+        cls = V1StatefulSetWithComment if data['kind'] == "StatefulSet" else V1DeploymentWithComment
+        model = build_model(cls, data)
+        model.set_comment(self.translated.warnings)
+        return model
+
+    def service_model(self) -> Any:
+        if self.service is None:
+            return None
+        model = build_model(V1ServiceWithComment, self.service)
+        model.set_comment(self.service_warnings)
+        return model
+
+
+def translate_app_resources(app: Dict[str, Any], settings: Settings) -> AppResources:
+    translated = translate_app(app, settings)
+    service, service_warnings = translate_service(translated.deployment['metadata']['labels']['app'], app)
+    return AppResources(app['id'], translated, service, service_warnings)
+
+
+def translate_apps(apps: Iterable[Dict[str, Any]],
+                   settings: Settings,
+                   secret_mapping: Optional[Callable[[Dict[str, Any]], AppSecretMapping]] = None
+                   ) -> Iterator[AppResources]:
+    """
+    Translates apps one at a time while they are consumed. All apps share settings, only the
+    secret mapping is created for every app by secret_mapping if given. Errors of an app are
+    raised from the generator.
+    """
+    for app in apps:
+        if secret_mapping is not None:
+            yield translate_app_resources(app, settings._replace(app_secret_mapping=secret_mapping(app)))
+        else:
+            yield translate_app_resources(app, settings)
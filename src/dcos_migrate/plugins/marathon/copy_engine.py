@@ -0,0 +1,465 @@
+#!/usr/bin/env python3
+"""
+Copies the persistent volumes of a stateful Marathon app to the pods of its StatefulSet.
+
+This file is copied to bin/stateful-copy of the stateful copy folder by
+stateful_copy.configure_stateful_migrate and runs without dcos-migrate installed.
+It only uses the standard library and the `dcos` and `kubectl` executables on the PATH.
+
+    stateful-copy download|upload|stream [--config copy.json] [--concurrency N] [--retries N]
+
+Run it from the folder of an app. Volumes of instance {idx} are downloaded to
+target/download/{idx}/{mount_name} and uploaded to the pod with ordinal {idx}.
+stream pipes a tar of every volume from the task straight into the pod instead, without
+storing it here, and compares the checksums of the files on both ends.
+Finished volumes are recorded in target/{download,upload,stream}.manifest and skipped
+when the command runs again.
+"""
+import argparse
+import contextlib
+import json
+import os
+import posixpath
+import shlex
+import shutil
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from pathlib import Path
+from typing import Any, Callable, Dict, List, NamedTuple, Optional, Set, TextIO, Tuple
+
+CONFIG_FILE = "copy.json"
+DEFAULT_CONCURRENCY = 4
+DEFAULT_RETRIES = 3
+DEFAULT_RETRY_DELAY = 5.0
+COMPRESSION = {"none": "", "gzip": "z"}
+CHUNK_SIZE = 1024 * 1024
+
+
+class CopyError(Exception):
+    pass
+
+
+class PermanentCopyError(CopyError):
+    """fails the same way on every attempt, so it is not retried"""
+
+
+class Mount(NamedTuple):
+    name: str  # name of the persistent volume in the Mesos sandbox
+    path: str  # path mounted in the container
+
+
+class CopyConfig(NamedTuple):
+    app_id: str
+    k8s_app_id: str
+    mounts: List[Mount]
+    concurrency: int = DEFAULT_CONCURRENCY
+    retries: int = DEFAULT_RETRIES
+
+    def to_json(self) -> str:
+        data = self._asdict()
+        data['mounts'] = [m._asdict() for m in self.mounts]
+        return json.dumps(data, indent=2)
+
+    @classmethod
+    def from_json(cls, data: str) -> 'CopyConfig':
+        fields: Dict[str, Any] = json.loads(data)
+        fields['mounts'] = [Mount(**m) for m in fields['mounts']]
+        return cls(**fields)
+
+
+class Job(NamedTuple):
+    # key of the job in the manifest
+    key: str
+    # transfers the volume and returns the number of bytes copied
+    run: Callable[[], int]
+
+
+def format_bytes(n: float) -> str:
+    """
+    >>> format_bytes(512), format_bytes(3 * 1024 * 1024)
+    ('512B', '3.0MiB')
+    """
+    for unit in ["B", "KiB", "MiB", "GiB"]:
+        if n < 1024 or unit == "GiB":
+            return "{}{}".format(int(n), unit) if unit == "B" else "{:.1f}{}".format(n, unit)
+        n /= 1024
+    raise AssertionError("unreachable")
+
+
+def dir_size(path: Path) -> int:
+    total = 0
+    for root, _, files in os.walk(str(path)):
+        for f in files:
+            total += os.lstat(os.path.join(root, f)).st_size
+    return total
+
+
+def run_command(cmd: List[str]) -> str:
+    """runs cmd and returns its output. Raises CopyError if it fails"""
+    try:
+        result = subprocess.run(cmd, stdout=subprocess.PIPE, stderr=subprocess.PIPE, universal_newlines=True)
+    except OSError as e:
+        raise CopyError("{} failed: {}".format(cmd[0], e))
+    if result.returncode != 0:
+        raise CopyError("`{}` exited with {}: {}".format(" ".join(cmd), result.returncode,
+                                                         (result.stderr + result.stdout).strip()))
+    return result.stdout
+
+
+def pipe_commands(source: List[str], dest: List[str]) -> int:
+    """runs source with its output piped into dest and returns the number of bytes piped"""
+    with tempfile.TemporaryFile() as source_err, tempfile.TemporaryFile() as dest_out:
+        try:
+            src = subprocess.Popen(source, stdout=subprocess.PIPE, stderr=source_err)
+        except OSError as e:
+            raise CopyError("{} failed: {}".format(source[0], e))
+        try:
+            dst = subprocess.Popen(dest, stdin=subprocess.PIPE, stdout=dest_out, stderr=subprocess.STDOUT)
+        except OSError as e:
+            src.kill()
+            src.wait()
+            raise CopyError("{} failed: {}".format(dest[0], e))
+
+        assert src.stdout is not None and dst.stdin is not None
+        reader, writer = src.stdout, dst.stdin
+        piped = 0
+        killed = False
+        try:
+            for chunk in iter(lambda: reader.read(CHUNK_SIZE), b""):
+                writer.write(chunk)
+                piped += len(chunk)
+            writer.close()
+        except BrokenPipeError:
+            # dest exited early, its exit code and output tell why. The exit code of the killed source does not
+            killed = True
+            src.kill()
+            with contextlib.suppress(BrokenPipeError):
+                writer.close()
+        except BaseException:
+            src.kill()
+            dst.kill()
+            raise
+        finally:
+            reader.close()
+            src_code, dst_code = src.wait(), dst.wait()
+
+        checks = [(dest, dst_code, dest_out)] if killed else [(source, src_code, source_err), (dest, dst_code, dest_out)]
+        for cmd, code, output in checks:
+            if code != 0:
+                output.seek(0)
+                raise CopyError("`{}` exited with {}: {}".format(" ".join(cmd), code,
+                                                                 output.read().decode(errors="replace").strip()))
+        if killed:
+            raise CopyError("`{}` exited before reading all input".format(" ".join(dest)))
+        return piped
+
+
+class Manifest(object):
+    """Keys of finished jobs, one JSON object per line so an interrupted run keeps every finished job"""
+    def __init__(self, path: Path):
+        super(Manifest, self).__init__()
+        self.path = path
+        self._lock = threading.Lock()
+        self.done: Set[str] = set()
+        if path.exists():
+            for line in path.read_text().splitlines():
+                if line.strip():
+                    self.done.add(json.loads(line)['key'])
+
+    def add(self, key: str, **info: Any) -> None:
+        with self._lock:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            with self.path.open("a") as f:
+                f.write(json.dumps(dict(info, key=key)) + "\n")
+                f.flush()
+                os.fsync(f.fileno())
+            self.done.add(key)
+
+
+class CopyEngine(object):
+    """Runs the jobs of a copy with up to concurrency jobs at a time, retrying failed jobs"""
+    def __init__(self,
+                 manifest: Manifest,
+                 concurrency: int = DEFAULT_CONCURRENCY,
+                 retries: int = DEFAULT_RETRIES,
+                 retry_delay: float = DEFAULT_RETRY_DELAY,
+                 out: TextIO = sys.stdout):
+        super(CopyEngine, self).__init__()
+        self.manifest = manifest
+        self.concurrency = max(1, concurrency)
+        self.retries = retries
+        self.retry_delay = retry_delay
+        self.out = out
+        self._lock = threading.Lock()
+
+    def log(self, message: str) -> None:
+        with self._lock:
+            print(message, file=self.out, flush=True)
+
+    def attempt(self, job: Job) -> int:
+        attempt = 0
+        while True:
+            try:
+                return job.run()
+            except PermanentCopyError:
+                raise
+            except (CopyError, OSError) as e:
+                if attempt >= self.retries:
+                    raise CopyError(str(e))
+                delay = self.retry_delay * 2**attempt
+                attempt += 1
+                self.log("{}: {} - retrying in {:.1f}s ({}/{})".format(job.key, e, delay, attempt, self.retries))
+                time.sleep(delay)
+
+    def run(self, jobs: List[Job]) -> List[str]:
+        """runs the jobs which are not in the manifest yet. Returns the keys of jobs which failed"""
+        pending = [j for j in jobs if j.key not in self.manifest.done]
+        if len(pending) < len(jobs):
+            self.log("Skipping {} volumes finished before".format(len(jobs) - len(pending)))
+
+        start = time.monotonic()
+        copied = 0
+        failed: List[str] = []
+        with ThreadPoolExecutor(max_workers=self.concurrency) as executor:
+            futures = {executor.submit(self.timed, job): job for job in pending}
+            for done, future in enumerate(as_completed(futures), 1):
+                job = futures[future]
+                try:
+                    size, seconds = future.result()
+                except CopyError as e:
+                    failed.append(job.key)
+                    self.log("[{}/{}] {} failed: {}".format(done, len(pending), job.key, e))
+                    continue
+                copied += size
+                self.manifest.add(job.key, bytes=size, seconds=round(seconds, 3))
+                self.log("[{}/{}] {}: {} in {:.1f}s ({}/s)".format(done, len(pending), job.key, format_bytes(size),
+                                                                   seconds, format_bytes(size / max(seconds, 1e-6))))
+
+        seconds = time.monotonic() - start
+        self.log("Copied {} of {} volumes, {} in {:.1f}s ({}/s)".format(
+            len(pending) - len(failed), len(pending), format_bytes(copied), seconds,
+            format_bytes(copied / max(seconds, 1e-6))))
+        return failed
+
+    def timed(self, job: Job) -> Tuple[int, float]:
+        start = time.monotonic()
+        size = self.attempt(job)
+        return size, time.monotonic() - start
+
+
+def instance_dir(target: Path, idx: int) -> Path:
+    return target / "download" / str(idx)
+
+
+def download_job(dcos: str, target: Path, idx: int, task_id: str, mount: Mount) -> Job:
+    def run() -> int:
+        dest = instance_dir(target, idx)
+        final = dest / mount.name
+        # download next to the final folder, so a failed attempt never leaves partial data behind
+        partial = dest / ".{}.partial".format(mount.name)
+        shutil.rmtree(str(partial), ignore_errors=True)
+        partial.mkdir(parents=True)
+
+        run_command([dcos, "task", "download", task_id, mount.name, "--target-dir", str(partial)])
+        downloaded = partial / os.path.basename(mount.name)
+        if not downloaded.exists():
+            raise CopyError("`dcos task download` did not create {}".format(downloaded))
+
+        shutil.rmtree(str(final), ignore_errors=True)
+        downloaded.rename(final)
+        shutil.rmtree(str(partial), ignore_errors=True)
+        return dir_size(final)
+
+    # the instance index is part of the key. Data of a task is only valid at the index it was downloaded to
+    return Job("{}/{}/{}".format(idx, task_id, mount.name), run)
+
+
+def upload_job(kubectl: str, target: Path, idx: int, pod: str, mount: Mount) -> Job:
+    def run() -> int:
+        source = instance_dir(target, idx) / mount.name
+        if not source.is_dir():
+            raise PermanentCopyError("no downloaded data for instance {} in {}".format(idx, source))
+        run_command([kubectl, "cp", str(source) + "/", "{}:{}".format(pod, os.path.dirname(mount.path))])
+        return dir_size(source)
+
+    return Job("{}/{}".format(pod, mount.name), run)
+
+
+def checksum_script(folder: str, name: str) -> str:
+    """sh script printing the sha256 of every file below name in folder, which may be a shell expression"""
+    return "cd {} && find {} -type f -exec sha256sum {{}} +".format(folder, shlex.quote(name))
+
+
+def parse_checksums(output: str) -> Dict[str, str]:
+    """
+    >>> parse_checksums("ab  data/a file\\ncd  data/b\\n")
+    {'data/a file': 'ab', 'data/b': 'cd'}
+    """
+    checksums = {}
+    for line in output.splitlines():
+        if line.strip():
+            checksum, path = line.split(None, 1)
+            checksums[path] = checksum
+    return checksums
+
+
+def first_paths(paths: List[str]) -> str:
+    return ", ".join(paths[:5]) + (", ..." if len(paths) > 5 else "")
+
+
+def compare_checksums(source: Dict[str, str], dest: Dict[str, str]) -> List[str]:
+    """
+    raises CopyError listing the first source files which differ in dest. Returns the paths
+    of files only found in dest, like files the pod wrote before. They are never removed.
+
+    >>> compare_checksums({"data/a": "ab"}, {"data/a": "ab", "data/lost+found/x": "cd"})
+    ['data/lost+found/x']
+    """
+    differ = sorted(p for p in source if source[p] != dest.get(p))
+    if differ:
+        raise CopyError("checksums of {} files differ after the copy: {}".format(len(differ), first_paths(differ)))
+    return sorted(set(dest) - set(source))
+
+
+def stream_job(dcos: str, kubectl: str, task_id: str, pod: str, mount: Mount, compression: str,
+               log: Callable[[str], None]) -> Job:
+    # like the downloaded folder uploaded with `kubectl cp`, the volume ends up in the parent of its path
+    source_folder, name = posixpath.split(mount.name)
+    source_dir = '"$MESOS_SANDBOX"/{}'.format(shlex.quote(source_folder)) if source_folder else '"$MESOS_SANDBOX"'
+    dest_dir = shlex.quote(posixpath.dirname(mount.path) or "/")
+    flag = COMPRESSION[compression]
+    key = "{}/{}/{}".format(pod, task_id, mount.name)
+
+    def run() -> int:
+        source_sums = parse_checksums(
+            run_command([dcos, "task", "exec", task_id, "sh", "-c",
+                         checksum_script(source_dir, name)]))
+        piped = pipe_commands(
+            [dcos, "task", "exec", task_id, "sh", "-c", "tar -C {} -c{}f - {}".format(source_dir, flag,
+                                                                                     shlex.quote(name))],
+            [kubectl, "exec", "-i", pod, "--", "sh", "-c", "mkdir -p {0} && tar -C {0} -x{1}f -".format(dest_dir, flag)])
+        dest_sums = parse_checksums(
+            run_command([kubectl, "exec", pod, "--", "sh", "-c", checksum_script(dest_dir, name)]))
+        extra = compare_checksums(source_sums, dest_sums)
+        if extra:
+            log("{}: {} files in the pod are not in the task: {}".format(key, len(extra), first_paths(extra)))
+        return piped
+
+    return Job(key, run)
+
+
+def pod_ordinal(pod: str) -> int:
+    """
+    >>> sorted(["app-10", "app-2", "app-0"], key=pod_ordinal)
+    ['app-0', 'app-2', 'app-10']
+    """
+    _, _, ordinal = pod.rpartition("-")
+    return int(ordinal) if ordinal.isdigit() else -1
+
+
+def list_tasks(config: CopyConfig, dcos: str) -> List[str]:
+    tasks = sorted(run_command([dcos, "marathon", "task", "list", "-q", config.app_id]).split())
+    if not tasks:
+        raise CopyError("app {} has no tasks".format(config.app_id))
+    return tasks
+
+
+def list_pods(config: CopyConfig, kubectl: str) -> List[str]:
+    pods = sorted(
+        run_command([
+            kubectl, "get", "pods", "-l", "app={}".format(config.k8s_app_id), "-o",
+            "jsonpath={.items[*].metadata.name}"
+        ]).split(),
+        key=pod_ordinal)
+    if not pods:
+        raise CopyError("StatefulSet {} has no pods".format(config.k8s_app_id))
+    return pods
+
+
+def download_jobs(config: CopyConfig, target: Path, dcos: str) -> List[Job]:
+    tasks = list_tasks(config, dcos)
+    return [download_job(dcos, target, idx, task, m) for idx, task in enumerate(tasks) for m in config.mounts]
+
+
+def downloaded_instances(target: Path) -> List[int]:
+    download = target / "download"
+    if not download.is_dir():
+        return []
+    return sorted(int(p.name) for p in download.iterdir() if p.is_dir() and p.name.isdigit())
+
+
+def upload_jobs(config: CopyConfig, target: Path, kubectl: str) -> List[Job]:
+    pods = list_pods(config, kubectl)
+    instances = downloaded_instances(target)
+    if instances != list(range(len(pods))):
+        raise CopyError("{} instances of app {} are downloaded but StatefulSet {} has {} pods".format(
+            len(instances), config.app_id, config.k8s_app_id, len(pods)))
+    return [upload_job(kubectl, target, idx, pod, m) for idx, pod in enumerate(pods) for m in config.mounts]
+
+
+def stream_jobs(config: CopyConfig, dcos: str, kubectl: str, compression: str,
+                log: Callable[[str], None]) -> List[Job]:
+    tasks = list_tasks(config, dcos)
+    pods = list_pods(config, kubectl)
+    if len(tasks) != len(pods):
+        raise CopyError("app {} has {} tasks but StatefulSet {} has {} pods".format(
+            config.app_id, len(tasks), config.k8s_app_id, len(pods)))
+    return [
+        stream_job(dcos, kubectl, task, pod, m, compression, log) for task, pod in zip(tasks, pods)
+        for m in config.mounts
+    ]
+
+
+def main(argv: Optional[List[str]] = None, out: TextIO = sys.stdout) -> int:
+    parser = argparse.ArgumentParser(description="Copy the persistent volumes of a stateful Marathon app")
+    parser.add_argument("command", choices=["download", "upload", "stream"])
+    parser.add_argument("--config", default=CONFIG_FILE, help="Copy configuration written by dcos-migrate")
+    parser.add_argument("--target", default="target", help="Folder of the downloaded data and the manifests")
+    parser.add_argument("--concurrency",
+                        type=int,
+                        default=int(os.environ.get("STATEFUL_COPY_CONCURRENCY", 0)) or None,
+                        help="Volumes copied at the same time. Defaults to $STATEFUL_COPY_CONCURRENCY or the config")
+    parser.add_argument("--retries", type=int, default=None, help="Retries of every volume. Defaults to the config")
+    parser.add_argument("--retry-delay", type=float, default=DEFAULT_RETRY_DELAY, help="Delay of the first retry")
+    parser.add_argument("--compress",
+                        choices=sorted(COMPRESSION),
+                        default=os.environ.get("STATEFUL_COPY_COMPRESS", "none"),
+                        help="Compression of the tar streamed by stream. Defaults to $STATEFUL_COPY_COMPRESS or none")
+    args = parser.parse_args(argv)
+
+    config = CopyConfig.from_json(Path(args.config).read_text())
+    target = Path(args.target)
+    dcos, kubectl = os.environ.get("DCOS_CLI", "dcos"), os.environ.get("KUBECTL", "kubectl")
+    engine = CopyEngine(Manifest(target / "{}.manifest".format(args.command)),
+                        concurrency=args.concurrency or config.concurrency,
+                        retries=config.retries if args.retries is None else args.retries,
+                        retry_delay=args.retry_delay,
+                        out=out)
+    try:
+        if args.command == "download":
+            jobs = download_jobs(config, target, dcos)
+        elif args.command == "upload":
+            jobs = upload_jobs(config, target, kubectl)
+        else:
+            jobs = stream_jobs(config, dcos, kubectl, args.compress, engine.log)
+    except CopyError as e:
+        print("Error: {}".format(e), file=out)
+        return 1
+
+    failed = engine.run(jobs)
+    if failed:
+        print("\nThe following volumes failed to {}:\n".format(args.command), file=out)
+        for key in failed:
+            print(" - {}".format(key), file=out)
+        return 1
+
+    print("{} complete".format(args.command.capitalize()), file=out)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
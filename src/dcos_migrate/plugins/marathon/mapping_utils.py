@@ -4,7 +4,7 @@ with semi-independent fields into another JSON-serializable object.
 """
 
 from collections import namedtuple
-from typing import (cast, Any, Callable, Dict, Iterator, List, Mapping, Optional, Tuple, TypeVar, Set, Union)
+from typing import (cast, Any, Callable, Dict, FrozenSet, List, Mapping, Optional, Tuple, TypeVar, Union)
 
 
 class Translated(object):
@@ -12,17 +12,46 @@ class Translated(object):
         A return value of mapper functions passed into `apply_mapping()`
     """
     def __init__(self, update: Optional[Dict[str, Any]] = None, warnings: Optional[List[str]] = None):
-        self.update: Dict[str, Any] = {} if update is None else update
+        self._update: Dict[str, Any] = {} if update is None else update
+        # set by merged_with. The updates of both parts are merged once, when `update` is read
+        self._parts: Optional[Tuple['Translated', 'Translated']] = None
         self.warnings: List[str] = [] if warnings is None else warnings
 
+    @property
+    def update(self) -> Dict[str, Any]:
+        if self._parts is not None:
+            # walk down the chain of merged_with calls and merge the parts on the way back up into
+            # a single accumulator, in the order deep_merge would have merged them
+            rights = []
+            node = self
+            while node._parts is not None:
+                node, right = node._parts
+                rights.append(right)
+
+            merger = Merger()
+            merger.add(node.update)
+            for right in reversed(rights):
+                merger.add(right.update)
+            self._update, self._parts = merger.result, None
+
+        return self._update
+
     def merged_with(self, other: 'Translated') -> 'Translated':
-        return Translated(update=deep_merge(self.update, other.update), warnings=self.warnings + other.warnings)
+        """
+        >>> a = Translated({"foo": [1]}, ["a"]).merged_with(Translated({"foo": ListExtension([2])}))
+        >>> merged = a.merged_with(Translated({"bar": 3}, ["b"]))
+        >>> merged.update == {"foo": [1, 2], "bar": 3}, merged.warnings
+        (True, ['a', 'b'])
+        """
+        merged = Translated(warnings=self.warnings + other.warnings)
+        merged._parts = (self, other)
+        return merged
 
 
 MappingKey = Union[str, Tuple[str, ...]]
 
 
-def apply_mapping(mapping: Mapping[MappingKey, Callable[[Any], Translated]], data: Mapping[str, Any],
+def apply_mapping(mapping: Mapping[MappingKey, Callable[..., Translated]], data: Mapping[str, Any],
                   error_location: str) -> Tuple[Dict[str, Any], List[str]]:
     """
     >>> mapper = lambda n: Translated({"outer": [{"inner": n*2}]})
@@ -54,45 +83,58 @@ def apply_mapping(mapping: Mapping[MappingKey, Callable[[Any], Translated]], dat
     Exception: Bad translation result in "app" for key "foo"
 
     """
-    def map_group(group: MappingKey, mapper: Callable[[Any], Translated]) -> Tuple[Set[str], Translated]:
-        if isinstance(group, tuple):
-            fields = set(group) & data.keys()
-            return fields, mapper({field: data[field] for field in fields})
-
-        try:
-            value = data[group]
-        except KeyError:
-            return set(), Translated()
-
-        return {group}, mapper(value)
-
-    unknown = data.keys()
-    result: Dict[Any, Any] = {}
-    warnings = []
-
-    for key in sorted(mapping.keys(), key=str):
-        mapper = mapping[key]
-        mapped_app_fields, translated = map_group(key, mapper)
-        if not isinstance(translated, Translated):
-            raise Exception('Bad translation result in "{}" for key "{}"'.format(error_location, key))
+    return CompiledMapping(mapping).apply(data, error_location)
 
-        warnings += ['"{}": {}'.format(key, warn) for warn in translated.warnings]
 
-        try:
-            result = deep_merge(result, translated.update)
-        except UpdateConflict as err:
-            raise Exception('Error composing the result object for "{}": {}'.format(error_location, err))
-
-        unknown -= mapped_app_fields
-
-    if unknown:
-        # We intentionally crash the script when unknown fields are discovered.
-        # The fields that cannot or should not be mapped should be explicitly added
-        # into the corresponding `generate_..._mappings()` function.
-        raise RuntimeError('"{}" has fields {} that are not present in the field mappings'.format(
-            error_location, ', '.join('"{}"'.format(_) for _ in sorted(unknown))))
+class CompiledMapping(object):
+    """
+    A mapping of `apply_mapping()` prepared once and applied to many objects. Mappers get the
+    value and the context passed to `apply()`, so they do not need to be created for every object.
 
-    return result, warnings
+    >>> mapping = CompiledMapping({("foo", "bar"): lambda d, n: Translated({"sum": sum(d.values()) * n})})
+    >>> result, _ = mapping.apply({"foo": 1, "bar": 2}, "", 2)
+    >>> result == {"sum": 6}
+    True
+    """
+    def __init__(self, mapping: Mapping[MappingKey, Callable[..., Translated]]):
+        super(CompiledMapping, self).__init__()
+        self.groups: List[Tuple[MappingKey, Callable[..., Translated]]] = sorted(mapping.items(),
+                                                                                key=lambda item: str(item[0]))
+        self.fields: FrozenSet[str] = frozenset(field for key in mapping
+                                                for field in (key if isinstance(key, tuple) else (key, )))
+
+    def apply(self, data: Mapping[str, Any], error_location: str, *context: Any) -> Tuple[Dict[str, Any], List[str]]:
+        merger = Merger()
+        warnings = []
+
+        for key, mapper in self.groups:
+            if isinstance(key, tuple):
+                # keep the order of the group. Iterating a set would reorder the fields on every run
+                translated = mapper({field: data[field] for field in key if field in data}, *context)
+            elif key in data:
+                translated = mapper(data[key], *context)
+            else:
+                continue
+
+            if not isinstance(translated, Translated):
+                raise Exception('Bad translation result in "{}" for key "{}"'.format(error_location, key))
+
+            warnings += ['"{}": {}'.format(key, warn) for warn in translated.warnings]
+
+            try:
+                merger.add(translated.update)
+            except UpdateConflict as err:
+                raise Exception('Error composing the result object for "{}": {}'.format(error_location, err))
+
+        unknown = data.keys() - self.fields
+        if unknown:
+            # We intentionally crash the script when unknown fields are discovered.
+            # The fields that cannot or should not be mapped should be explicitly added
+            # into the corresponding mapping, like ROOT_MAPPING of the app translator.
+            raise RuntimeError('"{}" has fields {} that are not present in the field mappings'.format(
+                error_location, ', '.join('"{}"'.format(_) for _ in sorted(unknown))))
+
+        return merger.result, warnings
 
 
 # This is used in objects passed into `deep_merge()` to apply an alternative
@@ -152,35 +194,87 @@ def deep_merge(first: T, second: T, debug_prefix: str = '') -> T:
     >>> result == {"foo": ListExtension([1]), "bar": [2]}
     True
     """
-    if all(isinstance(_, dict) for _ in (first, second)):
-
-        def iter_items(first: Dict[str, Any], second: Dict[str, Any]) -> Iterator[Tuple[str, Any]]:
-            for key in first.keys() - second.keys():
-                yield key, first[key]
-            for key in second.keys() - first.keys():
-                yield key, second[key]
-            for key in first.keys() & second.keys():
-                yield key, deep_merge(first[key], second[key], debug_prefix + '.' + str(key))
-
-        return cast(T, dict(iter_items(cast(Dict[str, Any], first), cast(Dict[str, Any], second))))
-
-    if isinstance(first, List) and isinstance(second, List):
-        min_len = min(len(first), len(second))
-        return cast(T, [deep_merge(first[n], second[n], '{}[{}]'.format(debug_prefix, n))
-                        for n in range(min_len)] + first[min_len:] + second[min_len:])
-
-    if any(isinstance(_, ListExtension) for _ in (first, second)):
-        base, extension = (first, second) if isinstance(second, ListExtension) else (second, first)
-        assert isinstance(extension, ListExtension)
-        if isinstance(base, ListExtension):
-            return cast(T, ListExtension(base.items + extension.items))
-        if isinstance(base, list):
-            return cast(T, base + extension.items)
-
-    if first == second:
-        return first
-
-    raise UpdateConflict('Conflicting values for {}: {} and {}'.format(debug_prefix, first, second))
+    return cast(T, Merger().merge(first, second, debug_prefix))
+
+
+class Merger(object):
+    """
+    Merges updates into a single result with the semantics of `deep_merge()`. Values of
+    the updates are shared, not copied. A container is copied once, when it is changed
+    for the first time, and changed in place by later updates. So every update costs the
+    size of the update instead of the size of the result.
+
+    >>> merger = Merger()
+    >>> update = {"foo": [{"bar": 1}], "baz": ListExtension([1])}
+    >>> merger.add(update)
+    >>> merger.add({"foo": [{"qux": 2}, 3], "baz": ListExtension([2])})
+    >>> merger.result == {"foo": [{"bar": 1, "qux": 2}, 3], "baz": ListExtension([1, 2])}
+    True
+    >>> update == {"foo": [{"bar": 1}], "baz": ListExtension([1])}
+    True
+
+    >>> merger.add({"foo": [{"bar": 2}]}) # doctest: +IGNORE_EXCEPTION_DETAIL
+    Traceback (most recent call last):
+        ...
+    UpdateConflict: Conflicting values for .foo[0].bar: 1 and 2
+    """
+    def __init__(self) -> None:
+        super(Merger, self).__init__()
+        self.result: Dict[str, Any] = {}
+        # containers created by this merger by id. Holding them keeps the ids from being reused
+        self._owned: Dict[int, Any] = {id(self.result): self.result}
+
+    def add(self, update: Dict[str, Any]) -> None:
+        # most mappers of an object only warn or skip a field
+        if update:
+            self.result = self.merge(self.result, update, '')
+
+    def _own(self, value: Any) -> Any:
+        self._owned[id(value)] = value
+        return value
+
+    def _mutable(self, value: Any) -> Any:
+        if id(value) in self._owned:
+            return value
+        if isinstance(value, ListExtension):
+            return self._own(ListExtension(list(value.items)))
+        return self._own(value.copy())
+
+    def merge(self, first: Any, second: Any, debug_prefix: str) -> Any:
+        """merges second into first. Only containers owned by this merger are changed"""
+        if isinstance(first, dict) and isinstance(second, dict):
+            first = self._mutable(first)
+            for key, value in second.items():
+                first[key] = self.merge(first[key], value, debug_prefix + '.' + str(key)) if key in first else value
+            return first
+
+        if isinstance(first, list) and isinstance(second, list):
+            first = self._mutable(first)
+            for n, value in enumerate(second):
+                if n < len(first):
+                    first[n] = self.merge(first[n], value, '{}[{}]'.format(debug_prefix, n))
+                else:
+                    first.append(value)
+            return first
+
+        if isinstance(second, ListExtension):
+            if isinstance(first, ListExtension):
+                first = self._mutable(first)
+                first.items.extend(second.items)
+                return first
+            if isinstance(first, list):
+                first = self._mutable(first)
+                first.extend(second.items)
+                return first
+        elif isinstance(first, ListExtension) and isinstance(second, list):
+            merged = self._own(list(second))
+            merged.extend(first.items)
+            return merged
+
+        if first == second:
+            return first
+
+        raise UpdateConflict('Conflicting values for {}: {} and {}'.format(debug_prefix, first, second))
 
 
 def finalize_unmerged_list_extensions(merged: Any) -> Any:
@@ -1,11 +1,10 @@
-from dcos_migrate.system import Manifest, ManifestList, Migrator, with_comment
+from dcos_migrate.system import Backup, BackupList, Manifest, ManifestList, Migrator
 import dcos_migrate.utils as utils
-from kubernetes.client.models import V1Deployment, V1Service, V1ObjectMeta, V1Secret  # type: ignore
-from kubernetes.client import ApiClient, V1StatefulSet  # type: ignore
+from kubernetes.client.models import V1ObjectMeta, V1Secret  # type: ignore
 
-from .app_translator import ContainerDefaults, translate_app, Settings
+from .app_translator import ContainerDefaults, Settings
 from .app_secrets import TrackingAppSecretMapping, SecretRemapping
-from .service_translator import translate_service
+from .batch import translate_app_resources
 from .stateful_copy import make_sleeper_stateful_set, configure_stateful_migrate
 
 import logging
@@ -30,28 +29,21 @@ class NodeLabelTracker(object):
         return dict(apps_by_label)
 
 
-@with_comment
-class V1ServiceWithComment(V1Service):  # type: ignore
-    pass
-
-
-@with_comment
-class V1DeploymentWithComment(V1Deployment):  # type: ignore
-    pass
-
-
-@with_comment
-class V1StatefulSetWithComment(V1StatefulSet):  # type: ignore
-    pass
+CONTAINER_DEFAULTS = ContainerDefaults("alpine:latest", "/")
 
 
 class MarathonMigrator(Migrator):
     """docstring for MarathonMigrator."""
-    def __init__(self, node_label_tracker: Optional[NodeLabelTracker] = None, **kw: Any):
+    def __init__(self,
+                 node_label_tracker: Optional[NodeLabelTracker] = None,
+                 stateful_apps: Optional[Set[str]] = None,
+                 **kw: Any):
         super(MarathonMigrator, self).__init__(**kw)
 
         self._node_label_tracker = NodeLabelTracker() if node_label_tracker is None\
             else node_label_tracker
+        # ids of the apps stateful copy files were written for
+        self._stateful_apps = set() if stateful_apps is None else stateful_apps
 
         assert self.object is not None
         self._secret_mapping = TrackingAppSecretMapping(self.object['id'], self.object.get('secrets', {}))
@@ -70,41 +62,32 @@ class MarathonMigrator(Migrator):
             logging.warning('Not translating app %s: it runs Mesos framework %s', value, dcos_package_framework_name)
             return
 
-        settings = Settings(
-            container_defaults=ContainerDefaults("alpine:latest", "/"),
-            app_secret_mapping=self._secret_mapping,
-        )
+        settings = Settings(container_defaults=CONTAINER_DEFAULTS, app_secret_mapping=self._secret_mapping)
 
         self.manifest = Manifest(pluginName="marathon", manifestName=self.dnsify(value))
 
         assert self.object is not None
 
-        translated = translate_app(self.object, settings)
+        resources = translate_app_resources(self.object, settings)
+        translated = resources.translated
 
-        kc = ApiClient()
         if translated.deployment['kind'] == "StatefulSet":
-            sleeper_stateful_set = make_sleeper_stateful_set(translated.deployment)
-            dapp = kc._ApiClient__deserialize(sleeper_stateful_set, V1StatefulSetWithComment)
+            dapp = resources.deployment_model(make_sleeper_stateful_set(translated.deployment))
             try:
                 configure_stateful_migrate(original_marathon_app=self.object,
                                            k8s_translate_result=translated.deployment)
             except:
                 print("Unexpected error while preparing Marathon stateful migration:", sys.exc_info()[0])
                 raise
+            self._stateful_apps.add(self.object['id'])
         else:
-            dapp = kc._ApiClient__deserialize(translated.deployment, V1DeploymentWithComment)
-
-        dapp.set_comment(translated.warnings)
+            dapp = resources.deployment_model()
 
         self.manifest.append(dapp)
         self._node_label_tracker.add_app_node_labels(self.object['id'], translated.required_node_labels)
 
-        service, service_warnings = translate_service(dapp.metadata.labels['app'], self.object)
-        if service:
-            kc2 = ApiClient()
-            dservice = kc2._ApiClient__deserialize(service, V1ServiceWithComment)
-            dservice.set_comment(service_warnings)
-            self.manifest.append(dservice)
+        if resources.service:
+            self.manifest.append(resources.service_model())
 
         for remapping in self._secret_mapping.get_secrets_to_remap():
             secret = _create_remapped_secret(self.manifest_list, remapping, self.object['id'])
@@ -112,6 +95,26 @@ class MarathonMigrator(Migrator):
                 self.manifest.append(secret)
 
 
+def migrate_app(backup: Backup,
+                backup_list: Optional[BackupList],
+                manifest_list: Optional[ManifestList],
+                node_label_tracker: NodeLabelTracker,
+                stateful_apps: Optional[Set[str]] = None) -> Optional[Manifest]:
+    """translates a single app. Apps which cannot be translated are logged and skipped"""
+    mig = MarathonMigrator(node_label_tracker=node_label_tracker,
+                           stateful_apps=stateful_apps,
+                           backup=backup,
+                           backup_list=backup_list,
+                           manifest_list=manifest_list)
+    try:
+        manifest = mig.migrate()
+        if manifest:
+            return manifest
+    except Exception as e:
+        logging.warning("Cannot migrate: {}".format(e))
+    return None
+
+
 class NoMigratedSecretFound(RuntimeError):
     pass
 
@@ -126,11 +129,7 @@ def _create_remapped_secret(
         return None
 
     assert manifest_list is not None
-    clusterMeta: Optional[V1ObjectMeta] = manifest_list.clusterMeta()
-
-    metadata = V1ObjectMeta(annotations={})
-    if clusterMeta is not None:
-        metadata.annotations = clusterMeta.annotations
+    metadata = V1ObjectMeta(annotations=dict(manifest_list.clusterAnnotations()))
 
     metadata.annotations[utils.namespace_path("marathon-appid")] = app_id
     metadata.name = utils.dnsify(remapping.dest_name)
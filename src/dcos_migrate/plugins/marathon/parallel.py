@@ -0,0 +1,98 @@
+import logging
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Dict, Iterator, List, NamedTuple, Optional, Set, Tuple
+
+from dcos_migrate.system import Backup, Manifest, ManifestList
+from .migrator import NodeLabelTracker, migrate_app
+
+
+class TranslatedApp(NamedTuple):
+    # name and serialized documents of the manifest or None if the app was skipped
+    manifest: Optional[Tuple[str, str]]
+    node_labels: Dict[str, Set[str]]
+    records: List[logging.LogRecord]
+    # ids of the apps stateful copy files were written for
+    stateful_apps: Set[str]
+
+
+class RecordCollector(logging.Handler):
+    """Keeps the log records of a worker, so the parent can emit them in app order."""
+    def __init__(self) -> None:
+        super(RecordCollector, self).__init__()
+        self.records: List[logging.LogRecord] = []
+
+    def emit(self, record: logging.LogRecord) -> None:
+        # arguments and tracebacks may not be picklable. Render them like QueueHandler does
+        record.msg = record.getMessage()
+        record.args = ()
+        if record.exc_info:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        self.records.append(record)
+
+    def take(self) -> List[logging.LogRecord]:
+        records, self.records = self.records, []
+        return records
+
+
+_manifest_list: Optional[ManifestList] = None
+_collector: Optional[RecordCollector] = None
+
+
+def _init_worker(manifests: List[Tuple[str, str, str]], level: int) -> None:
+    global _manifest_list, _collector
+    _manifest_list = ManifestList()
+    for pluginName, name, data in manifests:
+        _manifest_list.append_data(pluginName=pluginName, backupName=name, extension='yaml', data=data, lazy=True)
+
+    _collector = RecordCollector()
+    root = logging.getLogger()
+    root.handlers = [_collector]
+    root.setLevel(level)
+
+
+def _translate(task: Tuple[str, str, Dict[str, Any]]) -> TranslatedApp:
+    pluginName, name, data = task
+    assert _collector is not None
+    tracker = NodeLabelTracker()
+    stateful_apps: Set[str] = set()
+    manifest = migrate_app(Backup(pluginName=pluginName, backupName=name, data=data), None, _manifest_list, tracker,
+                           stateful_apps)
+    return TranslatedApp(None if manifest is None else (manifest.name, manifest.serialize()),
+                         dict(tracker.labels_by_app), _collector.take(), stateful_apps)
+
+
+def translate_parallel(backups: List[Backup], manifestList: ManifestList, depends: List[str], tracker: NodeLabelTracker,
+                       processes: int, stateful_apps: Set[str]) -> Iterator[Optional[Manifest]]:
+    """
+    Translates the apps of backups in a pool of worker processes and yields the manifest
+    of every backup in order, None for skipped apps. Workers get the manifests of the
+    plugins in depends, like secrets to remap. Node labels, log records and stateful apps
+    of the workers are merged into tracker, the log of this process and stateful_apps.
+    """
+    manifests = [(m.plugin_name, m.name, m.serialize()) for m in manifestList if m.plugin_name in depends]
+    tasks = [(b.plugin_name, b.name, b.data) for b in backups]
+    chunksize = max(1, len(tasks) // (processes * 8))
+
+    # plugins run in threads. A forked child could inherit locks held by other threads
+    context = multiprocessing.get_context("spawn")
+    with ProcessPoolExecutor(max_workers=processes,
+                             mp_context=context,
+                             initializer=_init_worker,
+                             initargs=(manifests, logging.getLogger().getEffectiveLevel())) as executor:
+        for result in executor.map(_translate, tasks, chunksize=chunksize):
+            for record in result.records:
+                logging.getLogger(record.name).handle(record)
+            for app, labels in result.node_labels.items():
+                tracker.add_app_node_labels(app, labels)
+            stateful_apps.update(result.stateful_apps)
+
+            if result.manifest is None:
+                yield None
+                continue
+            name, data = result.manifest
+            m = Manifest(pluginName="marathon", manifestName=name)
+            # never parsed here. serialize returns the documents rendered by the worker
+            m.deserialize(data, lazy=True)
+            yield m
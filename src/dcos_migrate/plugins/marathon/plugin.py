@@ -1,12 +1,25 @@
-from dcos_migrate.plugins.plugin import MigratePlugin
+from dcos_migrate.plugins.plugin import BackupTranslation, MigratePlugin, RecordCapture
 from dcos_migrate.plugins.cluster import ClusterPlugin
 from dcos_migrate.plugins.secret import SecretPlugin
-from dcos_migrate.system import DCOSClient, BackupList, Backup, ManifestList, DictArg, Arg
-from .migrator import MarathonMigrator, NodeLabelTracker
+from dcos_migrate.system import DCOSClient, BackupList, Backup, Manifest, ManifestList, DictArg, Arg, BoolArg
+from dcos_migrate.system.backup_list import field_path
+from dcos_migrate.system.json_stream import iter_array
+from .migrator import NodeLabelTracker, migrate_app
+from .parallel import translate_parallel
+from .stateful_copy import stateful_copy_files
 
+import functools
 import json
 import logging
-from typing import Any, Dict
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Set, Tuple
+from urllib.parse import urlencode
+
+# embed parameters of /v2/apps. Embedded data is part of the backup but not translated
+EMBED_CHOICES = ["apps.tasks", "apps.counts", "apps.deployments", "apps.readiness", "apps.lastTaskFailure",
+                 "apps.taskStats"]
+# fields of apps other plugins look up with BackupList.match_field, like jenkins. They are kept
+# when a backup is unloaded, so the lookup does not read every app from disk again
+KEPT_FIELDS = (field_path("labels.DCOS_PACKAGE_NAME"), )
 
 
 class MarathonPlugin(MigratePlugin):
@@ -14,6 +27,7 @@ class MarathonPlugin(MigratePlugin):
 
     plugin_name = "marathon"
     migrate_depends = [ClusterPlugin.plugin_name, SecretPlugin.plugin_name]
+    migrate_cacheable = True
 
     def __init__(self) -> None:
         super(MarathonPlugin, self).__init__()
@@ -34,15 +48,112 @@ class MarathonPlugin(MigratePlugin):
                 plugin_name=self.plugin_name,
                 default="/",
                 metavar="WORKDIR",
-                help='Workdir which fetched artifacts are downloaded to.')
+                help='Workdir which fetched artifacts are downloaded to.'),
+            BoolArg("incremental",
+                    plugin_name=self.plugin_name,
+                    default=False,
+                    help='Compare apps with the previous backup by version and only rewrite changed apps.'),
+            Arg("embed",
+                plugin_name=self.plugin_name,
+                nargs="*",
+                choices=EMBED_CHOICES,
+                metavar="EMBED",
+                help='Embed data like apps.tasks into the backup of every app. One of {}.'.format(
+                    ", ".join(EMBED_CHOICES))),
+            Arg("processes",
+                plugin_name=self.plugin_name,
+                type=int,
+                default=0,
+                metavar="N",
+                help='Translate apps in N worker processes. 0 translates them in the plugin thread.'),
         ]
 
+    @property
+    def processes(self) -> int:
+        return int((self.plugin_config or {}).get('processes', 0))
+
+    @property
+    def incremental(self) -> bool:
+        return bool((self.plugin_config or {}).get('incremental', False))
+
+    @property
+    def embed(self) -> List[str]:
+        return list((self.plugin_config or {}).get('embed', []))
+
+    def fetchApps(self, client: DCOSClient, chunk_size: int = 64 * 1024) -> Iterator[Dict[str, Any]]:
+        """yields the apps of /v2/apps one at a time while the response is read"""
+        url = "{}/marathon/v2/apps".format(client.dcos_url)
+        if self.embed:
+            url += "?" + urlencode([("embed", e) for e in self.embed])
+        response = client.get(url, stream=True)
+        try:
+            yield from iter_array(response.iter_content(chunk_size=chunk_size), "apps")
+        finally:
+            response.close()
+
     def backup(  # type: ignore
-            self, client: DCOSClient, **kwargs) -> BackupList:
+            self, client: DCOSClient, backupList: Optional[BackupList] = None, **kwargs) -> BackupList:
+        current = (self.createBackup(app) for app in self.fetchApps(client))
+        # apps are streamed to where the caller keeps its backups. Without a caller list nothing is written
+        stored = BackupList(path=backupList.path) if backupList is not None else BackupList(dry=True)
+
+        if self.incremental and backupList is not None:
+            return self.syncBackups(current, stored)
+
+        bl = BackupList()
+        for b in current:
+            bl.append(self.storeBackup(stored, b))
+        return bl
+
+    @staticmethod
+    def storeBackup(stored: BackupList, b: Backup) -> Backup:
+        """
+        writes b right away and unloads it. Later phases read the app from disk again, so
+        memory does not grow with the apps of the response.
+        """
+        _, data = stored.store_item(b)
+        if stored.dry:
+            # nothing to read it from again. Keep the text, which is smaller than the parsed app
+            b.deserialize(data, lazy=True)
+        else:
+            b.unload(functools.partial(stored.read_item, b), stored.item_path(b), KEPT_FIELDS)
+        return b
+
+    @staticmethod
+    def appVersion(b: Backup) -> Tuple[Any, Any]:
+        return b.data.get('version'), b.data.get('versionInfo')
+
+    def syncBackups(self, current: Iterable[Backup], stored: BackupList) -> BackupList:
+        """
+        Compare current apps with the ones stored by a previous backup. Apps with an
+        unchanged version keep their stored backup, changed and new apps are written
+        and backups of removed apps are deleted.
+        """
+        previous = {b.name: b for b in stored.load(pluginName=self.plugin_name) if isinstance(b, Backup)}
         bl = BackupList()
-        apps = client.get("{}/marathon/v2/apps".format(client.dcos_url)).json()
-        for app in apps['apps']:
-            bl.append(self.createBackup(app))
+        added, changed, unchanged = [], [], []
+
+        for b in current:
+            old = previous.pop(b.name, None)
+            if old is None:
+                added.append(b.name)
+            elif self.appVersion(old) != self.appVersion(b):
+                changed.append(b.name)
+            else:
+                unchanged.append(b.name)
+                old.unload(functools.partial(stored.read_item, old), stored.item_path(old), KEPT_FIELDS)
+                bl.append(old)
+                continue
+            bl.append(self.storeBackup(stored, b))
+
+        for old in previous.values():
+            stored.remove_item(old)
+
+        for state, names in [("new", added), ("changed", changed), ("removed", sorted(previous))]:
+            if names:
+                logging.info("marathon apps {}: {}".format(state, ", ".join(names)))
+        print("marathon incremental backup: {} new, {} changed, {} removed, {} unchanged".format(
+            len(added), len(changed), len(previous), len(unchanged)))
 
         return bl
 
@@ -50,27 +161,60 @@ class MarathonPlugin(MigratePlugin):
         return Backup(pluginName=self.plugin_name, backupName=Backup.renderBackupName(app['id']), data=app)
 
     def migrate(self, backupList: BackupList, manifestList: ManifestList, **kwargs: Any) -> ManifestList:
+        ml = ManifestList()
+        translations = self.migrate_backups(list(backupList.backups(pluginName=self.plugin_name)), backupList,
+                                            manifestList)
+        for t in translations:
+            ml.extend(t.manifests)
+        self.migrate_report([t.info for t in translations])
+        return ml
+
+    def migrate_backups(self, backups: List[Backup], backupList: BackupList, manifestList: ManifestList,
+                        **kwargs: Any) -> List[BackupTranslation]:
         node_label_tracker = NodeLabelTracker()
+        stateful_apps: Set[str] = set()
 
-        ml = ManifestList()
+        translated: Iterable[Optional[Manifest]]
+        if self.processes > 1 and len(backups) > 1:
+            translated = translate_parallel(backups, manifestList, self.migrate_depends, node_label_tracker,
+                                            min(self.processes, len(backups)), stateful_apps)
+        else:
+            translated = (migrate_app(b, backupList, manifestList, node_label_tracker, stateful_apps)
+                          for b in backups)
 
-        for b in backupList.backups(pluginName=self.plugin_name):
-            mig = MarathonMigrator(node_label_tracker=node_label_tracker,
-                                   backup=b,
-                                   backup_list=backupList,
-                                   manifest_list=manifestList)
+        manifests = []
+        with RecordCapture() as capture:
+            # records of an app are logged while the next manifest is produced
+            for i, m in enumerate(translated):
+                manifests.append([] if m is None else [m])
+                capture.current = i + 1
 
-            try:
-                manifest = mig.migrate()
+        result = []
+        for i, (b, ms) in enumerate(zip(backups, manifests)):
+            app = b.data.get('id', b.name)
+            labels = node_label_tracker.labels_by_app.get(app)
+            info: Dict[str, Any] = {'node_labels': {app: sorted(labels)}} if labels else {}
+            if app in stateful_apps:
+                # written next to the manifests. A cached translation is only valid while they are in place
+                info['stateful_copy'] = {'app': app, 'files': stateful_copy_files(app)}
+            result.append(BackupTranslation(ms, capture.records.get(i, []), info))
+        return result
 
-                if manifest:
-                    ml.append(manifest)
-            except Exception as e:
-                logging.warning("Cannot migrate: {}".format(e))
+    def migrate_cache_valid(self, info: Dict[str, Any]) -> bool:
+        stateful = info.get('stateful_copy')
+        if not stateful:
+            return True
+        current = stateful_copy_files(stateful['app'])
+        return all(current.get(path) == digest for path, digest in stateful['files'].items())
+
+    def migrate_report(self, infos: List[Dict[str, Any]]) -> None:
+        node_label_tracker = NodeLabelTracker()
+        for info in infos:
+            for app, labels in info.get('node_labels', {}).items():
+                node_label_tracker.add_app_node_labels(app, set(labels))
 
         app_node_labels = node_label_tracker.get_apps_by_label()
         if app_node_labels:
             logging.info('Node labels used by deployments generated from Marathon apps:\n{}\n'
                          'Please make sure that these labels are properly set on nodes\nof the'
                          ' target Kubernetes cluster!'.format(json.dumps(list(app_node_labels))))
-        return ml
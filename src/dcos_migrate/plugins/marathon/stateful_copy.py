@@ -1,4 +1,6 @@
+import hashlib
 import json
+import os
 import shutil
 import yaml
 import logging
@@ -6,6 +8,7 @@ from pathlib import Path
 from typing import List, Dict, Any, NamedTuple
 
 from dcos_migrate.plugins.marathon import app_translator
+from dcos_migrate.plugins.marathon import copy_engine
 from dcos_migrate.plugins.marathon import volumes
 
 STATE_PATH: Path = Path("dcos-migrate") / "migrate/marathon/stateful-copy"
@@ -76,6 +79,10 @@ def copy_assets(output_dir: Path) -> None:
     shutil.copy("src/dcos_migrate/plugins/marathon/assets/Makefile", STATE_PATH / "Makefile")
     shutil.copy("src/dcos_migrate/plugins/marathon/assets/README.md", STATE_PATH / "README.md")
     shutil.copytree("src/dcos_migrate/plugins/marathon/assets/bin", STATE_PATH / "bin", dirs_exist_ok=True)
+    # the copy engine runs as a standalone script, without dcos-migrate installed
+    engine = STATE_PATH / "bin" / "stateful-copy"
+    shutil.copy(copy_engine.__file__, engine)
+    engine.chmod(0o755)
 
 
 def stateful_migrate_artifacts(original_marathon_app: Dict[str, Any],
@@ -90,6 +97,7 @@ def stateful_migrate_artifacts(original_marathon_app: Dict[str, Any],
     original_k8s_yaml_path = "k8s-original-command-patch.yaml"
     sleeper_k8s_yaml_path = "k8s-sleeper-command-patch.yaml"
     config_sh_path = "config.sh"
+    copy_config_path = copy_engine.CONFIG_FILE
 
     # get the persistent volumes
     mount_vols = get_mount_vols(original_marathon_app)
@@ -104,15 +112,34 @@ def stateful_migrate_artifacts(original_marathon_app: Dict[str, Any],
     config += "DCOS_ORIGINAL_APP_VERSION={}\n".format(__bash_escape(original_marathon_app["version"]))
 
     sleeper_marathon_app = make_sleeper_app_patch()
+    copy_config = copy_engine.CopyConfig(app_id=app_id,
+                                         k8s_app_id=app_label,
+                                         mounts=[copy_engine.Mount(v.name, v.path) for v in mount_vols])
 
     return {
         sleeper_dcos_json_path: json.dumps(sleeper_marathon_app, indent=2),
         original_k8s_yaml_path: yaml.dump(make_original_k8s_patch(k8s_translate_result)),
         sleeper_k8s_yaml_path: yaml.dump(make_sleeper_stateful_set(k8s_translate_result)),
-        config_sh_path: config
+        config_sh_path: config,
+        copy_config_path: copy_config.to_json(),
     }
 
 
+def stateful_copy_files(app_id: str) -> Dict[str, str]:
+    """sha256 of the files configure_stateful_migrate writes for app_id by their path below STATE_PATH"""
+    app_label = app_translator.marathon_app_id_to_k8s_app_id(app_id)
+    paths = [STATE_PATH / "Makefile", STATE_PATH / "README.md"]
+    for folder in [STATE_PATH / "bin", STATE_PATH / app_label]:
+        for root, _, files in os.walk(str(folder)):
+            paths.extend([Path(root) / f for f in files])
+
+    digests = {}
+    for path in sorted(paths):
+        if path.is_file():
+            digests[str(path.relative_to(STATE_PATH))] = hashlib.sha256(path.read_bytes()).hexdigest()
+    return digests
+
+
 def configure_stateful_migrate(original_marathon_app: Dict[str, Any], k8s_translate_result: Dict[str, Any]) -> None:
     artifacts = stateful_migrate_artifacts(original_marathon_app, k8s_translate_result)
     # pull the marathon app
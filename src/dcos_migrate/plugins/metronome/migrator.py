@@ -84,9 +84,9 @@ class MetronomeMigrator(Migrator):
         name = self.dnsify(value)
         metadata = K.V1ObjectMeta(name=name)
         assert self.manifest_list
-        clusterMeta = self.manifest_list.clusterMeta()
-        if clusterMeta:
-            metadata.annotations = clusterMeta.annotations
+        clusterAnnotations = self.manifest_list.clusterAnnotations()
+        if clusterAnnotations:
+            metadata.annotations = dict(clusterAnnotations)
 
         # intentionally written this way so one can easily scan down paths
         container1 = K.V1Container(
@@ -175,9 +175,9 @@ class MetronomeMigrator(Migrator):
             name = self.dnsify("jobsecret." + str(self.object.get("id", "")))
             metadata = K.V1ObjectMeta(name=name)
             assert self.manifest_list
-            clusterMeta = self.manifest_list.clusterMeta()
-            if clusterMeta:
-                metadata.annotations = clusterMeta.annotations
+            clusterAnnotations = self.manifest_list.clusterAnnotations()
+            if clusterAnnotations:
+                metadata.annotations = dict(clusterAnnotations)
             self.jobSecret = K.V1Secret(metadata=metadata, data={})
             self.jobSecret.api_version = 'v1'
             self.jobSecret.kind = 'Secret'
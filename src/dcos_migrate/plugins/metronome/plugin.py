@@ -11,6 +11,7 @@ class MetronomePlugin(MigratePlugin):
 
     plugin_name = "metronome"
     migrate_depends = [ClusterPlugin.plugin_name, SecretPlugin.plugin_name]
+    migrate_cacheable = True
 
     def __init__(self) -> None:
         super(MetronomePlugin, self).__init__()
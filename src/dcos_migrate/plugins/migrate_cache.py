@@ -0,0 +1,154 @@
+import hashlib
+import json
+import logging
+import os
+import threading
+from typing import Any, Dict, Optional
+
+import dcos_migrate
+from dcos_migrate.plugins.plugin import MigratePlugin
+from dcos_migrate.system import BackupList, Manifest, ManifestList
+
+# global and plugin options which do not change the outcome of a translation
+RUNTIME_OPTIONS = ("phase", "verbose", "parallelism", "http-timeout", "http-retries", "http-metrics", "cache",
+                   "storage", "convert", "processes")
+
+
+def source_digest(root: str = os.path.dirname(dcos_migrate.__file__)) -> str:
+    """digest of all python sources below root. Any code change invalidates the cache"""
+    h = hashlib.sha256(dcos_migrate.__version__.encode('utf-8'))
+    for dirpath, dirnames, filenames in os.walk(root):
+        dirnames.sort()
+        for f in sorted(filenames):
+            if f.endswith('.py'):
+                path = os.path.join(dirpath, f)
+                h.update(os.path.relpath(path, root).encode('utf-8'))
+                with open(path, 'rb') as src:
+                    h.update(src.read())
+    return h.hexdigest()
+
+
+class MigrateCache(object):
+    """
+    Persistent cache of translated manifests for plugins with `migrate_cacheable`.
+
+    Every backup is keyed by a hash of its data, the code, the plugin and global
+    config and the inputs of the plugins it depends on. Backups with an unchanged
+    key reuse the manifests rendered by a previous run; they are neither translated
+    nor serialized again, but the messages logged by their translation are logged again.
+    Entries whose other outputs, like files written next to the manifests, are gone
+    count as changed (see MigratePlugin.migrate_cache_valid). All other backups are
+    translated by a single run of the plugin.
+    """
+    def __init__(self, path: str = './dcos-migrate/cache', config: Dict[str, Any] = {}):
+        super(MigrateCache, self).__init__()
+        self._path = path
+        self._config = config
+        self._code: Optional[str] = None
+        self._lock = threading.Lock()
+        # input digests of the plugins migrated so far. Dependents include them in their keys
+        self._digests: Dict[str, str] = {}
+
+    @property
+    def path(self) -> str:
+        return self._path
+
+    def code_digest(self) -> str:
+        with self._lock:
+            if self._code is None:
+                self._code = source_digest()
+            return self._code
+
+    def index_path(self, pluginName: str) -> str:
+        return os.path.join(self._path, "migrate", pluginName + ".json")
+
+    def context(self, plugin: MigratePlugin, manifestList: ManifestList) -> str:
+        """digest of everything besides its own backups a plugin translation depends on"""
+        options = [{k: v
+                    for k, v in self._config.get(name, {}).items() if k not in RUNTIME_OPTIONS}
+                   for name in ('global', plugin.plugin_name)]
+        h = hashlib.sha256(self.code_digest().encode('utf-8'))
+        h.update(json.dumps(options, sort_keys=True, default=str).encode('utf-8'))
+
+        for dep in sorted(plugin.migrate_depends):
+            with self._lock:
+                digest = self._digests.get(dep)
+            if digest is None:
+                # not migrated through the cache. Fall back to its output
+                digest = hashlib.sha256("".join([m.serialize()
+                                                 for m in manifestList.manifests(dep)]).encode('utf-8')).hexdigest()
+            h.update("{}={}".format(dep, digest).encode('utf-8'))
+
+        return h.hexdigest()
+
+    def _load(self, pluginName: str) -> Dict[str, Any]:
+        try:
+            with open(self.index_path(pluginName), 'rt', encoding='utf-8') as f:
+                return dict(json.load(f))
+        except (OSError, ValueError):
+            return {}
+
+    def _store(self, pluginName: str, index: Dict[str, Any]) -> None:
+        path = self.index_path(pluginName)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        # never leave a half written index behind
+        with open(path + ".tmp", 'wt', encoding='utf-8') as f:
+            json.dump(index, f)
+        os.replace(path + ".tmp", path)
+
+    def migrate(self, plugin: MigratePlugin, backupList: BackupList, manifestList: ManifestList) -> ManifestList:
+        context = self.context(plugin, manifestList)
+        cached = self._load(plugin.plugin_name)
+        index: Dict[str, Any] = {}
+        ml = ManifestList()
+
+        own = backupList.backups(pluginName=plugin.plugin_name)
+        keys = [hashlib.sha256((context + b.serialize()).encode('utf-8')).hexdigest() for b in own]
+        hits = [
+            cached.get(b.name, {}).get('key') == key and plugin.migrate_cache_valid(cached[b.name].get('info', {}))
+            for b, key in zip(own, keys)
+        ]
+        changed = [b for b, hit in zip(own, hits) if not hit]
+
+        # all changed backups at once, so plugins can spread them over workers
+        translated = iter(plugin.migrate_backups(changed, backupList=backupList, manifestList=manifestList))
+        infos = []
+        for b, key, hit in zip(own, keys, hits):
+            entry = cached.get(b.name)
+            if hit:
+                assert entry is not None
+                manifests = [self.restore(plugin.plugin_name, name, data) for name, data in entry['manifests']]
+                records, info = entry.get('records', []), entry.get('info', {})
+                for name, level, message in records:
+                    logging.getLogger(name).log(level, message)
+            else:
+                manifests, records, info = next(translated)
+                for m in manifests:
+                    m.set_rendered(m.serialize())
+
+            index[b.name] = {
+                'key': key,
+                'manifests': [[m.name, m.serialize()] for m in manifests],
+                'records': records,
+                'info': info
+            }
+            infos.append(info)
+            ml.extend(manifests)
+        reused = len(own) - len(changed)
+        plugin.migrate_report(infos)
+
+        with self._lock:
+            self._digests[plugin.plugin_name] = hashlib.sha256("".join(
+                [context] + [e['key'] for e in index.values()]).encode('utf-8')).hexdigest()
+        self._store(plugin.plugin_name, index)
+
+        logging.info("migrate cache {}: {} reused, {} translated".format(plugin.plugin_name, reused,
+                                                                         len(own) - reused))
+        return ml
+
+    @staticmethod
+    def restore(pluginName: str, name: str, data: str) -> Manifest:
+        m = Manifest(pluginName=pluginName, manifestName=name)
+        m.deserialize(data)
+        m.set_rendered(data)
+        return m
@@ -1,5 +1,107 @@
-from typing import List, Dict, Any, Optional
-from dcos_migrate.system import DCOSClient, BackupList, ManifestList, Arg
+import asyncio
+import bisect
+import logging
+import threading
+from typing import List, Dict, Any, Iterator, NamedTuple, Optional, Tuple
+from dcos_migrate.system import AsyncDCOSClient, DCOSClient, Backup, BackupList, Manifest, ManifestList, Arg
+from dcos_migrate.system.backup_list import BackupListView
+from dcos_migrate.system.manifest import next_serial
+
+# logger name, level and message of a log record
+LogEntry = Tuple[str, int, str]
+
+
+class BackupTranslation(NamedTuple):
+    """Manifests translated from a single backup and the messages logged meanwhile."""
+    manifests: List[Manifest]
+    records: List[LogEntry]
+    # plugin specific outcome handed to MigratePlugin.migrate_report. Must be JSON serializable
+    info: Dict[str, Any]
+
+
+class RecordCapture(logging.Handler):
+    """Collects the log records of the current thread by the index of the backup in translation."""
+    def __init__(self) -> None:
+        super(RecordCapture, self).__init__(logging.INFO)
+        self._thread = threading.get_ident()
+        self.current = 0
+        self.records: Dict[int, List[LogEntry]] = {}
+
+    def emit(self, record: logging.LogRecord) -> None:
+        # plugins migrate in threads of their own. Records re-emitted from worker processes
+        # carry foreign thread ids, so check the emitting thread instead of record.thread
+        if threading.get_ident() == self._thread:
+            self.records.setdefault(self.current, []).append((record.name, record.levelno, record.getMessage()))
+
+    def __enter__(self) -> 'RecordCapture':
+        logging.getLogger().addHandler(self)
+        return self
+
+    def __exit__(self, *exc: Any) -> None:
+        logging.getLogger().removeHandler(self)
+
+
+class _MarkingView(BackupListView):
+    """Backups to translate. Iterating notes the position of every backup handed out."""
+    def __init__(self, items: List[Backup], index: Dict[str, Backup], tracked: '_TrackedBackupList'):
+        super(_MarkingView, self).__init__(items, index)
+        self._tracked = tracked
+
+    def __iter__(self) -> Iterator[Backup]:
+        for i, b in enumerate(self._items):
+            self._tracked.mark(i)
+            yield b
+
+
+class _TrackedBackupList(BackupList):
+    """
+    The backups of other plugins and the backups of pluginName to translate. Tells which
+    of them a Manifest was created for by the position its plugin iterated at.
+    """
+    def __init__(self, pluginName: str, backupList: BackupList, backups: List[Backup], capture: RecordCapture):
+        super(_TrackedBackupList, self).__init__()
+        self.extend([b for b in backupList if b.plugin_name != pluginName])
+        self.extend(backups)
+        self._own_plugin = pluginName
+        self._capture = capture
+        self._backups = backups
+        # serial of the next manifest and position when each backup was handed out
+        self._marks: List[Tuple[int, int]] = []
+        self.only(None)
+
+    def only(self, position: Optional[int]) -> None:
+        """hand out only the backup at position, all of them for None"""
+        self._own = self._backups if position is None else [self._backups[position]]
+        self._own_names = {b.name: b for b in self._own}
+        self._offset = 0 if position is None else position
+        self._capture.current = self._offset
+
+    def mark(self, position: int) -> None:
+        self._marks.append((next_serial(), self._offset + position))
+        self._capture.current = self._offset + position
+
+    def backups(self, pluginName: str) -> BackupListView:
+        if pluginName != self._own_plugin:
+            return super(_TrackedBackupList, self).backups(pluginName)
+        return _MarkingView(self._own, self._own_names, self)
+
+    def backup(self, pluginName: str, backupName: str) -> Optional[Backup]:
+        if pluginName != self._own_plugin:
+            return super(_TrackedBackupList, self).backup(pluginName, backupName)
+        return self._own_names.get(backupName)
+
+    def split(self, manifests: List[Manifest]) -> Optional[List[List[Manifest]]]:
+        """manifests by backup, None if any of them was not created while iterating the backups"""
+        if len(self._backups) == 1:
+            return [manifests]
+        serials = [serial for serial, _ in self._marks]
+        result: List[List[Manifest]] = [[] for _ in self._backups]
+        for m in manifests:
+            i = bisect.bisect_right(serials, m.serial) - 1
+            if i < 0:
+                return None
+            result[self._marks[i][1]].append(m)
+        return result
 
 
 class MigratePlugin(object):
@@ -9,6 +111,8 @@ class MigratePlugin(object):
     backup_data_depends: List[str] = []
     migrate_depends: List[str] = []
     migrate_data_depends: List[str] = []
+    # migrate translates every backup of the plugin on its own, so the results can be cached per backup
+    migrate_cacheable: bool = False
 
     def __init__(self, config: Dict[str, Any] = {}):
         self._config_options: List[Arg] = []
@@ -57,6 +161,15 @@ class MigratePlugin(object):
         """
         pass
 
+    async def backup_async(self, client: AsyncDCOSClient, backupList: BackupList, **kwargs: Any) -> BackupList:
+        """
+        backup_async is the asyncio variant of backup for plugins sending many requests
+        at once. Plugins implementing it should delegate backup to `backup_sync`.
+
+        The default runs the synchronous backup in a worker thread of the client.
+        """
+        return await client.run_sync(self.backup, client=client.client, backupList=backupList, **kwargs)
+
     def backup_data(self, client: DCOSClient, backupList: BackupList, backupFolder: str, **kwargs: Any) -> None:
         """
         backup_data gets the DCOSCLient and a folder path. The data functions are
@@ -77,6 +190,54 @@ class MigratePlugin(object):
         """
         pass
 
+    def migrate_backups(self, backups: List[Backup], backupList: BackupList, manifestList: ManifestList,
+                        **kwargs: Any) -> List[BackupTranslation]:
+        """
+        migrate_backups translates each of backups on its own and returns the Manifests
+        and log messages of every backup in the same order. Only used for plugins with
+        `migrate_cacheable`.
+
+        The default runs migrate once with only these backups of the plugin. Manifests belong
+        to the backup migrate iterated over when it created them. Without that, like when
+        indexing the backups, migrate runs once per backup.
+        """
+        if not backups:
+            return []
+
+        with RecordCapture() as capture:
+            tracked = _TrackedBackupList(self.plugin_name, backupList, backups, capture)
+            split = tracked.split(self._migrate_tracked(tracked, manifestList, **kwargs))
+            if split is None:
+                capture.records.clear()
+                split = []
+                for i in range(len(backups)):
+                    tracked.only(i)
+                    split.append(self._migrate_tracked(tracked, manifestList, **kwargs))
+
+        return [BackupTranslation(manifests, capture.records.get(i, []), {}) for i, manifests in enumerate(split)]
+
+    def _migrate_tracked(self, backupList: BackupList, manifestList: ManifestList, **kwargs: Any) -> List[Manifest]:
+        manifests = []
+        for m in self.migrate(backupList=backupList, manifestList=manifestList, **kwargs) or []:
+            assert isinstance(m, Manifest)
+            manifests.append(m)
+        return manifests
+
+    def migrate_cache_valid(self, info: Dict[str, Any]) -> bool:
+        """
+        migrate_cache_valid tells if the outputs of a cached translation besides its Manifests,
+        as described by the info of its BackupTranslation, are still in place. Backups with an
+        invalid cache entry are translated again.
+        """
+        return True
+
+    def migrate_report(self, infos: List[Dict[str, Any]]) -> None:
+        """
+        migrate_report gets the info of the BackupTranslation of every backup, including the
+        ones taken from the cache, after migrate_backups. Plugins may log a summary with it.
+        """
+        pass
+
     def migrate_data(self, backupList: BackupList, manifestList: ManifestList, backupFolder: str, migrateFolder: str,
                      **kwargs: Any) -> None:
         """
@@ -88,3 +249,16 @@ class MigratePlugin(object):
         plugin_name
         """
         pass
+
+
+def backup_sync(plugin: MigratePlugin,
+                client: DCOSClient,
+                backupList: BackupList,
+                concurrency: int = 32,
+                **kwargs: Any) -> BackupList:
+    """runs the backup_async of plugin in its own event loop and returns its BackupList"""
+    async def run() -> BackupList:
+        async with AsyncDCOSClient(client, concurrency=concurrency) as c:
+            return await plugin.backup_async(client=c, backupList=backupList, **kwargs)
+
+    return asyncio.run(run())
@@ -2,7 +2,9 @@ import importlib
 import pkgutil
 import inspect
 import logging
-from typing import Any, Dict, Iterator, List
+import time
+from concurrent.futures import Future, ThreadPoolExecutor, FIRST_COMPLETED, wait
+from typing import Any, Callable, Dict, Iterator, List, NamedTuple, Optional, Set
 
 import dcos_migrate.plugins
 from dcos_migrate.plugins.plugin import MigratePlugin
@@ -55,6 +57,129 @@ def get_dependency_batches(plugins: Dict[str, MigratePlugin], depattr: str) -> L
     return batches
 
 
+class DependencyFailed(Exception):
+    """error of a plugin which was skipped because a plugin it depends on failed"""
+    pass
+
+
+class PluginResult(NamedTuple):
+    plugin: MigratePlugin
+    result: Any
+    error: Optional[BaseException]
+    duration: float = 0.0
+
+
+def run_plugin(plugin: MigratePlugin, func: Callable[[MigratePlugin], Any]) -> PluginResult:
+    """
+    Run `func` for a single plugin. Exceptions are caught and returned so a failing
+    plugin does not take down the other plugins running next to it.
+    """
+    start = time.monotonic()
+    try:
+        return PluginResult(plugin, func(plugin), None, time.monotonic() - start)
+    except Exception as e:
+        logging.critical("Plugin {} failed: {}".format(plugin.plugin_name, e), exc_info=True)
+        return PluginResult(plugin, None, e, time.monotonic() - start)
+
+
+def run_dependency_graph(plugins: Dict[str, MigratePlugin],
+                         depattr: str,
+                         func: Callable[[MigratePlugin], Any],
+                         parallelism: int = 1,
+                         on_result: Optional[Callable[[PluginResult], None]] = None) -> List[PluginResult]:
+    """
+    Run `func` for every plugin. A plugin is started as soon as all plugins named in
+    its `depattr` finished, so a slow plugin only holds up the plugins depending on it.
+    At most `parallelism` plugins run at the same time.
+
+    `on_result` is called from the calling thread whenever a plugin finished and before
+    any of its dependents is started. Plugins depending on a failed plugin are not run,
+    their result has a DependencyFailed error. Results are returned in dependency batch order.
+    """
+    # also validates the graph (circular or unknown dependencies)
+    order = [p for batch in get_dependency_batches(plugins, depattr) for p in batch]
+    position = {p.plugin_name: i for i, p in enumerate(order)}
+    pending = {p.plugin_name: set(getattr(p, depattr)) for p in order}
+    results: Dict[str, PluginResult] = {}
+    failed: Set[str] = set()
+    running: Dict['Future[PluginResult]', str] = {}
+
+    def finish(r: PluginResult) -> None:
+        name = r.plugin.plugin_name
+        results[name] = r
+        if r.error is not None:
+            failed.add(name)
+        if on_result:
+            on_result(r)
+        for deps in pending.values():
+            deps.discard(name)
+
+    with ThreadPoolExecutor(max_workers=max(1, parallelism)) as executor:
+        while pending or running:
+            skipped = False
+            for name in [name for name, deps in pending.items() if not deps]:
+                del pending[name]
+                failed_deps = [d for d in getattr(plugins[name], depattr) if d in failed]
+                if not failed_deps:
+                    running[executor.submit(run_plugin, plugins[name], func)] = name
+                    continue
+
+                logging.error("Skipping plugin {}: depends on failed {}".format(name, ", ".join(failed_deps)))
+                finish(PluginResult(plugins[name], None, DependencyFailed(", ".join(failed_deps))))
+                skipped = True
+
+            if skipped:
+                # dependents of skipped plugins may be ready now
+                continue
+
+            done, _ = wait(running, return_when=FIRST_COMPLETED)
+            for future in sorted(done, key=lambda f: position[running[f]]):
+                running.pop(future)
+                finish(future.result())
+
+    return [results[p.plugin_name] for p in order]
+
+
+def critical_path(results: List[PluginResult], depattr: str) -> List[PluginResult]:
+    """
+    Return the chain of dependent plugins with the longest summed wall time.
+    `results` must be in dependency order as returned by `run_dependency_graph`.
+    """
+    by_name = {r.plugin.plugin_name: r for r in results}
+    finish: Dict[str, float] = {}
+    previous: Dict[str, Optional[str]] = {}
+    for r in results:
+        name = r.plugin.plugin_name
+        deps = [d for d in getattr(r.plugin, depattr) if d in finish]
+        slowest = max(deps, key=lambda d: finish[d], default=None)
+        previous[name] = slowest
+        finish[name] = r.duration + (finish[slowest] if slowest else 0.0)
+
+    path: List[PluginResult] = []
+    current = max(finish, key=lambda n: finish[n], default=None)
+    while current:
+        path.insert(0, by_name[current])
+        current = previous[current]
+
+    return path
+
+
+def timing_report(results: List[PluginResult], depattr: str) -> str:
+    """Render per plugin wall time and the critical path of a run"""
+    def status(r: PluginResult) -> str:
+        if r.error is None:
+            return ""
+        return " (skipped)" if isinstance(r.error, DependencyFailed) else " (failed)"
+
+    lines = ["{:<20} {:>9.2f}s{}".format(r.plugin.plugin_name, r.duration, status(r))
+             for r in sorted(results, key=lambda r: r.duration, reverse=True)]
+
+    path = critical_path(results, depattr)
+    total = sum([r.duration for r in path], 0.0)
+    lines.append("critical path: {} ({:.2f}s)".format(" -> ".join(r.plugin.plugin_name for r in path), total))
+    return "\n".join(lines)
+
+
 class PluginManager(object):
     """docstring for PluginManager."""
 
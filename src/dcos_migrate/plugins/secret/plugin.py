@@ -1,15 +1,17 @@
-from dcos_migrate.plugins.plugin import MigratePlugin
+from dcos_migrate.plugins.plugin import MigratePlugin, backup_sync
 from dcos_migrate.plugins.cluster import ClusterPlugin
-from dcos_migrate.system import DCOSClient, BackupList, Backup, Manifest, ManifestList
+from dcos_migrate.system import AsyncDCOSClient, DCOSClient, BackupList, Backup, Manifest, ManifestList, Arg, BoolArg
 import dcos_migrate.utils as utils
 
 from kubernetes.client.models import V1Secret, V1ObjectMeta  # type: ignore
+import requests
 
+import asyncio
 import urllib
 import base64
 import logging
 from base64 import b64encode
-from typing import cast, Any, Dict, List
+from typing import cast, Any, Dict, List, Optional, Tuple
 
 
 class DCOSSecretsService:
@@ -18,15 +20,27 @@ class DCOSSecretsService:
         self.url = "{}/{}".format(self.client.dcos_url, 'secrets/v1')
         self.store = 'default'
 
+    def list_url(self, path: str = '') -> str:
+        # folders are listed with a trailing slash, the root as `<store>/`
+        return '{url}/secret/{store}/{path}?list=true'.format(url=self.url,
+                                                              store=urllib.parse.quote(self.store),
+                                                              path=urllib.parse.quote(path + '/' if path else ''))
+
+    def secret_url(self, path: str, key: str) -> str:
+        full_path = (path + '/' + key).strip('/')
+        return self.url + '/secret/{store}/{path}'.format(store=urllib.parse.quote(self.store),
+                                                          path=urllib.parse.quote(full_path))
+
     def list(self, path: str = '') -> List[str]:
-        u = '{url}/secret/{store}/{path}?list=true'.format(url=self.url,
-                                                           store=urllib.parse.quote(self.store),
-                                                           path=urllib.parse.quote(path))
-        r = self.client.get(u)
+        r = self.client.get(self.list_url(path))
         r.raise_for_status()
         return cast(List[str], r.json()['array'])
 
     def get(self, path: str, key: str) -> Dict[str, str]:
+        r = self.client.get(self.secret_url(path, key), headers={'Accept': '*/*'})
+        return self.parse_secret(r, path, key)
+
+    def parse_secret(self, r: requests.Response, path: str, key: str) -> Dict[str, str]:
         # There are two types of secrets: text and binary.  Using `Accept: */*`
         # the returned `Content-Type` will be `application/octet-stream` for
         # binary secrets and `application/json` for text secrets.
@@ -38,10 +52,6 @@ class DCOSSecretsService:
         #   "type": "{text|binary}",
         #   "value": "base64(value)"
         # }
-        full_path = (path + '/' + key).strip('/')
-        url = self.url + '/secret/{store}/{path}'.format(store=urllib.parse.quote(self.store),
-                                                         path=urllib.parse.quote(full_path))
-        r = self.client.get(url, headers={'Accept': '*/*'})
         r.raise_for_status()
         content_type = r.headers['Content-Type']
         if content_type == 'application/octet-stream':
@@ -65,28 +75,111 @@ class DCOSSecretsService:
         return response
 
 
+class AsyncDCOSSecretsService(DCOSSecretsService):
+    """
+    DCOSSecretsService on top of AsyncDCOSClient. The number of concurrent requests
+    is limited by the client only.
+    """
+    def __init__(self, client: AsyncDCOSClient):
+        super(AsyncDCOSSecretsService, self).__init__(client.client)
+        self.async_client = client
+
+    async def list_async(self, path: str = '') -> List[str]:
+        r = await self.async_client.get(self.list_url(path))
+        r.raise_for_status()
+        return cast(List[str], r.json()['array'])
+
+    async def get_async(self, path: str, key: str) -> Dict[str, str]:
+        r = await self.async_client.get(self.secret_url(path, key), headers={'Accept': '*/*'})
+        return self.parse_secret(r, path, key)
+
+    async def walk_async(self, path: str = '') -> List[Tuple[str, str]]:
+        """
+        Walk the secret tree below `path` breadth first and return `(path, key)` of every
+        secret. All folders of a level are listed at once.
+        """
+        secrets = []
+        level = [path]
+        while level:
+            next_level = []
+            listings = await asyncio.gather(*[self.list_async(folder) for folder in level])
+            for folder, entries in zip(level, listings):
+                for entry in entries:
+                    if entry.endswith('/'):
+                        next_level.append("/".join(filter(None, [folder, entry.strip('/')])))
+                    else:
+                        secrets.append((folder, entry))
+            level = next_level
+        return secrets
+
+
 class SecretPlugin(MigratePlugin):
     """docstring for SecretPlugin."""
 
     plugin_name = "secret"
-    depends_migrate = [ClusterPlugin.plugin_name]
+    migrate_cacheable = True
+    migrate_depends = [ClusterPlugin.plugin_name]
 
     def __init__(self) -> None:
         super(SecretPlugin, self).__init__()
+        self._config_options = [
+            Arg("concurrency",
+                plugin_name=self.plugin_name,
+                type=int,
+                default=8,
+                metavar="N",
+                help='Number of secrets fetched in parallel.'),
+            BoolArg("resume",
+                    plugin_name=self.plugin_name,
+                    default=False,
+                    help='Keep secrets already written to disk by an interrupted backup instead of fetching them again.'),
+        ]
+
+    @property
+    def concurrency(self) -> int:
+        return int((self.plugin_config or {}).get('concurrency', 8))
+
+    @property
+    def resume(self) -> bool:
+        return bool((self.plugin_config or {}).get('resume', False))
+
+    def backupName(self, path: str, key: str) -> str:
+        return Backup.renderBackupName(path + '/' + key)
 
     def backup(  # type: ignore
-            self, client: DCOSClient, **kwargs) -> BackupList:
-        backupList = BackupList()
-        sec = DCOSSecretsService(client)
-        path = ""
-        keys = sec.list(path)
-        if keys:
-            for key in keys:
-                secData = sec.get(path, key)
-
-                backupList.append(Backup(self.plugin_name, Backup.renderBackupName(path + key), data=secData))
-
-        return backupList
+            self, client: DCOSClient, backupList: Optional[BackupList] = None, **kwargs) -> BackupList:
+        return backup_sync(self, client, backupList, concurrency=self.concurrency, **kwargs)  # type: ignore
+
+    async def backup_async(  # type: ignore
+            self, client: AsyncDCOSClient, backupList: Optional[BackupList] = None, **kwargs) -> BackupList:
+        # secrets are streamed to where the caller keeps its backups. Without a caller list nothing is written
+        bl = BackupList(path=backupList.path) if backupList is not None else BackupList(dry=True)
+        sec = AsyncDCOSSecretsService(client)
+
+        missing = []
+        for path, key in await sec.walk_async():
+            if self.resume:
+                b = Backup(self.plugin_name, self.backupName(path, key))
+                if bl.load_item(b):
+                    logging.debug("Using secret {} from previous backup".format(b.name))
+                    bl.append(b)
+                    continue
+            missing.append((path, key))
+
+        # every secret is written as soon as it arrived so an interrupted backup can be resumed. As many
+        # workers as the client sends requests at once share the secrets, so only those are in flight
+        fetched: List[Optional[Backup]] = [None] * len(missing)
+        todo = iter(enumerate(missing))
+
+        async def worker() -> None:
+            for i, (path, key) in todo:
+                b = Backup(self.plugin_name, self.backupName(path, key), data=await sec.get_async(path, key))
+                await client.run_sync(bl.store_item, b)
+                fetched[i] = b
+
+        await asyncio.gather(*[worker() for _ in range(min(client.concurrency, len(missing)))])
+        bl.extend([b for b in fetched if b is not None])
+        return bl
 
     def migrate(self, backupList: BackupList, manifestList: ManifestList, **kwargs: Any) -> ManifestList:
         ml = ManifestList()
@@ -94,11 +187,7 @@ class SecretPlugin(MigratePlugin):
         for ba in backupList.backups(pluginName='secret'):
             assert isinstance(ba, Backup)
             metadata = V1ObjectMeta()
-            metadata.annotations = {}
-
-            clusterMeta = manifestList.clusterMeta()
-            if clusterMeta:
-                metadata.annotations = clusterMeta.annotations
+            metadata.annotations = dict(manifestList.clusterAnnotations())
 
             logging.debug("Found backup {}".format(ba))
             b = ba.data
@@ -106,7 +195,8 @@ class SecretPlugin(MigratePlugin):
             name = b["key"]
 
             metadata.annotations[utils.namespace_path("secret-path")] = fullPath
-            metadata.name = utils.make_subdomain(name.split('/'))
+            # secrets with the same key in different folders must not share a name
+            metadata.name = utils.make_subdomain(fullPath.split('/'))
             sec = V1Secret(metadata=metadata)
             sec.api_version = 'v1'
             sec.kind = 'Secret'
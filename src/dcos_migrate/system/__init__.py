@@ -1,11 +1,14 @@
 from .argparse import Arg, BoolArg, DictArg, ArgParse
 from .backup_list import BackupList
 from .client import DCOSClient
+from .async_client import AsyncDCOSClient
 from .backup import Backup
 from .manifest_list import ManifestList
 from .manifest import Manifest, with_comment
 from .migrator import Migrator
-from .storable_list import StorableList
+from .packed_store import PACKED_SUFFIX, PackedStore
+from .storable_list import StorableList, StoreSummary
+from .transport import Transport, TransportMetrics
 
 __all__ = [
     'Arg',
@@ -14,10 +17,16 @@ __all__ = [
     'ArgParse',
     'BackupList',
     'DCOSClient',
+    'AsyncDCOSClient',
     'Backup',
     'ManifestList',
     'Manifest',
     'with_comment',
     'Migrator',
+    'PACKED_SUFFIX',
+    'PackedStore',
     'StorableList',
+    'StoreSummary',
+    'Transport',
+    'TransportMetrics',
 ]
@@ -0,0 +1,90 @@
+import asyncio
+import functools
+from concurrent.futures import ThreadPoolExecutor
+from types import TracebackType
+from typing import Any, Callable, Dict, Optional, Type, TypeVar
+
+import requests
+
+from .client import DCOSClient
+
+T = TypeVar('T')
+
+
+class AsyncDCOSClient(object):
+    """
+    asyncio variant of DCOSClient with the same surface. Requests are sent by the
+    pooled and retrying transport of the wrapped DCOSClient, so auth, timeouts and
+    metrics are shared with it. At most `concurrency` requests are in flight at once,
+    any number of coroutines may wait for their turn.
+    """
+    def __init__(self, client: Optional[DCOSClient] = None, concurrency: int = 32):
+        super(AsyncDCOSClient, self).__init__()
+        self.client = client if client is not None else DCOSClient()
+        self.concurrency = max(1, concurrency)
+        self._executor = ThreadPoolExecutor(max_workers=self.concurrency, thread_name_prefix="async-dcos-client")
+        self._semaphore: Optional[asyncio.Semaphore] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+
+        transport = self.client.transport
+        transport.resize_pool(max(transport.pool_size, self.concurrency))
+
+    @property
+    def toml_config(self) -> Any:
+        return self.client.toml_config
+
+    @property
+    def dcos_url(self) -> str:
+        return self.client.dcos_url
+
+    def full_dcos_url(self, url_path: str) -> str:
+        return self.client.full_dcos_url(url_path)
+
+    def _limit(self) -> asyncio.Semaphore:
+        # semaphores are bound to the loop they were first used in
+        loop = asyncio.get_running_loop()
+        if self._semaphore is None or self._loop is not loop:
+            self._semaphore = asyncio.Semaphore(self.concurrency)
+            self._loop = loop
+        return self._semaphore
+
+    async def run_sync(self, func: Callable[..., T], *args: Any, **kwargs: Any) -> T:
+        """run a blocking callable in a worker thread without blocking the event loop"""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._executor, functools.partial(func, *args, **kwargs))
+
+    async def request(self, method: str, url: str, **kwargs: Any) -> requests.Response:
+        async with self._limit():
+            return await self.run_sync(self.client.request, method, url, **kwargs)
+
+    async def head(self, url: str, **kwargs: Any) -> requests.Response:
+        return await self.request("head", url, **kwargs)
+
+    async def get(self, url: str, **kwargs: Any) -> requests.Response:
+        return await self.request("get", url, **kwargs)
+
+    async def post(self,
+                   url: str,
+                   data: Optional[Any] = None,
+                   json: Optional[Dict[str, Any]] = None,
+                   **kwargs: Any) -> requests.Response:
+        return await self.request("post", url, data=data, json=json, **kwargs)
+
+    async def put(self, url: str, data: Optional[Any] = None, **kwargs: Any) -> requests.Response:
+        return await self.request('put', url, data=data, **kwargs)
+
+    async def patch(self, url: str, data: Optional[Any] = None, **kwargs: Any) -> requests.Response:
+        return await self.request('patch', url, data=data, **kwargs)
+
+    async def delete(self, url: str, data: Optional[Any] = None, **kwargs: Any) -> requests.Response:
+        return await self.request('delete', url, data=data, **kwargs)
+
+    def close(self) -> None:
+        self._executor.shutdown(wait=True)
+
+    async def __aenter__(self) -> 'AsyncDCOSClient':
+        return self
+
+    async def __aexit__(self, exc_type: Optional[Type[BaseException]], exc: Optional[BaseException],
+                        tb: Optional[TracebackType]) -> None:
+        self.close()
@@ -1,5 +1,16 @@
 import json
-from typing import Any, Dict
+import threading
+from typing import Any, Callable, Dict, Optional, Tuple
+
+_MISSING = object()
+
+
+def field_value(data: Any, path: Tuple[str, ...]) -> Any:
+    for key in path:
+        if not isinstance(data, dict) or key not in data:
+            return _MISSING
+        data = data[key]
+    return data
 
 
 class Backup(object):
@@ -14,6 +25,16 @@ class Backup(object):
         self._extension = extension
         self._serializer = self.dump_pretty
         self._deserializer = json.loads
+        # serialized data not parsed yet. See deserialize(lazy=True)
+        self._raw: Optional[str] = None
+        self._raw_lock: Optional[threading.Lock] = None
+        # reads the serialized data again from the file source. See unload
+        self._reload: Optional[Callable[[], str]] = None
+        self._source: Optional[str] = None
+        # values of fields kept while unloaded, by their path. See field
+        self._fields: Dict[Tuple[str, ...], Any] = {}
+        # file path and sha256 of the data a StorableList last wrote this item with
+        self.stored_as: Optional[Tuple[str, bytes]] = None
 
     @staticmethod
     def renderBackupName(name: str) -> str:
@@ -38,10 +59,61 @@ class Backup(object):
 
     @property
     def data(self) -> Dict[str, Any]:
+        if self._raw is not None or self._reload is not None:
+            assert self._raw_lock is not None
+            with self._raw_lock:
+                if self._reload is not None:
+                    self._data = self._deserializer(self._reload())
+                    self._reload = None
+                    self._source = None
+                    self._fields = {}
+                if self._raw is not None:
+                    self._data = self._deserializer(self._raw)
+                    self._raw = None
         return self._data
 
+    @property
+    def source(self) -> Optional[str]:
+        """the file an unloaded backup reads its data from. None once it is loaded. See unload"""
+        return self._source
+
+    def field(self, path: Tuple[str, ...]) -> Any:
+        """the value at path in data. Fields kept by unload are looked up without loading the data"""
+        if path in self._fields:
+            return self._fields[path]
+        return field_value(self.data, path)
+
+    def unload(self, reload: Callable[[], str], source: str, keep: Tuple[Tuple[str, ...], ...] = ()) -> None:
+        """
+        drops the data of a backup stored in the file source. It is parsed from the text
+        returned by reload the first time it is used again. The values of the fields in keep
+        are kept for field.
+        """
+        fields = {path: field_value(self.data, path) for path in keep}
+        self._raw_lock = threading.Lock()
+        self._raw = None
+        self._data = {}
+        self._fields = fields
+        self._source = source
+        self._reload = reload
+
     def serialize(self) -> str:
+        reload = self._reload
+        if reload is not None:
+            return reload()
+        if self._raw is not None:
+            # never parsed, so it cannot have been modified either
+            return self._raw
         return self._serializer(self._data)
 
-    def deserialize(self, data: str) -> None:
+    def deserialize(self, data: str, lazy: bool = False) -> None:
+        """parse data. With lazy it is parsed the first time data is accessed"""
+        self._reload = None
+        self._source = None
+        self._fields = {}
+        if lazy:
+            self._raw_lock = threading.Lock()
+            self._raw = data
+            self._data = {}
+            return
         self._data = self._deserializer(data)
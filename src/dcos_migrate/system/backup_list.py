@@ -1,47 +1,140 @@
-from typing import Optional
-from .storable_list import StorableList
-from .backup import Backup
+import functools
+from typing import Any, Dict, Hashable, List, Optional, Sequence, Tuple, Union
+from .storable_list import StorableList, StorableListView
+from .backup import Backup, _MISSING, field_value
 from jsonpath_ng import parse  # type: ignore
 
+Field = Union[str, Sequence[str]]
+
+
+@functools.lru_cache(maxsize=None)
+def compile_jsonpath(jsonPath: str) -> Any:
+    return parse(jsonPath)
+
+
+def field_path(field: Field) -> Tuple[str, ...]:
+    """
+    Fields are dotted paths into Backup.data. Keys containing dots are given as a sequence.
+
+    >>> field_path("labels.DCOS_PACKAGE_NAME")
+    ('labels', 'DCOS_PACKAGE_NAME')
+    >>> field_path(["labels", "com.example.team"])
+    ('labels', 'com.example.team')
+    """
+    if isinstance(field, str):
+        return tuple(field.split('.'))
+    return tuple(field)
+
+
+class FieldIndex(object):
+    """Backups in list order by the value of a single field of their data."""
+    def __init__(self, path: Tuple[str, ...]):
+        super(FieldIndex, self).__init__()
+        self.path = path
+        self.values: Dict[Hashable, List[Backup]] = {}
+        # number of backups of the list indexed so far
+        self.scanned = 0
+
+    def add(self, b: Backup) -> None:
+        value = b.field(self.path)
+        if value is not _MISSING and isinstance(value, Hashable):
+            self.values.setdefault(value, []).append(b)
+
+    def get(self, value: Hashable) -> List[Backup]:
+        return self.values.get(value, [])
+
+
+class JsonPathMatches(object):
+    """Backups in list order with any match of a jsonpath expression."""
+    def __init__(self, jsonPath: str):
+        super(JsonPathMatches, self).__init__()
+        self.jsonPath = jsonPath
+        self.backups: List[Backup] = []
+        # number of backups of the list matched so far
+        self.scanned = 0
+
+
+class BackupListView(StorableListView[Backup]):
+    """docstring for BackupListView."""
+    def backup(self, backupName: str) -> Optional[Backup]:
+        return self.get(backupName)
+
 
 class BackupList(StorableList):
     """docstring for BackupList."""
     def __init__(self, dry: bool = False, path: str = './dcos-migrate/backup'):
         super(BackupList, self).__init__(path)
         self._dry = dry
+        # results of match_jsonpath and indexes of match_field. Backups appended since
+        # their last use are added on the next query. Any other change of the list drops them
+        self._queries: Dict[str, JsonPathMatches] = {}
+        self._fields: Dict[Tuple[str, ...], FieldIndex] = {}
 
-    def backups(self, pluginName: str) -> 'BackupList':
-        newList = BackupList()
+    def _reindex(self) -> None:
+        super(BackupList, self)._reindex()
+        self._queries.clear()
+        self._fields.clear()
 
-        for b in self:
-            if b.plugin_name == pluginName:
-                newList.append(b)
-        return newList
+    def backups(self, pluginName: str) -> BackupListView:
+        return BackupListView(*self._plugin_index(pluginName))
 
     def backup(self, pluginName: str, backupName: str) -> Optional[Backup]:
-        for b in self.backups(pluginName=pluginName):
-            assert isinstance(b, Backup)
-            if b.name == backupName:
-                return b
-        return None
+        b = self._item(pluginName, backupName)
+        assert b is None or isinstance(b, Backup)
+        return b
+
+    @staticmethod
+    def _matches(jsonPath: str, b: Backup) -> bool:
+        # this is quite stupid but related to the Backup object structure
+        # maybe there is a better way to make .data directly part of the list
+        res = compile_jsonpath(jsonPath).find([b.data])
+        return bool(res)
 
     def match_jsonpath(self, jsonPath: str) -> 'BackupList':
+        """backups with any match of jsonPath. Later queries of an expression only check appended backups"""
+        with self._lock:
+            query = self._queries.setdefault(jsonPath, JsonPathMatches(jsonPath))
+            for b in self[query.scanned:]:
+                assert isinstance(b, Backup)
+                if self._matches(jsonPath, b):
+                    query.backups.append(b)
+            query.scanned = len(self)
+            matches = list(query.backups)
+
         bl = BackupList()
-        jsonpath_expr = parse(jsonPath)
+        bl.extend(matches)
+        return bl
 
-        for b in self:
-            # this is quite stupid but related to the Backup object structure
-            # maybe there is a better way to make .data directly part of the list
-            assert isinstance(b, Backup)
-            res = jsonpath_expr.find([b.data])
-            if res and len(res) > 0:
-                bl.append(b)
+    def index_field(self, field: Field) -> FieldIndex:
+        """index of the backups by the value of field. Built on first use, later uses add appended backups"""
+        path = field_path(field)
+        with self._lock:
+            index = self._fields.setdefault(path, FieldIndex(path))
+            for b in self[index.scanned:]:
+                assert isinstance(b, Backup)
+                index.add(b)
+            index.scanned = len(self)
+            return index
 
+    def match_field(self, field: Field, value: Any, pluginName: Optional[str] = None) -> 'BackupList':
+        """
+        backups whose data has value at field, like match_field("labels.DCOS_PACKAGE_NAME", "jenkins").
+        Only the first query of a field scans the whole list.
+        """
+        if isinstance(value, Hashable):
+            with self._lock:
+                matches = list(self.index_field(field).get(value))
+        else:
+            path = field_path(field)
+            matches = [b for b in self if isinstance(b, Backup) and b.field(path) == value]
+
+        bl = BackupList()
+        bl.extend([b for b in matches if pluginName is None or b.plugin_name == pluginName])
         return bl
 
     def append_data(  # type: ignore
-            self, pluginName: str, backupName: str, extension: str, data: str, **kwargs) -> None:
+            self, pluginName: str, backupName: str, extension: str, data: str, lazy: bool = False, **kwargs) -> None:
         b = Backup(pluginName=pluginName, backupName=backupName, extension=extension)
-        b.deserialize(data)
+        b.deserialize(data, lazy=lazy)
 
         self.append(b)
@@ -1,11 +1,20 @@
 from dcos import http, config  # type: ignore
-from typing import cast, Any, Dict, Optional
+from dcos.errors import (DCOSAuthenticationException, DCOSAuthorizationException, DCOSBadRequest,  # type: ignore
+                         DCOSConnectionError, DCOSException, DCOSHTTPException, DCOSUnprocessableException)
+import requests
+from typing import cast, Any, Dict, Optional, Tuple
 from urllib.parse import urlparse, ParseResult
+from .transport import Transport
 
 
 class DCOSClient(object):
     """docstring for DCOSClient."""
-    def __init__(self, toml_config: Optional[Any] = None):
+    def __init__(self,
+                 toml_config: Optional[Any] = None,
+                 pool_size: int = 16,
+                 timeout: Optional[Tuple[float, float]] = None,
+                 retries: int = 3,
+                 backoff: float = 0.5):
         super(DCOSClient, self).__init__()
         self.toml_config = toml_config
         if toml_config is None:
@@ -13,6 +22,11 @@ class DCOSClient(object):
 
         self._dcos_url = cast(ParseResult, urlparse(config.get_config_val("core.dcos_url", toml_config)))
 
+        # (connect, read) timeout. Defaults to the DC/OS CLI `core.timeout` setting
+        self.timeout = timeout
+        # keeps connections alive between requests. The pool is shared by all threads using this client
+        self.transport = Transport(pool_size=pool_size, retries=retries, backoff=backoff)
+
     @property
     def dcos_url(self) -> str:
         return self._dcos_url.geturl()
@@ -20,27 +34,102 @@ class DCOSClient(object):
     def full_dcos_url(self, url_path: str) -> str:
         return "{dcos}/{url}".format(dcos=self.dcos_url, url=url_path)
 
-    def request(self, method: str, url: str, **kwargs: Any) -> http.requests.Response:
-        return http.request(method, url, toml_config=self.toml_config, **kwargs)
+    def request(self, method: str, url: str, **kwargs: Any) -> requests.Response:
+        # same semantics as dcos.http.request but sent through the pooled transport
+        response = self._send(method, url, **kwargs)
+
+        if 200 <= response.status_code < 300:
+            return response
+
+        if response.status_code == 401:
+            if config.get_config_val("core.prompt_login", self.toml_config):
+                # let the DC/OS CLI handle the interactive login
+                return cast(requests.Response, http.request(method, url, toml_config=self.toml_config, **kwargs))
+            if config.get_config_val("core.dcos_acs_token", self.toml_config) is not None:
+                raise DCOSAuthenticationException(response,
+                                                  "Your core.dcos_acs_token is invalid. Please run: `dcos auth login`")
+            raise DCOSAuthenticationException(response)
+        if response.status_code == 422:
+            raise DCOSUnprocessableException(response)
+        if response.status_code == 403:
+            raise DCOSAuthorizationException(response)
+        if response.status_code == 400:
+            raise DCOSBadRequest(response)
+
+        raise DCOSHTTPException(response)
+
+    def _send(self, method: str, url: str, timeout: Any = True, verify: Optional[Any] = None,
+              **kwargs: Any) -> requests.Response:
+        auth = None
+        token = config.get_config_val("core.dcos_acs_token", self.toml_config)
+        # only request with DC/OS Auth if request is to DC/OS cluster
+        if token and self._is_cluster_url(url):
+            auth = http.DCOSAcsAuth(token)
+
+        if timeout is True and self.timeout is not None:
+            timeout = self.timeout
+        elif timeout is True:
+            timeout = (http.DEFAULT_CONNECT_TIMEOUT,
+                       config.get_config_val("core.timeout", self.toml_config) or http.DEFAULT_READ_TIMEOUT)
+        elif type(timeout) in (float, int):
+            timeout = (http.DEFAULT_CONNECT_TIMEOUT, timeout)
+
+        if 'headers' not in kwargs:
+            kwargs['headers'] = {'Accept': 'application/json'}
+
+        if verify is None:
+            verify = self._ssl_verify(url)
+        if verify is not None:
+            http.silence_requests_warnings()
+
+        try:
+            return self.transport.send(method, url, timeout=timeout, auth=auth, verify=verify, **kwargs)
+        except requests.exceptions.SSLError:
+            raise DCOSException("An SSL error occurred. To configure your SSL settings, "
+                                "please run: `dcos config set core.ssl_verify <value>`")
+        except requests.exceptions.ConnectionError:
+            raise DCOSConnectionError(url)
+        except requests.exceptions.Timeout:
+            raise DCOSException('Request to URL [{0}] timed out.'.format(url))
+        except requests.exceptions.RequestException as e:
+            raise DCOSException('HTTP Exception: {}'.format(e))
+
+    def _is_cluster_url(self, url: str) -> bool:
+        """whether url points to the cluster or its package service, by scheme and host"""
+        parsed = urlparse(url)
+        for key in ["core.dcos_url", "package.cosmos_url"]:
+            cluster = urlparse(config.get_config_val(key, self.toml_config) or "")
+            if cluster.netloc and (cluster.scheme, cluster.netloc) == (parsed.scheme, parsed.netloc):
+                return True
+        return False
+
+    def _ssl_verify(self, url: str) -> Optional[Any]:
+        """core.ssl_verify for requests to the cluster: a bool or a CA bundle path. None for other hosts"""
+        if not self._is_cluster_url(url):
+            return None
+        verify = config.get_config_val("core.ssl_verify", self.toml_config)
+        if isinstance(verify, str) and verify.lower() in ["true", "false"]:
+            return verify.lower() == "true"
+        return verify
 
-    def head(self, url: str, **kwargs: Any) -> http.requests.Response:
+    def head(self, url: str, **kwargs: Any) -> requests.Response:
         return self.request("head", url, **kwargs)
 
-    def get(self, url: str, **kwargs: Any) -> http.requests.Response:
+    def get(self, url: str, **kwargs: Any) -> requests.Response:
         return self.request("get", url, **kwargs)
 
     def post(self,
              url: str,
              data: Optional[Any] = None,
              json: Optional[Dict[str, Any]] = None,
-             **kwargs: Any) -> http.requests.Response:
+             **kwargs: Any) -> requests.Response:
         return self.request("post", url, data=data, json=json, **kwargs)
 
-    def put(self, url: str, data: Optional[Any] = None, **kwargs: Any) -> http.requests.Response:
+    def put(self, url: str, data: Optional[Any] = None, **kwargs: Any) -> requests.Response:
         return self.request('put', url, data=data, **kwargs)
 
-    def patch(self, url: str, data: Optional[Any] = None, **kwargs: Any) -> http.requests.Response:
+    def patch(self, url: str, data: Optional[Any] = None, **kwargs: Any) -> requests.Response:
         return self.request('patch', url, data=data, **kwargs)
 
-    def delete(self, url: str, data: Optional[Any] = None, **kwargs: Any) -> http.requests.Response:
+    def delete(self, url: str, data: Optional[Any] = None, **kwargs: Any) -> requests.Response:
         return self.request('delete', url, **kwargs)
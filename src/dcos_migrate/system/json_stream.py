@@ -0,0 +1,99 @@
+import codecs
+import json
+from typing import Any, Iterable, Iterator
+
+_decoder = json.JSONDecoder()
+_WHITESPACE = ' \t\n\r'
+_NUMBER = '0123456789+-.eE'
+
+
+class ChunkReader(object):
+    """
+    Text of a JSON document arriving in byte chunks. Only the part which is not parsed
+    yet is kept in memory.
+    """
+    def __init__(self, chunks: Iterable[bytes]):
+        super(ChunkReader, self).__init__()
+        self._chunks = iter(chunks)
+        self._text = codecs.getincrementaldecoder('utf-8')()
+        self.buf = ""
+        self.pos = 0
+        self.eof = False
+
+    def fill(self) -> bool:
+        """reads the next chunk. Returns False if there is nothing left"""
+        if self.eof:
+            return False
+        try:
+            text = self._text.decode(next(self._chunks))
+        except StopIteration:
+            text = self._text.decode(b'', final=True)
+            self.eof = True
+        self.buf = self.buf[self.pos:] + text
+        self.pos = 0
+        return True
+
+    def peek(self) -> str:
+        """the next character which is not whitespace. Empty at the end of the document"""
+        while True:
+            while self.pos < len(self.buf) and self.buf[self.pos] in _WHITESPACE:
+                self.pos += 1
+            if self.pos < len(self.buf):
+                return self.buf[self.pos]
+            if not self.fill():
+                return ''
+
+    def expect(self, chars: str) -> str:
+        c = self.peek()
+        if not c or c not in chars:
+            raise ValueError("Expected one of {!r} but got {!r}".format(chars, c or "end of document"))
+        self.pos += 1
+        return c
+
+    def value(self) -> Any:
+        """parses the next complete JSON value"""
+        self.peek()
+        while True:
+            try:
+                value, end = _decoder.raw_decode(self.buf, self.pos)
+                # a number at the end of the buffer may go on in the next chunk. So may 0 of "0." if
+                # the digits after the dot are not read yet
+                if self.eof or (end < len(self.buf) and self.buf[end] not in _NUMBER):
+                    self.pos = end
+                    return value
+            except json.JSONDecodeError:
+                if self.eof:
+                    raise
+            self.fill()
+
+
+def iter_array(chunks: Iterable[bytes], key: str) -> Iterator[Any]:
+    """
+    Yields the items of the array at key of a JSON object one at a time while the
+    document is read. Other keys of the object are parsed and dropped.
+
+    >>> list(iter_array([b'{"other": [1], "apps": [{"id": "/a"},', b' {"id": "/b"}]}'], "apps"))
+    [{'id': '/a'}, {'id': '/b'}]
+    """
+    reader = ChunkReader(chunks)
+    reader.expect('{')
+    if reader.peek() == '}':
+        return
+
+    while True:
+        name = reader.value()
+        reader.expect(':')
+        if name != key:
+            reader.value()
+        else:
+            reader.expect('[')
+            if reader.peek() == ']':
+                reader.pos += 1
+            else:
+                while True:
+                    yield reader.value()
+                    if reader.expect(',]') == ']':
+                        break
+
+        if reader.expect(',}') == '}':
+            return
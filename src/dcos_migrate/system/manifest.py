@@ -1,11 +1,15 @@
 import yaml
+import datetime
 import logging
 import inspect
 import itertools
+import functools
+import re
+import threading
 
-from typing import Any, Iterable, List, Optional, Type
+from typing import Any, Callable, Dict, Iterable, Iterator, List, MutableSequence, Optional, Tuple, Type, Union, overload
 
-from kubernetes.client import ApiClient  # type: ignore
+from kubernetes.client import ApiClient, Configuration  # type: ignore
 import kubernetes.client.models  # type: ignore
 
 
@@ -40,6 +44,168 @@ def with_comment(object_cls: Type[object]) -> Type[object]:
     return ObjectWithComment
 
 
+@functools.lru_cache(maxsize=1)
+def _model_classes() -> Dict[str, Any]:
+    # collected once per process. The generated models module holds hundreds of classes
+    return {name: cls for name, cls in vars(kubernetes.client.models).items() if inspect.isclass(cls)}
+
+
+@functools.lru_cache(maxsize=None)
+def model_for(apiVersion: str, kind: str) -> Optional[Any]:
+    """
+    Returns the kubernetes model class of (apiVersion, kind) or None. Models which exist
+    in several API groups carry the group in their name, so those are tried first.
+
+    >>> model_for("networking.k8s.io/v1beta1", "Ingress").__name__
+    'NetworkingV1beta1Ingress'
+    >>> model_for("apps/v1", "Deployment").__name__
+    'V1Deployment'
+    """
+    models = _model_classes()
+    name = Manifest.genModelName(apiVersion, kind)
+    if "/" in apiVersion:
+        group = apiVersion.split("/")[0].split(".")[0]
+        qualified = group[0].upper() + group[1:] + name
+        if qualified in models:
+            return models[qualified]
+    return models.get(name)
+
+
+# top level keys of a dumped document in this order. All other keys are dropped
+DOCUMENT_KEYS = ('apiVersion', 'kind', 'metadata', 'type', 'spec', 'data', 'stringData')
+# the libyaml emitter and parser are an order of magnitude faster and handle the same documents
+_Dumper: Any = getattr(yaml, 'CSafeDumper', yaml.SafeDumper)
+_Loader: Any = getattr(yaml, 'CSafeLoader', yaml.SafeLoader)
+_PRIMITIVE_TYPES = (float, bool, bytes, str, int)
+
+
+@functools.lru_cache(maxsize=None)
+def _model_fields(cls: Any) -> Tuple[Tuple[str, str], ...]:
+    attribute_map = getattr(cls, 'attribute_map')
+    return tuple([(attr, attribute_map[attr]) for attr in getattr(cls, 'openapi_types')])
+
+
+def sanitize(obj: Any) -> Any:
+    """
+    Same as ApiClient().sanitize_for_serialization without creating an ApiClient and
+    its connection pool for every object. The fields of each model class are looked up once.
+
+    >>> sanitize(kubernetes.client.V1ObjectMeta(name="foo", labels={"a": "b"}))
+    {'labels': {'a': 'b'}, 'name': 'foo'}
+    """
+    if obj is None:
+        return None
+    if isinstance(obj, _PRIMITIVE_TYPES):
+        return obj
+    if isinstance(obj, list):
+        return [sanitize(o) for o in obj]
+    if isinstance(obj, tuple):
+        return tuple([sanitize(o) for o in obj])
+    if isinstance(obj, (datetime.datetime, datetime.date)):
+        return obj.isoformat()
+    if isinstance(obj, dict):
+        return {k: sanitize(v) for k, v in obj.items()}
+
+    result = {}
+    for attr, key in _model_fields(obj.__class__):
+        value = getattr(obj, attr)
+        if value is not None:
+            result[key] = sanitize(value)
+    return result
+
+
+def dump_document(doc: Any) -> str:
+    """dumps a sanitized document in the key order of DOCUMENT_KEYS"""
+    ordered = {k: doc[k] for k in DOCUMENT_KEYS if k in doc.keys()}
+    try:
+        return str(yaml.dump(ordered, Dumper=_Dumper, sort_keys=False))
+    except yaml.representer.RepresenterError:
+        # objects only the full python representer knows, like tuples
+        return str(yaml.dump(ordered, sort_keys=False))
+
+
+def load_all(data: Any) -> Iterator[Any]:
+    """same as yaml.safe_load_all"""
+    return iter(yaml.load_all(data, Loader=_Loader))
+
+
+@functools.lru_cache(maxsize=1)
+def _api_client() -> Any:
+    # only for the rare types the model builder leaves to the ApiClient, like dates
+    return ApiClient()
+
+
+@functools.lru_cache(maxsize=1)
+def _configuration() -> Any:
+    # models create a Configuration each unless they are given one. They only read it
+    return Configuration()
+
+
+def _primitive(klass: Type[Any]) -> Callable[[Any], Any]:
+    def decode(data: Any) -> Any:
+        try:
+            return klass(data)
+        except UnicodeEncodeError:
+            return str(data)
+        except TypeError:
+            return data
+
+    return decode
+
+
+@functools.lru_cache(maxsize=None)
+def _decoder(klass: str) -> Callable[[Any], Any]:
+    """returns a function deserializing data of an openapi type like 'list[V1Container]'"""
+    if klass.startswith('list['):
+        item = _decoder(klass[5:-1])
+        return lambda data: [None if d is None else item(d) for d in data]
+
+    match = re.match(r'dict\(([^,]*), (.*)\)', klass)
+    if match:
+        value = _decoder(match.group(2))
+        return lambda data: {k: None if v is None else value(v) for k, v in data.items()}
+
+    native = ApiClient.NATIVE_TYPES_MAPPING.get(klass)
+    if native in ApiClient.PRIMITIVE_TYPES:
+        return _primitive(native)
+    if native is object:
+        return lambda data: data
+    if native is not None:
+        return lambda data: _api_client()._ApiClient__deserialize(data, native)
+
+    return functools.partial(build_model, getattr(kubernetes.client.models, klass))
+
+
+@functools.lru_cache(maxsize=None)
+def _model_decoders(cls: Any) -> Tuple[Tuple[str, str, Callable[[Any], Any]], ...]:
+    return tuple([(attr, cls.attribute_map[attr], _decoder(t)) for attr, t in cls.openapi_types.items()])
+
+
+def build_model(cls: Any, data: Any) -> Any:
+    """
+    Same as the private ApiClient.__deserialize(data, cls) without an ApiClient and a
+    Configuration per object. The field types of every model class are resolved once.
+
+    >>> build_model(kubernetes.client.V1ObjectMeta, {"name": "foo", "generation": "3"}).generation
+    3
+    """
+    if hasattr(cls, 'get_real_child_model'):
+        return _api_client()._ApiClient__deserialize(data, cls)
+
+    fields = _model_decoders(cls)
+    if not fields:
+        return data
+
+    kwargs = {}
+    if isinstance(data, dict):
+        for attr, key, decode in fields:
+            if key in data:
+                value = data[key]
+                kwargs[attr] = None if value is None else decode(value)
+
+    return cls(local_vars_configuration=_configuration(), **kwargs)
+
+
 def _extract_comment(obj: Any) -> str:
     try:
         get_comment = obj.get_comment
@@ -51,31 +217,100 @@ def _extract_comment(obj: Any) -> str:
     return ''.join('# {}\n'.format(line) for line in lines_iter)
 
 
-class Manifest(List[Any]):
-    """docstring for Manifest."""
+# creation order of all manifests, see Manifest.serial
+_serials = itertools.count()
+
+
+def next_serial() -> int:
+    """a serial larger than the one of every Manifest created so far"""
+    return next(_serials)
+
+
+class Manifest(MutableSequence[Any]):
+    """
+    The documents of a single manifest file. Lazily deserialized manifests parse
+    them the first time they are accessed.
+    """
     def __init__(self, pluginName: str, manifestName: str = "", data: List[Any] = [], extension: str = 'yaml'):
-        super(Manifest, self).__init__(data)
+        super(Manifest, self).__init__()
+        self._documents = list(data)
         self._plugin_name = pluginName
         self._name = manifestName
         self._extension = extension
         self._serializer = self.dumps
-        self._deserializer = yaml.safe_load_all
+        self._deserializer = load_all
+        self._rendered: Optional[str] = None
+        # serialized documents not parsed yet. See deserialize(lazy=True)
+        self._raw: Optional[str] = None
+        self._raw_lock: Optional[threading.Lock] = None
+        # file path and sha256 of the data a StorableList last wrote this item with
+        self.stored_as: Optional[Tuple[str, bytes]] = None
+        # tells which backup a plugin was translating when it created the manifest
+        self.serial = next_serial()
 
         self.resources = []  # type: ignore
 
+    @property
+    def documents(self) -> List[Any]:
+        """the parsed documents"""
+        self._load_raw()
+        return self._documents
+
+    @overload
+    def __getitem__(self, i: int) -> Any:
+        ...
+
+    @overload
+    def __getitem__(self, i: slice) -> List[Any]:
+        ...
+
+    def __getitem__(self, i: Union[int, slice]) -> Any:
+        return self.documents[i]
+
+    @overload
+    def __setitem__(self, i: int, value: Any) -> None:
+        ...
+
+    @overload
+    def __setitem__(self, i: slice, value: Iterable[Any]) -> None:
+        ...
+
+    def __setitem__(self, i: Union[int, slice], value: Any) -> None:
+        self.documents[i] = value
+
+    def __delitem__(self, i: Union[int, slice]) -> None:
+        del self.documents[i]
+
+    def __len__(self) -> int:
+        return len(self.documents)
+
+    def __iter__(self) -> Iterator[Any]:
+        return iter(self.documents)
+
+    def __eq__(self, other: Any) -> bool:
+        if isinstance(other, Manifest):
+            other = other.documents
+        return bool(self.documents == other)
+
+    def __repr__(self) -> str:
+        return repr(self.documents)
+
+    def insert(self, i: int, value: Any) -> None:
+        self.documents.insert(i, value)
+
+    def append(self, value: Any) -> None:
+        self.documents.append(value)
+
+    def extend(self, values: Iterable[Any]) -> None:
+        self.documents.extend(values)
+
     def dumps(self, data: Any) -> str:
         docs = []
+        debug = logging.getLogger().isEnabledFor(logging.DEBUG)
         for d in self:
-            kc = ApiClient()
-            doc = kc.sanitize_for_serialization(d)
-            orderedDoc = {}
-            # specify the key order: a,k,m,s/d
-            for k in ['apiVersion', 'kind', 'metadata', 'type', 'spec', 'data', 'stringData']:
-                if k in doc.keys():
-                    orderedDoc[k] = doc[k]
-
-            document = _extract_comment(d) + yaml.dump(orderedDoc, sort_keys=False)
-            logging.debug("Found doc: {}".format(document))
+            document = _extract_comment(d) + dump_document(sanitize(d))
+            if debug:
+                logging.debug("Found doc: {}".format(document))
             docs.append(document)
 
         return "---\n" + '\n---\n'.join(docs)
@@ -110,9 +345,41 @@ class Manifest(List[Any]):
         return None
 
     def serialize(self) -> str:
+        if self._rendered is not None:
+            return self._rendered
+        if self._raw is not None:
+            # never parsed, so it cannot have been modified either
+            return self._raw
         return self._serializer(self)
 
-    def deserialize(self, data: str) -> None:
+    def set_rendered(self, data: str) -> None:
+        """
+        Let serialize return `data` instead of rendering the resources again. Used for
+        manifests which are not modified anymore, like the ones restored from a cache.
+        """
+        self._rendered = data
+
+    def deserialize(self, data: str, lazy: bool = False) -> None:
+        """
+        Parse the documents in data. With lazy the documents are parsed the first time
+        their documents are accessed.
+        """
+        if lazy:
+            self._raw_lock = threading.Lock()
+            self._raw = data
+            return
+        self._parse(data)
+
+    def _load_raw(self) -> None:
+        if self._raw is None:
+            return
+        assert self._raw_lock is not None
+        with self._raw_lock:
+            if self._raw is not None:
+                self._parse(self._raw)
+                self._raw = None
+
+    def _parse(self, data: str) -> None:
         dload = self._deserializer(data)
         for dsi in dload:
             ds = dict(dsi)
@@ -123,14 +390,12 @@ class Manifest(List[Any]):
             if 'apiVersion' in ds and 'kind' in ds:
                 model = self.getModel(ds['kind'], ds['apiVersion'])
                 if model:
-                    kc = ApiClient()
-                    di = kc._ApiClient__deserialize(ds, model)
-                    self.append(di)
+                    self._documents.append(build_model(model, ds))
                 continue
             else:
                 logging.warning("Missing apiVersion and/or kind in data: {}".format(ds))
 
-            self.append(ds)
+            self._documents.append(ds)
 
     @classmethod
     def genModelName(self, apiVersion: str, kind: str) -> str:
@@ -139,10 +404,7 @@ class Manifest(List[Any]):
 
     @classmethod
     def getModel(self, kind: str, apiVersion: str) -> Optional[Any]:
-        for cls in inspect.getmembers(kubernetes.client.models, inspect.isclass):
-            if cls[0] == self.genModelName(apiVersion, kind):
-                return cls[1]
-        return None
+        return model_for(apiVersion, kind)
 
     def findall_by_annotation(self, annotation: str, value: Optional[str] = None) -> Optional[List[str]]:
         rs = []
@@ -166,3 +428,4 @@ class Manifest(List[Any]):
 
         # return first match
         return r[0]
+
@@ -1,45 +1,73 @@
-from typing import cast, Optional
-from .storable_list import StorableList
+from types import MappingProxyType
+from typing import Any, Mapping, Optional, Union
+from .backup import Backup
+from .storable_list import StorableList, StorableListView
 from .manifest import Manifest
 from kubernetes.client.models import V1ObjectMeta  # type: ignore
 import copy
 
 
+class ManifestListView(StorableListView[Manifest]):
+    """docstring for ManifestListView."""
+    def manifest(self, manifestName: str) -> Optional[Manifest]:
+        return self.get(manifestName)
+
+
 class ManifestList(StorableList):
     """docstring for ManifestList."""
     def __init__(self, dry: bool = False, path: str = './dcos-migrate/migrate'):
         super(ManifestList, self).__init__(path)
         self._dry = dry
+        self._cluster_annotations: Optional[Mapping[str, str]] = None
+
+    def _index(self, m: Union[Backup, Manifest]) -> None:
+        super(ManifestList, self)._index(m)
+        if m.plugin_name == 'cluster':
+            self._cluster_annotations = None
+
+    def _reindex(self) -> None:
+        super(ManifestList, self)._reindex()
+        self._cluster_annotations = None
 
     def manifest(self, pluginName: str, manifestName: str) -> Optional[Manifest]:
-        ml = self.manifests(pluginName=pluginName)
-        for m in ml:
-            assert isinstance(m, Manifest)
-            if m.name == manifestName:
-                return m
+        m = self._item(pluginName, manifestName)
+        assert m is None or isinstance(m, Manifest)
+        return m
 
+    def _clusterConfigMap(self) -> Optional[Any]:
+        clustermanifests = self.manifests('cluster')
+        # cluster creates a single manifest with a single Configmap
+        if clustermanifests and clustermanifests[0] and clustermanifests[0][0]:
+            return clustermanifests[0][0]
         return None
 
     def clusterMeta(self) -> Optional[V1ObjectMeta]:
-        clustermanifests = self.manifests('cluster')
-        # cluster creates a single manifest with a single Configmap
-        if clustermanifests and clustermanifests[0] and cast(Manifest, clustermanifests[0])[0]:
-            clustercfg = cast(Manifest, clustermanifests[0])[0]
+        clustercfg = self._clusterConfigMap()
+        if clustercfg is not None:
             return copy.deepcopy(clustercfg.metadata)
 
         return None
 
-    def manifests(self, pluginName: str) -> 'ManifestList':
-        ml = ManifestList()
-        for m in self:
-            if m and m.plugin_name == pluginName:
-                ml.append(m)
+    def clusterAnnotations(self) -> Mapping[str, str]:
+        """
+        Read only snapshot of the annotations of the cluster ConfigMap shared by all
+        callers. Copy it before adding annotations of your own.
+        """
+        with self._lock:
+            if self._cluster_annotations is None:
+                clustercfg = self._clusterConfigMap()
+                annotations = {}
+                if clustercfg is not None and clustercfg.metadata and clustercfg.metadata.annotations:
+                    annotations = dict(clustercfg.metadata.annotations)
+                self._cluster_annotations = MappingProxyType(annotations)
+            return self._cluster_annotations
 
-        return ml
+    def manifests(self, pluginName: str) -> ManifestListView:
+        return ManifestListView(*self._plugin_index(pluginName))
 
     def append_data(  # type: ignore
-            self, pluginName: str, backupName: str, extension: str, data: str, **kw) -> None:
+            self, pluginName: str, backupName: str, extension: str, data: str, lazy: bool = False, **kw) -> None:
         b = Manifest(pluginName=pluginName, manifestName=backupName, extension=extension)
-        b.deserialize(data)
+        b.deserialize(data, lazy=lazy)
 
         self.append(b)
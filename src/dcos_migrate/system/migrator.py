@@ -1,6 +1,8 @@
+import functools
 import logging
+import re
 from jsonpath_ng.ext import parse  # type: ignore
-from typing import Any, Callable, Dict, Optional
+from typing import Any, Callable, Dict, List, Optional, Tuple, Union
 import dcos_migrate.utils as utils
 from .backup import Backup
 from .backup_list import BackupList
@@ -8,6 +10,52 @@ from .manifest import Manifest
 from .manifest_list import ManifestList
 
 
+# keys made of plain field names only are looked up without JSONPath
+DOTTED_KEY = re.compile(r'^[A-Za-z_][A-Za-z0-9_]*(\.[A-Za-z_][A-Za-z0-9_]*)*$')
+
+# (path, value, full_path) of a match, the arguments of a translate callback
+Match = Tuple[str, Any, str]
+
+
+class DottedPath(object):
+    """
+    Finds what the JSONPath expression of a dotted key finds by walking the dicts.
+
+    >>> DottedPath("run.cpus").find({"run": {"cpus": 1}})
+    [('cpus', 1, 'run.cpus')]
+    """
+    def __init__(self, key: str):
+        super(DottedPath, self).__init__()
+        self.fields = key.split('.')
+        self.path = self.fields[-1]
+        self.full_path = key
+
+    def find(self, data: Any) -> List[Match]:
+        for field in self.fields:
+            if not isinstance(data, dict) or field not in data:
+                return []
+            data = data[field]
+        return [(self.path, data, self.full_path)]
+
+
+class JSONPath(object):
+    """docstring for JSONPath."""
+    def __init__(self, key: str):
+        super(JSONPath, self).__init__()
+        self.expr = parse(key)
+
+    def find(self, data: Any) -> List[Match]:
+        return [(str(m.path), m.value, str(m.full_path)) for m in self.expr.find(data)]
+
+
+@functools.lru_cache(maxsize=None)
+def compile_key(key: str) -> Union[DottedPath, JSONPath]:
+    """returns the compiled DottedPath or JSONPath of a translate key. Shared by all migrators"""
+    if DOTTED_KEY.match(key):
+        return DottedPath(key)
+    return JSONPath(key)
+
+
 class Migrator(object):
     """docstring for Migrator."""
     def __init__(self,
@@ -41,9 +89,8 @@ class Migrator(object):
             return None
 
         for k, v in self.translate.items():
-            expr = parse(k)
-            for match in expr.find(self.object):
-                v(str(match.path), match.value, str(match.full_path))
+            for path, value, full_path in compile_key(k).find(self.object):
+                v(path, value, full_path)
 
         return self.manifest
 
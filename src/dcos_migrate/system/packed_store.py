@@ -0,0 +1,103 @@
+import hashlib
+import os
+import sqlite3
+from contextlib import closing
+from typing import Iterable, Iterator, List, NamedTuple, Optional, Set, Tuple
+
+# lists stored at a path with this suffix are packed into a single SQLite file
+PACKED_SUFFIX = ".sqlite"
+
+
+def is_packed(path: str) -> bool:
+    return path.endswith(PACKED_SUFFIX)
+
+
+class PackedItem(NamedTuple):
+    plugin: str
+    name: str
+    className: str
+    extension: str
+    data: str
+
+
+class PackedStore(object):
+    """
+    Backups or manifests packed into a single SQLite file with one row per item. Rows
+    are keyed by (plugin, name, class), so single items are read and written without
+    touching the rest. Every write is a transaction, so an interrupted run never leaves
+    a half written item behind.
+    """
+    def __init__(self, path: str):
+        super(PackedStore, self).__init__()
+        self.path = path
+        self._initialized = False
+
+    def _connect(self) -> sqlite3.Connection:
+        # connections are cheap and not shared between the threads of a run
+        os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        conn = sqlite3.connect(self.path, timeout=60)
+        if not self._initialized:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("""CREATE TABLE IF NOT EXISTS items (
+                plugin TEXT NOT NULL,
+                name TEXT NOT NULL,
+                class TEXT NOT NULL,
+                extension TEXT NOT NULL,
+                sha256 TEXT NOT NULL,
+                data TEXT NOT NULL,
+                PRIMARY KEY (plugin, name, class))""")
+            conn.commit()
+            self._initialized = True
+        conn.execute("PRAGMA synchronous=NORMAL")
+        return conn
+
+    @staticmethod
+    def digest(data: str) -> str:
+        return hashlib.sha256(data.encode('utf-8')).hexdigest()
+
+    def get(self, plugin: str, name: str, className: str) -> Optional[PackedItem]:
+        with closing(self._connect()) as conn:
+            row = conn.execute("SELECT extension, data FROM items WHERE plugin = ? AND name = ? AND class = ?",
+                               (plugin, name, className)).fetchone()
+        if row is None:
+            return None
+        return PackedItem(plugin, name, className, row[0], row[1])
+
+    def items(self, plugin: Optional[str] = None) -> Iterator[PackedItem]:
+        query = "SELECT plugin, name, class, extension, data FROM items"
+        args: Tuple[str, ...] = ()
+        if plugin is not None:
+            query += " WHERE plugin = ?"
+            args = (plugin, )
+        with closing(self._connect()) as conn:
+            for row in conn.execute(query + " ORDER BY rowid", args):
+                yield PackedItem(*row)
+
+    def keys(self, plugins: Iterable[str]) -> Set[Tuple[str, str, str]]:
+        with closing(self._connect()) as conn:
+            return set([(r[0], r[1], r[2]) for p in plugins
+                        for r in conn.execute("SELECT plugin, name, class FROM items WHERE plugin = ?", (p, ))])
+
+    def put(self, items: Iterable[PackedItem]) -> List[bool]:
+        """insert or update items in one transaction. Returns for each item if it was written"""
+        written = []
+        with closing(self._connect()) as conn, conn:
+            for i in items:
+                digest = self.digest(i.data)
+                row = conn.execute("SELECT sha256 FROM items WHERE plugin = ? AND name = ? AND class = ?",
+                                   (i.plugin, i.name, i.className)).fetchone()
+                if row is not None and row[0] == digest:
+                    written.append(False)
+                    continue
+                # updates keep the rowid and so the position of the item
+                conn.execute(
+                    "INSERT INTO items VALUES (?, ?, ?, ?, ?, ?) ON CONFLICT (plugin, name, class) DO UPDATE SET "
+                    "extension = excluded.extension, sha256 = excluded.sha256, data = excluded.data",
+                    (i.plugin, i.name, i.className, i.extension, digest, i.data))
+                written.append(True)
+        return written
+
+    def delete(self, keys: Iterable[Tuple[str, str, str]]) -> int:
+        with closing(self._connect()) as conn, conn:
+            return sum([conn.execute("DELETE FROM items WHERE plugin = ? AND name = ? AND class = ?", k).rowcount
+                        for k in keys])
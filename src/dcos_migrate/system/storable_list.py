@@ -1,9 +1,13 @@
 import os
 import glob
-from typing import Any, Dict, List, Optional, Union
+import hashlib
+import threading
+from typing import Any, Dict, Iterable, Iterator, List, NamedTuple, Optional, Sequence, Tuple, TypeVar, Union, overload
 from .backup import Backup
 from .manifest import Manifest
+from .packed_store import PackedItem, PackedStore, is_packed
 import logging
+from concurrent.futures import ThreadPoolExecutor
 # pre python 3.9
 
 
@@ -13,85 +17,390 @@ def removeprefix(s: str, pre: str) -> str:
     return s
 
 
+T = TypeVar('T', bound=Union[Backup, Manifest])
+
+
+class StorableListView(Sequence[T]):
+    """
+    Read only view of the items of a single plugin. It shares the storage of the
+    list it was taken from and reflects later changes of it.
+    """
+    def __init__(self, items: List[T], index: Dict[str, T]):
+        self._items = items
+        self._index = index
+
+    @overload
+    def __getitem__(self, i: int) -> T:
+        ...
+
+    @overload
+    def __getitem__(self, i: slice) -> List[T]:
+        ...
+
+    def __getitem__(self, i: Union[int, slice]) -> Union[T, List[T]]:
+        return self._items[i]
+
+    def __len__(self) -> int:
+        return len(self._items)
+
+    def __iter__(self) -> Iterator[T]:
+        return iter(self._items)
+
+    def get(self, name: str) -> Optional[T]:
+        """the first item called name"""
+        return self._index.get(name)
+
+
+class StoreSummary(NamedTuple):
+    """files written, skipped because they were unchanged and removed by StorableList.store"""
+    written: List[str]
+    skipped: List[str]
+    removed: List[str]
+
+    def __str__(self) -> str:
+        return "{} written, {} unchanged, {} removed".format(len(self.written), len(self.skipped), len(self.removed))
+
+
 class StorableList(List[Union[Backup, Manifest]]):
-    """docstring for StorableList."""
+    """
+    List of backups or manifests which can be stored to and loaded from disk. Items are
+    indexed by plugin and name. The index is updated when items are added and rebuilt
+    after any other change. Plugins running in threads read the list while results of
+    other plugins are added, so changes and index lookups hold a lock.
+    """
     def __init__(self, path: str, dry: bool = False):
+        self._lock = threading.RLock()
         self._dry = dry
         self._path = path
+        # a path ending with PACKED_SUFFIX stores all items in a single file
+        self._packed = PackedStore(path) if is_packed(path) else None
+        # pluginName -> items in list order and pluginName -> name -> first item of that name
+        self._by_plugin: Dict[str, List[Any]] = {}
+        self._by_name: Dict[str, Dict[str, Any]] = {}
+
+    def _index(self, b: Union[Backup, Manifest]) -> None:
+        items, names = self._plugin_index(b.plugin_name)
+        items.append(b)
+        names.setdefault(b.name, b)
+
+    def _plugin_index(self, pluginName: str) -> Tuple[List[Any], Dict[str, Any]]:
+        with self._lock:
+            if pluginName not in self._by_plugin:
+                self._by_plugin[pluginName] = []
+                self._by_name[pluginName] = {}
+            return self._by_plugin[pluginName], self._by_name[pluginName]
+
+    def _item(self, pluginName: str, name: str) -> Optional[Union[Backup, Manifest]]:
+        return self._by_name.get(pluginName, {}).get(name)
+
+    def _reindex(self) -> None:
+        with self._lock:
+            # views keep references to the per plugin containers. Refill them instead of replacing them
+            for items in self._by_plugin.values():
+                items.clear()
+            for names in self._by_name.values():
+                names.clear()
+            for b in self:
+                self._index(b)
+
+    def append(self, b: Union[Backup, Manifest]) -> None:
+        with self._lock:
+            super(StorableList, self).append(b)
+            self._index(b)
+
+    def extend(self, items: Iterable[Union[Backup, Manifest]]) -> None:
+        with self._lock:
+            for b in items:
+                self.append(b)
+
+    def __iadd__(self, items: Iterable[Union[Backup, Manifest]]) -> 'StorableList':
+        self.extend(items)
+        return self
+
+    # every other mutation may change the order or remove items. Rebuild the index after it
+
+    def insert(self, i: int, b: Union[Backup, Manifest]) -> None:
+        with self._lock:
+            super(StorableList, self).insert(i, b)
+            self._reindex()
+
+    def remove(self, b: Union[Backup, Manifest]) -> None:
+        with self._lock:
+            super(StorableList, self).remove(b)
+            self._reindex()
+
+    def pop(self, i: int = -1) -> Union[Backup, Manifest]:
+        with self._lock:
+            b = super(StorableList, self).pop(i)
+            self._reindex()
+        return b
+
+    def clear(self) -> None:
+        with self._lock:
+            super(StorableList, self).clear()
+            self._reindex()
+
+    def sort(self, *args: Any, **kwargs: Any) -> None:
+        with self._lock:
+            super(StorableList, self).sort(*args, **kwargs)
+            self._reindex()
+
+    def reverse(self) -> None:
+        with self._lock:
+            super(StorableList, self).reverse()
+            self._reindex()
+
+    def __setitem__(self, i: Any, b: Any) -> None:
+        with self._lock:
+            super(StorableList, self).__setitem__(i, b)
+            self._reindex()
+
+    def __delitem__(self, i: Union[int, slice]) -> None:
+        with self._lock:
+            super(StorableList, self).__delitem__(i)
+            self._reindex()
 
-    def store(self, pluginName: Optional[str] = None, backupName: Optional[str] = None) -> Dict[str, str]:
+    def __imul__(self, n: int) -> 'StorableList':
+        with self._lock:
+            super(StorableList, self).__imul__(n)
+            self._reindex()
+        return self
+
+    @property
+    def path(self) -> str:
+        return self._path
+
+    def item_path(self, b: Union[Backup, Manifest]) -> str:
         # ./data/backup/<pluginName>/<backupName>.<class>.<extension>
-        out = {}
-        for b in self:
-            assert hasattr(b, 'plugin_name'), self
-            pname = b.plugin_name
-            bname = b.name
-            fextension = ".{cls}.{ext}".format(cls=b.__class__.__name__, ext=b.extension)
+        fextension = ".{cls}.{ext}".format(cls=b.__class__.__name__, ext=b.extension)
+        return os.path.join(self._path, b.plugin_name, b.name + fextension)
+
+    @property
+    def dry(self) -> bool:
+        return self._dry
+
+    def store_item(self, b: Union[Backup, Manifest]) -> Tuple[str, str]:
+        """writes a single item to disk. Returns the file path and the serialized data"""
+        filepath, data, _ = self._store_item(b)
+        return filepath, b.serialize() if data is None else data
+
+    def _store_item(self, b: Union[Backup, Manifest]) -> Tuple[str, Optional[str], bool]:
+        assert hasattr(b, 'plugin_name'), self
+        filepath = self.item_path(b)
+        if not self._dry and isinstance(b, Backup) and b.source == filepath:
+            # not used since it was read from there, like backups streamed to disk by their plugin
+            return filepath, None, False
+
+        data = b.serialize()
+        if self._dry:
+            return filepath, data, False
+        if self._packed is not None:
+            return filepath, data, self._packed.put([self._packed_item(b, data)])[0]
+
+        encoded = data.encode('utf-8')
+        digest = hashlib.sha256(encoded).digest()
+        if b.stored_as == (filepath, digest):
+            # written by store_item before and unchanged since
+            return filepath, data, False
+
+        if self._is_stored(filepath, encoded, digest):
+            logging.debug("file {} is unchanged".format(filepath))
+            b.stored_as = (filepath, digest)
+            return filepath, data, False
+
+        logging.debug("writing file {}".format(filepath))
+        dirname = os.path.dirname(filepath)
+        os.makedirs(dirname, exist_ok=True)
+        # write next to the target and rename, so an interrupted run never leaves a half written file.
+        # The dot prefix keeps load from picking up leftovers
+        tmppath = os.path.join(dirname, ".{}.{}.{}.tmp".format(os.path.basename(filepath), os.getpid(),
+                                                                 threading.get_ident()))
+        try:
+            with open(tmppath, 'wb') as f:
+                f.write(encoded)
+            os.replace(tmppath, filepath)
+        except BaseException:
+            if os.path.exists(tmppath):
+                os.unlink(tmppath)
+            raise
+
+        b.stored_as = (filepath, digest)
+        return filepath, data, True
+
+    @staticmethod
+    def _is_stored(filepath: str, encoded: bytes, digest: bytes) -> bool:
+        # rewriting unchanged files costs I/O and touches mtimes incremental syncs rely on
+        try:
+            if os.path.getsize(filepath) != len(encoded):
+                return False
+            h = hashlib.sha256()
+            with open(filepath, 'rb') as f:
+                for chunk in iter(lambda: f.read(1 << 16), b''):
+                    h.update(chunk)
+        except OSError:
+            return False
+        return h.digest() == digest
+
+    @staticmethod
+    def _packed_item(b: Union[Backup, Manifest], data: str) -> PackedItem:
+        return PackedItem(b.plugin_name, b.name, b.__class__.__name__, b.extension, data)
+
+    def remove_item(self, b: Union[Backup, Manifest]) -> bool:
+        """deletes the file of a single item. Returns False if there was nothing stored"""
+        if self._packed is not None:
+            return not self._dry and self._packed.delete([(b.plugin_name, b.name, b.__class__.__name__)]) > 0
+
+        filepath = self.item_path(b)
+        if self._dry or not os.path.isfile(filepath):
+            return False
 
-            path = os.path.join(self._path, pname)
-            filepath = os.path.join(path, bname + fextension)
+        logging.debug("removing file {}".format(filepath))
+        os.remove(filepath)
+        return True
 
-            data = b.serialize()
+    def read_item(self, b: Union[Backup, Manifest]) -> str:
+        """the data stored on disk for b. Empty if there is nothing stored"""
+        if self._packed is not None:
+            item = self._packed.get(b.plugin_name, b.name, b.__class__.__name__)
+            return item.data if item is not None else ""
 
-            logging.debug("writing file {}".format(filepath))
-            if not self._dry:
-                os.makedirs(path, exist_ok=True)
+        filepath = self.item_path(b)
+        if not os.path.isfile(filepath):
+            return ""
+        with open(filepath, 'rt') as file:
+            return file.read()
 
-                with open(filepath, 'wt', encoding='utf-8') as f:
-                    f.write(data)
-                    f.close()
+    def load_item(self, b: Union[Backup, Manifest]) -> bool:
+        """fills b with the data stored on disk for it. Returns False if there is nothing stored"""
+        data = self.read_item(b)
+        if not data:
+            return False
 
-            out[filepath] = data
+        b.deserialize(data)
+        return True
 
-        return out
+    def store(self,
+              pluginName: Optional[str] = None,
+              backupName: Optional[str] = None,
+              prune: bool = False,
+              workers: int = 8) -> StoreSummary:
+        """
+        Write all items using `workers` threads. Files with unchanged content are not
+        touched. With prune, files of the plugins in this list that do not belong to
+        any of its items are removed.
+        """
+        if self._packed is not None:
+            return self._store_packed(self._packed, prune, workers)
 
-    def append_data(self, pluginName: str, backupName: str, extension: str, className: str, data: str,
+        summary = StoreSummary([], [], [])
+        with ThreadPoolExecutor(max_workers=max(1, workers)) as executor:
+            for filepath, _, written in executor.map(self._store_item, self):
+                (summary.written if written else summary.skipped).append(filepath)
+
+        if prune and not self._dry:
+            keep = set([self.item_path(b) for b in self])
+            for plugin in sorted(set([b.plugin_name for b in self])):
+                # hidden files are left over temp files or not ours
+                for f in sorted(glob.glob(os.path.join(self._path, plugin, "*"))):
+                    if f not in keep and os.path.isfile(f):
+                        logging.debug("removing file {}".format(f))
+                        os.remove(f)
+                        summary.removed.append(f)
+
+        return summary
+
+    def _store_packed(self, packed: PackedStore, prune: bool, workers: int) -> StoreSummary:
+        summary = StoreSummary([], [], [])
+        if self._dry:
+            return summary
+
+        with ThreadPoolExecutor(max_workers=max(1, workers)) as executor:
+            items = list(executor.map(lambda b: self._packed_item(b, b.serialize()), self))
+        # a single transaction for all items
+        for b, written in zip(self, packed.put(items)):
+            (summary.written if written else summary.skipped).append(self.item_path(b))
+
+        if prune:
+            keep = set([(i.plugin, i.name, i.className) for i in items])
+            gone = sorted(packed.keys(set([i.plugin for i in items])) - keep)
+            packed.delete(gone)
+            summary.removed.extend(
+                [os.path.join(self._path, plugin, "{}.{}.{}".format(name, cls, "*")) for plugin, name, cls in gone])
+
+        return summary
+
+    def append_data(self,
+                    pluginName: str,
+                    backupName: str,
+                    extension: str,
+                    className: str,
+                    data: str,
+                    lazy: bool = False,
                     **kwargs: Any) -> None:
         # list classes should implement this. Now we do a static guess
         d: Union[Backup, Manifest]
         if className == "Backup":
             d = Backup(pluginName=pluginName, backupName=backupName, extension=extension, **kwargs)
         elif className == "Manifest":
-            d = Manifest(pluginName=pluginName, extension=extension, **kwargs)
+            d = Manifest(pluginName=pluginName, manifestName=backupName, extension=extension, **kwargs)
         else:
             raise ValueError("Unknown class: {}".format(className))
 
-        d.deserialize(data)
+        d.deserialize(data, lazy=lazy)
         assert hasattr(d, 'plugin_name'), d
         self.append(d)
 
-    def load(self) -> 'StorableList':
+    def _parse_file_name(self, f: str) -> Tuple[str, str, str, str]:
+        # <pluginName>/<backupName>.<class>.<extension>
+        fname = removeprefix(removeprefix(f, self._path), '')
+        pluginFile = list(filter(None, fname.split('/')))
+        if not len(pluginFile) == 2:
+            raise ValueError("Unexpected file/path: {} in {}".format(f, pluginFile))
+
+        pluginName = pluginFile[0]
+        fileName = pluginFile[1].split('.')
+        if not len(fileName) >= 3:
+            raise ValueError("Unexpected file name: {} in {}".format(f, fileName))
+
+        return pluginName, ".".join(fileName[:-2]), fileName[-2], fileName[-1]
+
+    @staticmethod
+    def _read(f: str) -> str:
+        with open(f, 'rt') as file:
+            return file.read()
+
+    def load(self, pluginName: Optional[str] = None, lazy: bool = True, workers: int = 8) -> 'StorableList':
+        """
+        Load the stored items, optionally only the ones of pluginName. Files are read by
+        `workers` threads. With lazy every item is parsed the first time it is accessed.
+        """
+        if self._packed is not None:
+            if os.path.isfile(self._path):
+                for i in self._packed.items(pluginName):
+                    self.append_data(pluginName=i.plugin,
+                                     backupName=i.name,
+                                     extension=i.extension,
+                                     data=i.data,
+                                     className=i.className,
+                                     lazy=lazy)
+            return self
+
         # ./data/backup/<pluginName>/<backupName>.<class>.<extension>
-        globstr = "{path}/*/*".format(path=self._path)
-        for f in glob.glob(globstr):
-            fname = removeprefix(removeprefix(f, self._path), '')
-            # <pluginName>/<backupName>
-            pluginFile = list(filter(None, fname.split('/')))
-            if not len(pluginFile) == 2:
-                raise ValueError("Unexpected file/path: {} in {}".format(f, pluginFile))
-
-            pluginName = pluginFile[0]
-            fileName = pluginFile[1].split('.')
-            if not len(fileName) >= 3:
-                raise ValueError("Unexpected file name: {} in {}".format(f, fileName))
-
-            name = ".".join(fileName[:-2])
-            className = fileName[-2]
-            extension = fileName[-1]
-
-            data = ""
-            with open(f, 'rt') as file:
-                data = file.read()
-                file.close()
-
-            if not data:
-                continue
-
-            # let classes implement the load method
-            self.append_data(pluginName=pluginName,
-                             backupName=name,
-                             extension=extension,
-                             data=data,
-                             className=className)
+        globstr = "{path}/{plugin}/*".format(path=self._path, plugin=pluginName or '*')
+        files = glob.glob(globstr)
+        names = [self._parse_file_name(f) for f in files]
+
+        with ThreadPoolExecutor(max_workers=max(1, workers)) as executor:
+            for (plugin, name, className, extension), data in zip(names, executor.map(self._read, files)):
+                if not data:
+                    continue
+
+                # let classes implement the load method
+                self.append_data(pluginName=plugin,
+                                 backupName=name,
+                                 extension=extension,
+                                 data=data,
+                                 className=className,
+                                 lazy=lazy)
 
         return self
@@ -0,0 +1,185 @@
+import bisect
+import json
+import logging
+import random
+import threading
+import time
+import collections
+from typing import Any, Counter, Dict, Optional
+from urllib.parse import urlparse
+
+import requests
+from requests.adapters import HTTPAdapter
+
+# methods which can be sent again without changing the outcome
+IDEMPOTENT_METHODS = ("GET", "HEAD", "OPTIONS", "PUT", "DELETE")
+# status codes worth another try. The DC/OS services answer 429 when throttling
+RETRY_STATUS_CODES = (429, 500, 502, 503, 504)
+# upper bounds in seconds of the latency histogram buckets
+LATENCY_BUCKETS = (0.01, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+
+def endpoint_name(method: str, url: str, depth: int = 3) -> str:
+    """
+    Group urls into endpoints by their first path segments so per object urls
+    like secrets or apps end up in the same bucket.
+
+    >>> endpoint_name("get", "https://dcos/secrets/v1/secret/default/foo?list=true")
+    'GET /secrets/v1/secret'
+    """
+    segments = list(filter(None, urlparse(url).path.split("/")))
+    return "{} /{}".format(method.upper(), "/".join(segments[:depth]))
+
+
+class EndpointStats(object):
+    """docstring for EndpointStats."""
+    def __init__(self) -> None:
+        self.requests = 0
+        self.retries = 0
+        self.bytes = 0
+        self.seconds = 0.0
+        self.status_codes: Counter[int] = collections.Counter()
+        self.errors: Counter[str] = collections.Counter()
+        self.latency_buckets = [0] * (len(LATENCY_BUCKETS) + 1)
+
+    def observe(self, seconds: float, response: Optional[requests.Response], error: Optional[Exception]) -> None:
+        self.requests += 1
+        self.seconds += seconds
+        self.latency_buckets[bisect.bisect_left(LATENCY_BUCKETS, seconds)] += 1
+        if response is not None:
+            self.status_codes[response.status_code] += 1
+            length = response.headers.get('Content-Length')
+            if length is not None:
+                self.bytes += int(length)
+            elif getattr(response, '_content_consumed', False):
+                # reading the body of a streamed response here would defeat streaming
+                self.bytes += len(response.content)
+        if error is not None:
+            self.errors[error.__class__.__name__] += 1
+
+    def as_dict(self) -> Dict[str, Any]:
+        buckets = ["<={}s".format(b) for b in LATENCY_BUCKETS] + [">{}s".format(LATENCY_BUCKETS[-1])]
+        return {
+            "requests": self.requests,
+            "retries": self.retries,
+            "bytes": self.bytes,
+            "seconds": round(self.seconds, 3),
+            "status_codes": {str(k): v for k, v in sorted(self.status_codes.items())},
+            "errors": dict(self.errors),
+            "latency": {b: n for b, n in zip(buckets, self.latency_buckets) if n},
+        }
+
+
+class TransportMetrics(object):
+    """docstring for TransportMetrics."""
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._endpoints: Dict[str, EndpointStats] = {}
+
+    def _stats(self, endpoint: str) -> EndpointStats:
+        if endpoint not in self._endpoints:
+            self._endpoints[endpoint] = EndpointStats()
+        return self._endpoints[endpoint]
+
+    def observe(self, endpoint: str, seconds: float, response: Optional[requests.Response],
+                error: Optional[Exception]) -> None:
+        with self._lock:
+            self._stats(endpoint).observe(seconds, response, error)
+
+    def retried(self, endpoint: str) -> None:
+        with self._lock:
+            self._stats(endpoint).retries += 1
+
+    def as_dict(self) -> Dict[str, Dict[str, Any]]:
+        with self._lock:
+            return {e: s.as_dict() for e, s in sorted(self._endpoints.items())}
+
+    def report(self) -> str:
+        lines = []
+        for endpoint, s in self.as_dict().items():
+            lines.append("{:<50} {:>6} req {:>4} retries {:>12} bytes {:>9.2f}s {}".format(
+                endpoint, s["requests"], s["retries"], s["bytes"], s["seconds"],
+                json.dumps(s["status_codes"])))
+        return "\n".join(lines)
+
+    def dump(self, path: str) -> None:
+        with open(path, 'wt', encoding='utf-8') as f:
+            json.dump(self.as_dict(), f, indent=4)
+
+
+class Transport(object):
+    """
+    Sends requests through a persistent session with a connection pool shared by all
+    threads. Idempotent requests are retried with jittered exponential backoff on
+    connection errors and on RETRY_STATUS_CODES. Every attempt is recorded in `metrics`.
+    """
+    def __init__(self, pool_size: int = 16, retries: int = 3, backoff: float = 0.5, max_backoff: float = 30.0):
+        super(Transport, self).__init__()
+        self.session = requests.Session()
+        self.retries = retries
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self.metrics = TransportMetrics()
+        self.pool_size = 0
+        self.resize_pool(pool_size)
+
+    def resize_pool(self, pool_size: int) -> None:
+        """size the connection pool to the number of threads sending requests concurrently"""
+        if pool_size == self.pool_size:
+            return
+        self.pool_size = pool_size
+        previous = [self.session.adapters.get(prefix) for prefix in ["http://", "https://"]]
+        adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+        # release the connections of the replaced pool
+        for a in {id(a): a for a in previous if a is not None}.values():
+            a.close()
+
+    def delay(self, attempt: int, response: Optional[requests.Response] = None) -> float:
+        """full jitter backoff. A `Retry-After` header sent by the server is honored"""
+        delay = random.uniform(0, min(self.max_backoff, self.backoff * 2**attempt))
+        if response is not None:
+            retry_after = response.headers.get('Retry-After', '')
+            if retry_after.isdigit():
+                delay = max(delay, float(retry_after))
+        return delay
+
+    def send(self, method: str, url: str, **kwargs: Any) -> requests.Response:
+        endpoint = endpoint_name(method, url)
+        retries = self.retries if method.upper() in IDEMPOTENT_METHODS else 0
+
+        attempt = 0
+        while True:
+            response: Optional[requests.Response] = None
+            error: Optional[Exception] = None
+            start = time.monotonic()
+            try:
+                response = self.session.request(method=method, url=url, **kwargs)
+            except (requests.exceptions.ConnectionError, requests.exceptions.Timeout) as e:
+                error = e
+                # certificate problems do not go away by retrying
+                if isinstance(e, requests.exceptions.SSLError):
+                    raise
+            finally:
+                self.metrics.observe(endpoint, time.monotonic() - start, response, error)
+
+            if response is not None:
+                if response.status_code not in RETRY_STATUS_CODES or attempt >= retries:
+                    return response
+                reason = "HTTP {}".format(response.status_code)
+            else:
+                assert error is not None
+                if attempt >= retries:
+                    raise error
+                reason = str(error)
+
+            delay = self.delay(attempt, response)
+            if response is not None:
+                # hand the connection of a streamed response back to the pool
+                response.close()
+            attempt += 1
+            self.metrics.retried(endpoint)
+            logging.warning("{} {} failed with {} - retrying in {:.1f}s ({}/{})".format(
+                method.upper(), url, reason, delay, attempt, retries))
+            time.sleep(delay)
@@ -1,7 +1,7 @@
 import pytest
 import requests_mock
 import dcos
-from dcos.errors import DCOSAuthenticationException
+from dcos.errors import DCOSAuthenticationException, DCOSHTTPException
 from dcos_migrate.system.client import DCOSClient
 
 adapter = requests_mock.Adapter()
@@ -48,3 +48,30 @@ def test_client_request_authentication(conf, **kwargs):
 
     with pytest.raises(DCOSAuthenticationException):
         client_invalid.get(client.full_dcos_url("foo"))
+
+
+@requests_mock.Mocker(kw='mock')
+def test_client_request_errors(conf, **kwargs):
+    kwargs['mock'].get('mock://test.cluster.mesos/missing', status_code=404)
+
+    client = DCOSClient(toml_config=dcos.config.Toml(conf))
+
+    with pytest.raises(DCOSHTTPException) as e:
+        client.get(client.full_dcos_url("missing"))
+    assert e.value.status() == 404
+
+
+@requests_mock.Mocker(kw='mock')
+def test_client_request_outside_cluster(conf, **kwargs):
+    kwargs['mock'].get('mock://other.example.com/foo', text='{}')
+    kwargs['mock'].get('mock://test.cluster.mesos/foo', text='{}')
+
+    client = DCOSClient(toml_config=dcos.config.Toml(conf))
+    assert client._ssl_verify(client.full_dcos_url("foo")) is False
+    assert client._ssl_verify("mock://other.example.com/foo") is None
+
+    # the cluster token is only sent to the cluster
+    client.get("mock://other.example.com/foo")
+    assert "Authorization" not in kwargs['mock'].last_request.headers
+    client.get(client.full_dcos_url("foo"))
+    assert kwargs['mock'].last_request.headers["Authorization"] == "token=im-a-fake-token"
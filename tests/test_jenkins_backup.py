@@ -20,3 +20,22 @@ def test_jenkins_backup():
         assert jbl[0].data['version'] == "3.6.1-2.190.1"
         assert jbl[0].data['options']['service']['mem'] == 4096
         assert jbl[0].data['options']['service']['cpus'] == 1
+
+
+def test_jenkins_backup_of_streamed_apps(tmpdir, monkeypatch):
+    reads = []
+    read_item = BackupList.read_item
+    monkeypatch.setattr(BackupList, "read_item", lambda self, b: reads.append(b.name) or read_item(self, b))
+
+    with open('tests/examples/jenkins.json') as json_file:
+        data = json.load(json_file)
+    m = MarathonPlugin()
+    stored = BackupList(path=str(tmpdir))
+    bl = BackupList()
+    for app in [{"id": "/other-{}".format(i), "labels": {"DCOS_PACKAGE_NAME": "kafka"}} for i in range(3)] + [data]:
+        bl.append(m.storeBackup(stored, m.createBackup(app)))
+
+    jbl = JenkinsPlugin().backup(client=DCOSClient(), backupList=bl)
+    assert jbl[0].data['version'] == "3.6.1-2.190.1"
+    # only the jenkins app is read from disk again
+    assert reads == [bl[-1].name]
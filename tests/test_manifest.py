@@ -1,4 +1,5 @@
-from kubernetes.client.models import V1beta1CronJob, V1Secret
+from kubernetes.client.models import (ExtensionsV1beta1Ingress, NetworkingV1beta1Ingress, V1beta1CronJob, V1Deployment,
+                                      V1Secret)
 from dcos_migrate.system import Manifest, with_comment
 
 import textwrap
@@ -9,6 +10,14 @@ def test_manifest_deserialize_get_model_name():
     assert "V1beta1CronJob" == Manifest.genModelName("batch/v1beta1", "CronJob")
 
 
+def test_manifest_get_model_group_qualified():
+    assert Manifest.getModel("CronJob", "batch/v1beta1") is V1beta1CronJob
+    assert Manifest.getModel("Ingress", "extensions/v1beta1") is ExtensionsV1beta1Ingress
+    assert Manifest.getModel("Ingress", "networking.k8s.io/v1beta1") is NetworkingV1beta1Ingress
+    assert Manifest.getModel("Deployment", "apps/v1") is V1Deployment
+    assert Manifest.getModel("Unknown", "v1") is None
+
+
 def test_manifest_deserialize_multidoc_model():
     with open('tests/examples/multiDocManifest.yaml') as yaml_file:
         m = Manifest(pluginName='metronome', manifestName='test')
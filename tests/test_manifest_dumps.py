@@ -0,0 +1,163 @@
+import datetime
+import json
+import textwrap
+
+import pytest
+import yaml
+from kubernetes.client import ApiClient
+from kubernetes.client.models import (V1ConfigMap, V1Container, V1Deployment, V1DeploymentSpec, V1EnvVar,
+                                      V1LabelSelector, V1ObjectMeta, V1PodSpec, V1PodTemplateSpec, V1Secret)
+
+from dcos_migrate.plugins.marathon import MarathonMigrator
+from dcos_migrate.system import Manifest, ManifestList, with_comment
+
+
+@with_comment
+class V1DeploymentWithComment(V1Deployment):
+    pass
+
+
+def marathon_simple_with_secret() -> Manifest:
+    ml = ManifestList(path='tests/examples/simpleWithSecret')
+    ml.load()
+    with open('tests/examples/simpleWithSecret.json') as json_file:
+        return MarathonMigrator(object=json.load(json_file), manifest_list=ml).migrate()
+
+
+def multidoc() -> Manifest:
+    with open('tests/examples/multiDocManifest.yaml') as yaml_file:
+        m = Manifest(pluginName='metronome', manifestName='multidoc')
+        m.deserialize(yaml_file.read())
+        return m
+
+
+def strings() -> Manifest:
+    values = {
+        "empty": "",
+        "long": "lorem ipsum dolor sit amet " * 8,
+        "multiline": "first line\n  second line indented\n\nlast line\n",
+        "unicode": "grüße 🚀 日本語",
+        "looks-like-int": "0123",
+        "looks-like-bool": "yes",
+        "looks-like-null": "null",
+        "special": "a: b # c - [d] {e} & * ! | > ' \" % @ `",
+        "leading-space": "  spaced",
+        "tab": "a\tb",
+        "bytes": b"binary \x00\x01 data",
+    }
+    cm = V1ConfigMap(api_version="v1", kind="ConfigMap", metadata=V1ObjectMeta(name="strings"), data=values)
+    secret = V1Secret(api_version="v1",
+                      kind="Secret",
+                      type="Opaque",
+                      metadata=V1ObjectMeta(name="secret", labels={"app": "x"}),
+                      string_data={"password": "s3cr3t"},
+                      data={"key": "Zm9vYmFy"})
+    return Manifest(pluginName='golden', manifestName='strings', data=[cm, secret])
+
+
+def commented() -> Manifest:
+    deployment = V1DeploymentWithComment(
+        api_version="apps/v1",
+        kind="Deployment",
+        metadata=V1ObjectMeta(name="commented", annotations={"a/b": "c"}),
+        spec=V1DeploymentSpec(selector=V1LabelSelector(match_labels={"app": "commented"}),
+                              replicas=3,
+                              template=V1PodTemplateSpec(spec=V1PodSpec(containers=[
+                                  V1Container(name="main",
+                                              image="nginx:1.19",
+                                              args=["--flag", "1", "--ratio", "0.5"],
+                                              env=[V1EnvVar(name="EMPTY", value="")])
+                              ]))))
+    deployment.set_comment(["first line", "second\n  indented"])
+    raw = {
+        "kind": "Unknown",
+        "spec": {
+            "when": datetime.date(2021, 1, 25),
+            "numbers": [1, 2.5, True, None],
+            "nested": [{
+                "b": 1,
+                "a": 2
+            }],
+        },
+        "metadata": {
+            "name": "raw"
+        },
+        "ignored": "dropped on dump",
+        "apiVersion": "example.com/v1",
+    }
+    return Manifest(pluginName='golden', manifestName='commented', data=[deployment, raw])
+
+
+@pytest.mark.parametrize('name,build', [
+    ("marathon-simple-with-secret", marathon_simple_with_secret),
+    ("multidoc", multidoc),
+    ("strings", strings),
+    ("commented", commented),
+])
+def test_dumps_golden(snapshot, name, build):
+    """
+    Output of Manifest.dumps must never change. Update the golden files with
+
+        pytest tests/test_manifest_dumps.py --snapshot-update
+    """
+    snapshot.snapshot_dir = "tests/examples/golden"
+    snapshot.assert_match(build().serialize(), name + ".yaml")
+
+
+def test_dumps_round_trip():
+    m = multidoc()
+    loaded = Manifest(pluginName='golden', manifestName='multidoc')
+    loaded.deserialize(m.serialize())
+    assert loaded.serialize() == m.serialize()
+
+
+def legacy_load(data):
+    docs = []
+    for d in yaml.safe_load_all(data):
+        # documents of unknown models are dropped
+        model = Manifest.getModel(d['kind'], d['apiVersion'])
+        if model:
+            docs.append(ApiClient()._ApiClient__deserialize(d, model))
+    return docs
+
+
+@pytest.mark.parametrize('name', ["marathon-simple-with-secret", "multidoc", "strings", "commented"])
+def test_deserialize_golden(name):
+    with open("tests/examples/golden/{}.yaml".format(name)) as f:
+        data = f.read()
+
+    m = Manifest(pluginName='golden', manifestName=name)
+    m.deserialize(data)
+    assert list(m) == legacy_load(data)
+    assert [type(d) for d in m] == [type(d) for d in legacy_load(data)]
+
+
+def test_deserialize_conversions():
+    data = textwrap.dedent("""\
+        apiVersion: apps/v1
+        kind: Deployment
+        metadata:
+          name: conversions
+          creationTimestamp: '2021-01-25T10:00:00Z'
+          generation: '3'
+          annotations:
+            number: 1
+        spec:
+          selector: {}
+          template:
+            spec:
+              containers:
+              - name: main
+                ports:
+                - containerPort: 80
+                  name: null
+                readinessProbe:
+                  httpGet:
+                    port: http
+        """)
+    m = Manifest(pluginName='golden', manifestName='conversions')
+    m.deserialize(data)
+    assert list(m) == legacy_load(data)
+    assert m[0].metadata.generation == 3
+    assert m[0].metadata.annotations == {"number": "1"}
+    assert m[0].metadata.creation_timestamp.year == 2021
@@ -1,5 +1,5 @@
 from dcos_migrate.system import ManifestList, Manifest
-from kubernetes.client.models import V1ObjectMeta, V1Secret
+from kubernetes.client.models import V1ConfigMap, V1ObjectMeta, V1Secret
 import pytest
 
 
@@ -66,3 +66,65 @@ def test_manifest():
     assert sec2 is not None
     assert len(sec2) == 1
     assert sec2[0].metadata.name == "test.secret2"
+
+
+def cluster_manifest(cluster_id):
+    cfg = V1ConfigMap(metadata=V1ObjectMeta(name="dcos-" + cluster_id, annotations={"cluster-id": cluster_id}))
+    return Manifest(pluginName="cluster", manifestName="dcos-" + cluster_id, data=[cfg])
+
+
+def test_manifest_index():
+    ml = ManifestList(path='tests/examples/simpleWithSecret')
+    ml.load()
+    secrets = ml.manifests("secret")
+    assert len(secrets) == 2
+
+    ml.append(Manifest(pluginName="secret", manifestName="added"))
+    assert len(secrets) == 3
+    assert ml.manifest("secret", "added") is secrets.manifest("added")
+
+    ml.remove(ml.manifest("secret", "added"))
+    assert ml.manifest("secret", "added") is None
+
+
+def test_cluster_annotations():
+    ml = ManifestList()
+    assert ml.clusterAnnotations() == {}
+
+    ml.append(cluster_manifest("first"))
+    annotations = ml.clusterAnnotations()
+    assert annotations == {"cluster-id": "first"}
+    # shared snapshot
+    assert ml.clusterAnnotations() is annotations
+    with pytest.raises(TypeError):
+        annotations["foo"] = "bar"
+
+    ml.clear()
+    ml.append(cluster_manifest("second"))
+    assert ml.clusterAnnotations() == {"cluster-id": "second"}
+
+
+def test_load_lazy():
+    ml = ManifestList(path='tests/examples/simpleWithSecret')
+    ml.load()
+
+    sec2 = ml.manifest(pluginName="secret", manifestName="test.secret2")
+    assert sec2._raw is not None
+    assert sec2._documents == []
+
+    assert len(sec2) == 1
+    assert sec2._raw is None
+    assert sec2[0].metadata.name == "test.secret2"
+
+
+def test_load_lazy_builtins():
+    def lazy_secret():
+        ml = ManifestList(path='tests/examples/simpleWithSecret')
+        ml.load()
+        return ml.manifest(pluginName="secret", manifestName="test.secret2")
+
+    docs = []
+    docs.extend(lazy_secret())
+    assert [d.metadata.name for d in docs] == ["test.secret2"]
+    assert [d.metadata.name for d in list(lazy_secret())] == ["test.secret2"]
+    assert [d.metadata.name for d in sorted(lazy_secret(), key=lambda d: d.metadata.name)] == ["test.secret2"]
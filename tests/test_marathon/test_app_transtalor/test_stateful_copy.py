@@ -1,6 +1,6 @@
 import yaml
 import json
-from dcos_migrate.plugins.marathon import app_translator, stateful_copy
+from dcos_migrate.plugins.marathon import app_translator, copy_engine, stateful_copy
 
 from .common import DummyAppSecretMapping
 
@@ -60,3 +60,8 @@ def test_artifact_output():
 
     app_sleeper_patch = json.loads(artifacts["dcos-sleeper-command-patch.json"])
     assert app_sleeper_patch == {'command': 'sleep 604800', 'checks': [], 'healthChecks': []}
+
+    copy_config = copy_engine.CopyConfig.from_json(artifacts["copy.json"])
+    assert copy_config.app_id == "/stateful-healthy"
+    assert copy_config.k8s_app_id == "stateful-healthy"
+    assert copy_config.mounts == [copy_engine.Mount("test-data", "/var/lib/test-data")]
@@ -0,0 +1,97 @@
+import os
+
+import requests_mock
+from dcos import config
+
+from dcos_migrate.plugins.marathon import MarathonPlugin
+from dcos_migrate.system import DCOSClient, BackupList
+
+APPS_URL = 'mock://test.cluster.mesos/marathon/v2/apps'
+
+
+def app(id, version):
+    return {"id": id, "version": version, "versionInfo": {"lastConfigChangeAt": version}}
+
+
+@requests_mock.Mocker(kw='mock')
+def test_marathon_incremental_backup(tmpdir, capsys, **kwargs):
+    client = DCOSClient(toml_config=config.Toml({"core": {"dcos_url": "mock://test.cluster.mesos"}}))
+    target = BackupList(path=str(tmpdir))
+    plugin = MarathonPlugin()
+    plugin.config = {"marathon": {"incremental": True}}
+
+    kwargs['mock'].get(APPS_URL, json={"apps": [app("/a", "1"), app("/b", "1"), app("/c", "1")]})
+    target.extend(plugin.backup(client=client, backupList=target))
+    target.store()
+    assert "3 new, 0 changed, 0 removed, 0 unchanged" in capsys.readouterr().out
+
+    for f in tmpdir.join("marathon").listdir():
+        os.utime(str(f), (0, 0))
+
+    kwargs['mock'].get(APPS_URL, json={"apps": [app("/a", "1"), app("/b", "2"), app("/d", "1")]})
+    bl = plugin.backup(client=client, backupList=BackupList(path=str(tmpdir)))
+    assert "1 new, 1 changed, 1 removed, 1 unchanged" in capsys.readouterr().out
+
+    assert [b.name for b in bl] == ["a", "b", "d"]
+    assert bl.backup("marathon", "b").data["version"] == "2"
+    files = {f.basename: f.mtime() for f in tmpdir.join("marathon").listdir()}
+    assert sorted(files) == ["a.Backup.json", "b.Backup.json", "d.Backup.json"]
+    # only changed and new apps are written
+    assert files["a.Backup.json"] == 0
+    assert files["b.Backup.json"] != 0
+
+    # storing the merged list again does not touch unchanged files
+    BackupList(path=str(tmpdir)).load().store()
+    assert {f.basename: f.mtime() for f in tmpdir.join("marathon").listdir()}["a.Backup.json"] == 0
+
+
+@requests_mock.Mocker(kw='mock')
+def test_marathon_streaming_backup_is_unloaded(tmpdir, monkeypatch, **kwargs):
+    client = DCOSClient(toml_config=config.Toml({"core": {"dcos_url": "mock://test.cluster.mesos"}}))
+    kwargs['mock'].get(APPS_URL, json={"apps": [app("/a", "1"), app("/b", "1")]})
+    reads = []
+    read_item = BackupList.read_item
+    monkeypatch.setattr(BackupList, "read_item", lambda self, b: reads.append(b.name) or read_item(self, b))
+    target = BackupList(path=str(tmpdir))
+    bl = MarathonPlugin().backup(client=client, backupList=target)
+
+    # returned backups hold neither the parsed app nor its text
+    assert [b.source for b in bl] == [str(tmpdir.join("marathon", n)) for n in ["a.Backup.json", "b.Backup.json"]]
+    assert [b._raw for b in bl] == [None, None]
+
+    # storing the list does not read the apps back
+    target.extend(bl)
+    assert len(target.store(prune=True).skipped) == 2
+    assert reads == []
+
+    assert bl.backup("marathon", "b").data == app("/b", "1")
+    assert reads == ["b"]
+    assert bl.backup("marathon", "b").source is None
+
+
+@requests_mock.Mocker(kw='mock')
+def test_marathon_streaming_backup(tmpdir, **kwargs):
+    client = DCOSClient(toml_config=config.Toml({"core": {"dcos_url": "mock://test.cluster.mesos"}}))
+    plugin = MarathonPlugin()
+    plugin.config = {"marathon": {"embed": ["apps.tasks", "apps.lastTaskFailure"]}}
+
+    apps = [dict(app("/group/app-{}".format(i), "1"), tasks=[{"id": "t{}".format(i)}]) for i in range(5)]
+    kwargs['mock'].get(APPS_URL, json={"apps": apps})
+    bl = plugin.backup(client=client, backupList=BackupList(path=str(tmpdir)))
+
+    assert kwargs['mock'].last_request.url == APPS_URL + "?embed=apps.tasks&embed=apps.lastTaskFailure"
+    # every app is written while the response is read, without storing the returned list
+    assert sorted(f.basename for f in tmpdir.join("marathon").listdir()) == \
+        ["group-app-{}.Backup.json".format(i) for i in range(5)]
+    assert [b.data for b in bl] == apps
+    assert sorted([b.data for b in BackupList(path=str(tmpdir)).load()], key=lambda a: a["id"]) == apps
+
+
+@requests_mock.Mocker(kw='mock')
+def test_marathon_backup_without_list(**kwargs):
+    client = DCOSClient(toml_config=config.Toml({"core": {"dcos_url": "mock://test.cluster.mesos"}}))
+    kwargs['mock'].get(APPS_URL, json={"apps": [app("/a", "1")]})
+    bl = MarathonPlugin().backup(client=client)
+
+    assert kwargs['mock'].last_request.url == APPS_URL
+    assert [b.data for b in bl] == [app("/a", "1")]
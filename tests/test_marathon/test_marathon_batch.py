@@ -0,0 +1,66 @@
+from kubernetes.client import ApiClient
+
+from dcos_migrate.plugins.marathon import app_translator
+from dcos_migrate.plugins.marathon.app_secrets import TrackingAppSecretMapping
+from dcos_migrate.plugins.marathon.batch import (V1DeploymentWithComment, V1ServiceWithComment,
+                                                 V1StatefulSetWithComment, translate_apps)
+from dcos_migrate.plugins.marathon.service_translator import translate_service
+
+RESOURCES = 'tests/test_marathon/test_app_transtalor/resources/'
+SETTINGS = app_translator.Settings(app_translator.ContainerDefaults(image="busybox", working_dir="."),
+                                   app_secret_mapping=TrackingAppSecretMapping("/unused", {}))
+
+
+def apps():
+    result = []
+    for name in ["simple-command-app.json", "nginx-vip-app.json", "container-args-app.json", "stateful-app.json"]:
+        result.extend(app_translator.load(RESOURCES + name))
+    return result
+
+
+def test_translate_apps_matches_single_app():
+    mappings = []
+
+    def secret_mapping(app):
+        mappings.append(TrackingAppSecretMapping(app['id'], app.get('secrets', {})))
+        return mappings[-1]
+
+    results = list(translate_apps(apps(), SETTINGS, secret_mapping))
+    assert [r.app_id for r in results] == [app['id'] for app in apps()]
+    assert len(mappings) == len(results)
+
+    for app, resources in zip(apps(), results):
+        settings = SETTINGS._replace(app_secret_mapping=TrackingAppSecretMapping(app['id'], app.get('secrets', {})))
+        translated = app_translator.translate_app(app, settings)
+        assert resources.translated == translated
+        service, service_warnings = translate_service(translated.deployment['metadata']['labels']['app'], app)
+        assert (resources.service, resources.service_warnings) == (service, service_warnings)
+
+
+def test_translate_apps_is_lazy():
+    consumed = []
+
+    def iterate():
+        for app in apps():
+            consumed.append(app['id'])
+            yield app
+
+    results = translate_apps(iterate(), SETTINGS)
+    assert consumed == []
+    first = next(results)
+    assert consumed == [first.app_id]
+
+
+def test_models_match_api_client():
+    for resources in translate_apps(apps(), SETTINGS):
+        cls = V1StatefulSetWithComment if resources.deployment['kind'] == "StatefulSet" else V1DeploymentWithComment
+        model = resources.deployment_model()
+        assert model == ApiClient()._ApiClient__deserialize(resources.deployment, cls)
+        assert model.get_comment() == resources.translated.warnings
+
+        if resources.service is None:
+            assert resources.service_model() is None
+        else:
+            service = resources.service_model()
+            assert service == ApiClient()._ApiClient__deserialize(resources.service, V1ServiceWithComment)
+            assert service.get_comment() == resources.service_warnings
@@ -0,0 +1,78 @@
+import json
+import logging
+
+from dcos_migrate.plugins.marathon import MarathonPlugin
+from dcos_migrate.plugins.migrate_cache import MigrateCache
+from dcos_migrate.system import Backup, BackupList, ManifestList
+
+
+def apps():
+    with open('tests/examples/simpleWithSecret.json') as f:
+        with_secret = json.load(f)
+    result = [with_secret]
+    for i in range(6):
+        result.append({
+            "id": "/group/app-{}".format(i),
+            "cmd": "sleep 3600",
+            "cpus": 0.1 * (i + 1),
+            "mem": 128,
+            "constraints": [["@hostname", "IS", "10.0.0.{}".format(i % 2)], ["rack", "UNIQUE"]],
+        })
+    result.append({"id": "/framework", "labels": {"DCOS_PACKAGE_FRAMEWORK_NAME": "dcos-foo"}})
+    result.append({"id": "/broken", "secrets": {"s": {"source": "missing"}}, "env": {"S": {"secret": "s"}}})
+    return result
+
+
+def lists():
+    bl = BackupList()
+    for app in apps():
+        bl.append(Backup(pluginName="marathon", backupName=Backup.renderBackupName(app['id']), data=app))
+
+    ml = ManifestList(path='tests/examples/simpleWithSecret')
+    ml.load()
+    return bl, ml
+
+
+def migrate(processes, caplog):
+    plugin = MarathonPlugin()
+    plugin.config = {"marathon": {"processes": processes}}
+    bl, ml = lists()
+    caplog.clear()
+    with caplog.at_level(logging.INFO):
+        result = plugin.migrate(backupList=bl, manifestList=ml)
+    return [(m.name, m.serialize()) for m in result], [(r.levelname, r.getMessage()) for r in caplog.records]
+
+
+def test_parallel_matches_serial(caplog):
+    serial, serial_log = migrate(0, caplog)
+    parallel, parallel_log = migrate(2, caplog)
+
+    assert [name for name, _ in serial] == ["group1.predictionio-server"] + ["group.app-{}".format(i) for i in range(6)]
+    assert parallel == serial
+    assert parallel_log == serial_log
+
+    # secrets of the app are remapped from the migrated DC/OS secrets
+    assert "marathonsecret-group1.predictionio-server" in serial[0][1]
+    messages = "\n".join([m for _, m in serial_log])
+    assert "Cannot migrate" in messages
+    assert "Not translating app /framework" in messages
+    assert "dcos.io/former-dcos-hostname" in messages
+
+
+def test_parallel_through_cache(tmpdir, caplog):
+    plugin = MarathonPlugin()
+    plugin.config = {"marathon": {"processes": 2}}
+    bl, ml = lists()
+
+    cache = MigrateCache(path=str(tmpdir), config=plugin.config)
+    with caplog.at_level(logging.INFO):
+        first = cache.migrate(plugin, backupList=bl, manifestList=ml)
+        caplog.clear()
+        second = MigrateCache(path=str(tmpdir), config=plugin.config).migrate(plugin, backupList=bl, manifestList=ml)
+    # warnings and the node label report of cached apps are logged again
+    cached_log = [(r.levelname, r.getMessage()) for r in caplog.records if not r.getMessage().startswith("migrate cache")]
+
+    serial, serial_log = migrate(0, caplog)
+    assert [(m.name, m.serialize()) for m in first] == serial
+    assert [(m.name, m.serialize()) for m in second] == serial
+    assert cached_log == serial_log
@@ -0,0 +1,249 @@
+import io
+import json
+import os
+import sys
+import textwrap
+from pathlib import Path
+
+import pytest
+
+from dcos_migrate.plugins.marathon import copy_engine
+
+TASKS = ["app.task-c", "app.task-a", "app.task-b"]
+PODS = ["app-2", "app-10", "app-0", "app-1"]
+
+# Stub `dcos`. Task downloads create a file in the target dir. A task listed in $FAIL_ONCE fails
+# on its first download, one listed in $FAIL_ALWAYS on every download. Commands run by `task exec`
+# run here with the sandbox in sandboxes/{task} below the state dir.
+DCOS = '''
+import json, os, sys, time
+state = os.environ["STUB_STATE"]
+def log(args):
+    with open(os.path.join(state, "calls.log"), "a") as f:
+        f.write(json.dumps(args) + "\\n")
+
+args = sys.argv[1:]
+log(["dcos"] + args)
+if args[:3] == ["marathon", "task", "list"]:
+    print("\\n".join(TASKS))
+    sys.exit(0)
+
+if args[:2] == ["task", "exec"]:
+    env = dict(os.environ, MESOS_SANDBOX=os.path.join(state, "sandboxes", args[2]))
+    os.execvpe(args[3], args[3:], env)
+
+assert args[:2] == ["task", "download"], args
+task, path, target = args[2], args[3], args[5]
+marker = os.path.join(state, "failed-" + task + "-" + path)
+if task in os.environ.get("FAIL_ALWAYS", "").split() or (
+        task in os.environ.get("FAIL_ONCE", "").split() and not os.path.exists(marker)):
+    open(marker, "w").close()
+    print("download of " + task + " failed")
+    sys.exit(1)
+
+running = os.path.join(state, "running")
+os.makedirs(running, exist_ok=True)
+open(os.path.join(running, str(os.getpid())), "w").close()
+log(["running", len(os.listdir(running))])
+time.sleep(0.3)
+os.makedirs(os.path.join(target, path))
+with open(os.path.join(target, path, "data"), "w") as f:
+    f.write(task + ":" + path)
+os.remove(os.path.join(running, str(os.getpid())))
+'''
+
+# Stub `kubectl`. Copies go to pods/{pod}/{dest} below the state dir. Absolute paths of commands
+# run by `exec` are moved there, too. The first extraction into a pod listed in $CORRUPT_ONCE
+# changes a file.
+KUBECTL = '''
+import json, os, shutil, subprocess, sys
+state = os.environ["STUB_STATE"]
+args = sys.argv[1:]
+with open(os.path.join(state, "calls.log"), "a") as f:
+    f.write(json.dumps(["kubectl"] + args) + "\\n")
+
+if args[:2] == ["get", "pods"]:
+    print(os.environ.get("STUB_POD_LIST", " ".join(PODS)))
+    sys.exit(0)
+
+if args[0] == "exec":
+    pod = args[2] if args[1] == "-i" else args[1]
+    root = os.path.join(state, "pods", pod)
+    cmd = args[args.index("--") + 1:]
+    cmd[-1] = cmd[-1].replace(" /", " " + root + "/")
+    code = subprocess.call(cmd)
+    marker = os.path.join(state, "corrupted-" + pod)
+    if "-x" in cmd[-1] and pod in os.environ.get("CORRUPT_ONCE", "").split() and not os.path.exists(marker):
+        open(marker, "w").close()
+        for folder, _, files in sorted(os.walk(root)):
+            if files:
+                with open(os.path.join(folder, sorted(files)[0]), "a") as f:
+                    f.write("corrupted")
+                break
+    sys.exit(code)
+
+assert args[0] == "cp", args
+pod, dest = args[2].split(":")
+# like `cp -r`, the source folder is copied into the existing destination folder
+source = args[1].rstrip("/")
+shutil.copytree(source, os.path.join(state, "pods", pod, dest.strip("/"), os.path.basename(source)))
+'''
+
+
+@pytest.fixture
+def app_dir(tmpdir, monkeypatch):
+    bin_dir = tmpdir.mkdir("bin")
+    for name, script in [("dcos", DCOS.replace("TASKS", repr(TASKS))),
+                         ("kubectl", KUBECTL.replace("PODS", repr(PODS)))]:
+        stub = bin_dir.join(name)
+        stub.write("#!{}\n{}".format(sys.executable, textwrap.dedent(script)))
+        stub.chmod(0o755)
+
+    state = tmpdir.mkdir("state")
+    monkeypatch.setenv("PATH", "{}{}{}".format(bin_dir, os.pathsep, os.environ["PATH"]))
+    monkeypatch.setenv("STUB_STATE", str(state))
+    monkeypatch.delenv("STATEFUL_COPY_CONCURRENCY", raising=False)
+
+    app = tmpdir.mkdir("app")
+    config = copy_engine.CopyConfig(app_id="/app",
+                                    k8s_app_id="app",
+                                    mounts=[copy_engine.Mount("data", "/var/lib/data"),
+                                            copy_engine.Mount("logs", "/var/log/app")],
+                                    concurrency=3,
+                                    retries=2)
+    app.join(copy_engine.CONFIG_FILE).write(config.to_json())
+    monkeypatch.chdir(str(app))
+    return app
+
+
+def run(*args):
+    out = io.StringIO()
+    code = copy_engine.main(list(args) + ["--retry-delay", "0"], out=out)
+    return code, out.getvalue()
+
+
+def calls(app_dir, command):
+    lines = app_dir.join("../state/calls.log").read().splitlines()
+    return [c for c in map(json.loads, lines) if c[0] == command]
+
+
+def test_config_roundtrip():
+    config = copy_engine.CopyConfig("/a", "a", [copy_engine.Mount("data", "/data")])
+    assert copy_engine.CopyConfig.from_json(config.to_json()) == config
+
+
+def test_parallel_download_with_retries(app_dir, monkeypatch):
+    monkeypatch.setenv("FAIL_ONCE", "app.task-b")
+    code, out = run("download")
+    assert code == 0, out
+
+    # instances are numbered in the order of the sorted task ids
+    for idx, task in enumerate(sorted(TASKS)):
+        for mount in ["data", "logs"]:
+            assert app_dir.join("target/download/{}/{}/data".format(idx, mount)).read() == task + ":" + mount
+    assert not [p for p in app_dir.join("target/download").visit() if ".partial" in p.basename]
+
+    assert "retrying" in out
+    assert "[6/6]" in out and "Download complete" in out
+    manifest = [json.loads(line) for line in app_dir.join("target/download.manifest").readlines()]
+    assert sorted(m["key"] for m in manifest) == sorted(
+        "{}/{}/{}".format(idx, task, mount) for idx, task in enumerate(sorted(TASKS)) for mount in ["data", "logs"])
+
+    running = [c[1] for c in calls(app_dir, "running")]
+    assert max(running) <= 3
+
+    # finished volumes are not downloaded again
+    downloads = len(calls(app_dir, "dcos"))
+    code, out = run("download")
+    assert code == 0
+    assert "Skipping 6 volumes" in out
+    assert len(calls(app_dir, "dcos")) == downloads + 1
+
+
+def test_failed_volumes_are_reported_and_resumed(app_dir, monkeypatch):
+    monkeypatch.setenv("FAIL_ALWAYS", "app.task-c")
+    code, out = run("download", "--retries", "1")
+    assert code == 1
+    assert " - 2/app.task-c/data" in out and " - 2/app.task-c/logs" in out
+    assert len(app_dir.join("target/download.manifest").readlines()) == 4
+
+    monkeypatch.delenv("FAIL_ALWAYS")
+    code, out = run("download")
+    assert code == 0
+    assert "Skipping 4 volumes" in out and "[2/2]" in out
+
+
+def test_upload_to_pods_by_ordinal(app_dir, monkeypatch):
+    assert run("download")[0] == 0
+    # there are only 3 instances for 4 pods. Nothing is uploaded
+    code, out = run("upload", "--concurrency", "2")
+    assert code == 1, out
+    assert "3 instances of app /app are downloaded but StatefulSet app has 4 pods" in out
+    assert not [c for c in calls(app_dir, "kubectl") if c[1] == "cp"]
+
+    monkeypatch.setenv("STUB_POD_LIST", "app-2 app-0 app-1")
+    code, out = run("upload", "--concurrency", "2")
+    assert code == 0, out
+
+    pods = app_dir.join("../state/pods")
+    for idx, task in enumerate(sorted(TASKS)):
+        assert pods.join("app-{}/var/lib/data/data".format(idx)).read() == task + ":data"
+        assert pods.join("app-{}/var/log/logs/data".format(idx)).read() == task + ":logs"
+    assert len(app_dir.join("target/upload.manifest").readlines()) == 6
+
+
+def test_upload_without_data_is_not_retried(tmpdir):
+    out = io.StringIO()
+    target = Path(str(tmpdir))
+    engine = copy_engine.CopyEngine(copy_engine.Manifest(target / "upload.manifest"), retries=3, retry_delay=0,
+                                    out=out)
+    job = copy_engine.upload_job("kubectl", target, 0, "app-0", copy_engine.Mount("data", "/data"))
+    assert engine.run([job]) == ["app-0/data"]
+    assert "no downloaded data for instance 0" in out.getvalue()
+    assert "retrying" not in out.getvalue()
+
+
+def sandboxes(app_dir):
+    for task in TASKS:
+        sandbox = app_dir.join("../state/sandboxes", task)
+        sandbox.join("data/nested/a file").write(task + ":data", ensure=True)
+        sandbox.join("logs/log").write(task + ":logs", ensure=True)
+
+
+def test_stream_verifies_checksums(app_dir, monkeypatch):
+    sandboxes(app_dir)
+    app_dir.join("../state/pods/app-0/var/lib/data/stale").write("old", ensure=True)
+    monkeypatch.setenv("STUB_POD_LIST", "app-1 app-0 app-2")
+    monkeypatch.setenv("CORRUPT_ONCE", "app-1")
+    code, out = run("stream", "--compress", "gzip")
+    assert code == 0, out
+    assert "checksums of 1 files differ after the copy: data/nested/a file" in out
+    # files the pod had before are kept and do not fail the copy
+    assert "app-0/app.task-a/data: 1 files in the pod are not in the task: data/stale" in out
+    assert "[6/6]" in out and "Stream complete" in out
+
+    # nothing is staged locally
+    assert not app_dir.join("target/download").exists()
+    pods = app_dir.join("../state/pods")
+    for idx, task in enumerate(sorted(TASKS)):
+        assert pods.join("app-{}/var/lib/data/nested/a file".format(idx)).read() == task + ":data"
+        assert pods.join("app-{}/var/log/logs/log".format(idx)).read() == task + ":logs"
+
+    extractions = [c[-1] for c in calls(app_dir, "kubectl") if c[1:3] == ["exec", "-i"]]
+    assert len(extractions) == 7 and all("-xzf" in c for c in extractions)
+    manifest = [json.loads(line)["key"] for line in app_dir.join("target/stream.manifest").readlines()]
+    assert "app-0/app.task-a/data" in manifest and len(manifest) == 6
+
+
+def test_pipe_commands_reports_dest_error():
+    source = [sys.executable, "-c", "import sys\nwhile True: sys.stdout.buffer.write(b'x' * 65536)"]
+    with pytest.raises(copy_engine.CopyError, match="exited with 3: disk full"):
+        copy_engine.pipe_commands(source, ["sh", "-c", "head -c 10 >/dev/null; echo disk full; exit 3"])
+    with pytest.raises(copy_engine.CopyError, match="exited before reading all input"):
+        copy_engine.pipe_commands(source, ["sh", "-c", "head -c 10 >/dev/null"])
+
+
+def test_stream_needs_a_pod_for_every_task(app_dir):
+    code, out = run("stream")
+    assert code == 1
+    assert "app /app has 3 tasks but StatefulSet app has 4 pods" in out
@@ -1,8 +1,11 @@
-from dcos_migrate.plugins.plugin_manager import PluginManager
+from dcos_migrate.plugins.plugin_manager import (DependencyFailed, PluginManager, PluginResult, critical_path,
+                                                 run_dependency_graph, timing_report)
 from dcos_migrate.plugins.plugin import MigratePlugin
 from dcos_migrate.system import ArgParse, Arg
 
 import pytest
+import threading
+import time
 
 
 def test_auto_discovery():
@@ -73,3 +76,77 @@ def test_plugin_argparse(plugin_manager):
 
     assert plugin_manager.plugins['test1'].plugin_config == {"option1": "foo"}
     assert plugin_manager.plugins['test2'].plugin_config == {"option1": "bar"}
+
+
+def test_run_dependency_graph_order_and_isolation(plugin_manager):
+    def func(plugin):
+        if plugin.plugin_name == "test2":
+            raise RuntimeError("boom")
+        return plugin.plugin_name
+
+    seen = []
+    results = run_dependency_graph(plugin_manager.plugins,
+                                   "migrate_depends",
+                                   func,
+                                   parallelism=3,
+                                   on_result=lambda r: seen.append(r.plugin.plugin_name))
+
+    assert seen == ["test1", "test2", "test3"]
+    assert [r.result for r in results] == ["test1", None, None]
+    assert isinstance(results[1].error, RuntimeError)
+    assert results[0].error is None
+    # test3 depends on the failed test2 and is skipped
+    assert isinstance(results[2].error, DependencyFailed)
+    assert "(skipped)" in timing_report(results, "migrate_depends")
+
+
+def test_run_dependency_graph_independent_of_failure(plugin_manager):
+    results = run_dependency_graph(plugin_manager.plugins,
+                                   "backup_depends",
+                                   lambda p: 1 / 0 if p.plugin_name == "test2" else p.plugin_name,
+                                   parallelism=2)
+    # no backup dependencies, so test3 runs although test2 failed
+    assert [r.result for r in results] == ["test1", None, "test3"]
+
+
+def test_run_dependency_graph_no_barrier():
+    class SlowPlugin(MigratePlugin):
+        plugin_name = "slow"
+
+    class FastPlugin(MigratePlugin):
+        plugin_name = "fast"
+
+    class AfterFastPlugin(MigratePlugin):
+        plugin_name = "afterfast"
+        backup_depends = ["fast"]
+
+    plugins = {"slow": SlowPlugin(), "fast": FastPlugin(), "afterfast": AfterFastPlugin()}
+    afterfast_started = threading.Event()
+
+    def func(plugin):
+        if plugin.plugin_name == "slow":
+            # only finishes once the plugin of the next batch started
+            assert afterfast_started.wait(timeout=5)
+        if plugin.plugin_name == "afterfast":
+            afterfast_started.set()
+            time.sleep(0.05)
+
+    results = run_dependency_graph(plugins, "backup_depends", func, parallelism=2)
+    assert all(r.error is None for r in results)
+    assert [r.plugin.plugin_name for r in results] == ["slow", "fast", "afterfast"]
+
+    path = critical_path(results, "backup_depends")
+    assert [r.plugin.plugin_name for r in path] in (["slow"], ["fast", "afterfast"])
+    assert "critical path:" in timing_report(results, "backup_depends")
+
+
+def test_critical_path(plugin_manager):
+    p = plugin_manager.plugins
+    results = [
+        PluginResult(p["test1"], None, None, 1.0),
+        PluginResult(p["test2"], None, None, 5.0),
+        PluginResult(p["test3"], None, None, 1.0),
+    ]
+
+    assert critical_path(results, "migrate_depends") == results
+    assert critical_path(results, "backup_depends") == [results[1]]
@@ -0,0 +1,158 @@
+import logging
+from pathlib import Path
+
+from dcos_migrate.plugins.cluster import ClusterPlugin
+from dcos_migrate.plugins.marathon import MarathonPlugin, stateful_copy
+from dcos_migrate.plugins.migrate_cache import MigrateCache
+from dcos_migrate.plugins.secret import SecretPlugin
+from dcos_migrate.system import Backup, BackupList, Manifest, ManifestList
+
+
+class CountingSecretPlugin(SecretPlugin):
+    def __init__(self):
+        super(CountingSecretPlugin, self).__init__()
+        self.translated = []
+        self.runs = 0
+
+    def migrate(self, backupList, manifestList, **kwargs):
+        self.runs += 1
+        self.translated.extend([b.name for b in backupList.backups(pluginName=self.plugin_name)])
+        return super(CountingSecretPlugin, self).migrate(backupList, manifestList, **kwargs)
+
+
+class WarningSecretPlugin(CountingSecretPlugin):
+    def migrate(self, backupList, manifestList, **kwargs):
+        for b in backupList.backups(pluginName=self.plugin_name):
+            logging.warning("translating {}".format(b.name))
+        return super(WarningSecretPlugin, self).migrate(backupList, manifestList, **kwargs)
+
+
+class IndexingSecretPlugin(CountingSecretPlugin):
+    def migrate(self, backupList, manifestList, **kwargs):
+        self.runs += 1
+        own = backupList.backups(pluginName=self.plugin_name)
+        ml = ManifestList()
+        # creates all manifests before iterating over the backups
+        for m in [Manifest(pluginName=self.plugin_name, manifestName=own[i].name) for i in range(len(own))]:
+            ml.append(m)
+        return ml
+
+
+def secret(key, value):
+    return Backup(pluginName='secret', backupName=key, data={"path": "", "key": key, "value": value, "type": "text"})
+
+
+def run(tmpdir, backups, config={}, plugin=None):
+    bl = BackupList()
+    bl.extend(backups)
+    plugin = CountingSecretPlugin() if plugin is None else plugin
+    cache = MigrateCache(path=str(tmpdir), config=config)
+    ml = cache.migrate(plugin, backupList=bl, manifestList=ManifestList())
+    return plugin.translated, ml
+
+
+def test_migrate_cache_reuses_unchanged_backups(tmpdir):
+    translated, ml = run(tmpdir, [secret("a", "QQ=="), secret("b", "Qg==")])
+    assert translated == ["a", "b"]
+    rendered = [m.serialize() for m in ml]
+
+    translated, ml = run(tmpdir, [secret("a", "QQ=="), secret("b", "Qg==")])
+    assert translated == []
+    assert [m.serialize() for m in ml] == rendered
+    assert ml[0][0].data == {"a": "QQ=="}
+
+    plugin = CountingSecretPlugin()
+    translated, ml = run(tmpdir, [secret("a", "QQ=="), secret("b", "Qw=="), secret("c", "RA==")], plugin=plugin)
+    assert translated == ["b", "c"]
+    assert plugin.runs == 1
+    assert [m.name for m in ml] == ["a", "b", "c"]
+    assert [m[0].data for m in ml] == [{"a": "QQ=="}, {"b": "Qw=="}, {"c": "RA=="}]
+
+
+def test_migrate_cache_replays_log(tmpdir, caplog):
+    def warnings(backups):
+        caplog.clear()
+        run(tmpdir, backups, plugin=WarningSecretPlugin())
+        return [r.getMessage() for r in caplog.records if r.levelno == logging.WARNING]
+
+    assert warnings([secret("a", "QQ=="), secret("b", "Qg==")]) == ["translating a", "translating b"]
+    # a is taken from the cache, b translated again
+    assert warnings([secret("a", "QQ=="), secret("b", "Qw==")]) == ["translating b", "translating a"]
+    assert warnings([secret("a", "QQ=="), secret("b", "Qw==")]) == ["translating a", "translating b"]
+
+
+def test_migrate_backups_untracked(tmpdir):
+    plugin = IndexingSecretPlugin()
+    translations = plugin.migrate_backups([secret("a", "QQ=="), secret("b", "Qg==")], BackupList(), ManifestList())
+    # manifests cannot be told apart by iteration. Every backup is translated on its own
+    assert [[m.name for m in t.manifests] for t in translations] == [["a"], ["b"]]
+    assert plugin.runs == 3
+
+
+def test_migrate_cache_invalidation(tmpdir):
+    run(tmpdir, [secret("a", "QQ==")])
+
+    # plugin config is part of the key, runtime options are not
+    assert run(tmpdir, [secret("a", "QQ==")], {"global": {"verbose": 3}})[0] == []
+    assert run(tmpdir, [secret("a", "QQ==")], {"secret": {"concurrency": 2}})[0] == ["a"]
+
+    # a changed dependency invalidates its dependents
+    cluster = Backup(pluginName='cluster',
+                     backupName='default',
+                     data={
+                         "CLUSTER_ID": "id",
+                         "CLUSTER": "name",
+                         "BACKUP_DATE": "2021-01-01",
+                         "MESOS_MASTER_STATE-SUMMARY": {}
+                     })
+    bl = BackupList()
+    bl.extend([cluster, secret("a", "QQ==")])
+    cache = MigrateCache(path=str(tmpdir))
+    ml = cache.migrate(ClusterPlugin(), backupList=bl, manifestList=ManifestList())
+    plugin = CountingSecretPlugin()
+    cache.migrate(plugin, backupList=bl, manifestList=ml)
+    assert plugin.translated == ["a"]
+
+
+def test_migrate_cache_recreates_stateful_copy(tmpdir, monkeypatch):
+    state = tmpdir.join("stateful-copy")
+    monkeypatch.setattr(stateful_copy, "STATE_PATH", Path(str(state)))
+    app = {
+        "id": "/db",
+        "cmd": "sleep 3600",
+        "version": "2021-01-01Z00:00:00",
+        "container": {
+            "volumes": [{
+                "containerPath": "/var/lib/data",
+                "hostPath": "data",
+                "mode": "RW"
+            }, {
+                "containerPath": "data",
+                "mode": "RW",
+                "persistent": {
+                    "type": "root",
+                    "size": 128
+                }
+            }]
+        }
+    }
+
+    def migrate():
+        bl = BackupList()
+        bl.append(Backup(pluginName="marathon", backupName="db", data=app))
+        cache = MigrateCache(path=str(tmpdir.join("cache")))
+        return [m.serialize() for m in cache.migrate(MarathonPlugin(), backupList=bl, manifestList=ManifestList())]
+
+    manifests = migrate()
+    assert state.join("db", "copy.json").check()
+    assert state.join("bin", "stateful-copy").check()
+
+    # a cache hit needs the files written for the stateful app
+    state.remove()
+    assert migrate() == manifests
+    assert state.join("db", "copy.json").check()
+    assert state.join("bin", "stateful-copy").check()
+
+    state.join("db", "copy.json").write("{}")
+    migrate()
+    assert state.join("db", "copy.json").read() != "{}"
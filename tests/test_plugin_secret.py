@@ -1,10 +1,14 @@
+import asyncio
+import threading
 import pytest
 import requests_mock
 import base64
 import json
 from dcos import config
-from dcos_migrate.system import DCOSClient, ManifestList, BackupList, Backup
+from dcos_migrate.system import AsyncDCOSClient, DCOSClient, ManifestList, BackupList, Backup
 from dcos_migrate.plugins.secret import SecretPlugin
+from dcos_migrate.plugins.secret.plugin import AsyncDCOSSecretsService, DCOSSecretsService
+from dcos.errors import DCOSHTTPException
 
 adapter = requests_mock.Adapter()
 
@@ -59,3 +63,148 @@ def test_secret_migrate():
 
         assert len(ml) == 1
         assert ml[0][0].data['foo.bar'] == 'Rk9PQkFS'
+
+
+def test_secret_migrate_same_key_in_folders():
+    bl = BackupList()
+    for path in ["foo", "bar"]:
+        data = {"value": "Rk9PQkFS", "type": "text", "path": path, "key": "two"}
+        bl.append(Backup(pluginName='secret', backupName=path + '-two', data=data))
+
+    ml = SecretPlugin().migrate(backupList=bl, manifestList=ManifestList())
+
+    assert [m[0].metadata.name for m in ml] == ["foo.two", "bar.two"]
+    assert [m[0].data for m in ml] == [{"two": "Rk9PQkFS"}, {"two": "Rk9PQkFS"}]
+
+
+def run_async(client, func):
+    async def run():
+        async with AsyncDCOSClient(client, concurrency=4) as c:
+            return await func(AsyncDCOSSecretsService(c))
+
+    return asyncio.run(run())
+
+
+@requests_mock.Mocker(kw='mock')
+def test_secret_get_async_ordered_with_retry(conf, **kwargs):
+    keys = ["secret{}".format(i) for i in range(20)]
+    for k in keys:
+        kwargs['mock'].register_uri('GET',
+                                    'mock://test.cluster.mesos/secrets/v1/secret/default/' + k,
+                                    [{
+                                        'status_code': 503
+                                    }, {
+                                        'status_code': 429,
+                                        'headers': {
+                                            'Retry-After': '0'
+                                        }
+                                    }, {
+                                        'json': {
+                                            "value": k
+                                        },
+                                        'headers': {
+                                            'content-type': 'application/json'
+                                        }
+                                    }])
+
+    secrets = run_async(DCOSClient(toml_config=conf, backoff=0),
+                        lambda sec: asyncio.gather(*[sec.get_async("", k) for k in keys]))
+
+    assert [s['key'] for s in secrets] == keys
+    assert [base64.b64decode(s['value']).decode('utf-8') for s in secrets] == keys
+    assert kwargs['mock'].call_count == 3 * len(keys)
+
+
+@requests_mock.Mocker(kw='mock')
+def test_secret_get_gives_up(conf, **kwargs):
+    kwargs['mock'].register_uri('GET', 'mock://test.cluster.mesos/secrets/v1/secret/default/foo', status_code=500)
+
+    sec = DCOSSecretsService(DCOSClient(toml_config=conf, retries=2, backoff=0))
+    with pytest.raises(DCOSHTTPException):
+        sec.get("", "foo")
+
+    assert kwargs['mock'].call_count == 3
+
+
+def register_tree(mock):
+    def secret(path):
+        mock.register_uri('GET',
+                          'mock://test.cluster.mesos/secrets/v1/secret/default/' + path,
+                          json={"value": path},
+                          headers={'content-type': 'application/json'})
+
+    mock.register_uri('GET',
+                      'mock://test.cluster.mesos/secrets/v1/secret/default/?list=true',
+                      json={"array": ["top", "foo/", "bar/"]})
+    mock.register_uri('GET',
+                      'mock://test.cluster.mesos/secrets/v1/secret/default/foo/?list=true',
+                      json={"array": ["one", "deeper/"]})
+    mock.register_uri('GET', 'mock://test.cluster.mesos/secrets/v1/secret/default/bar/?list=true', json={"array": []})
+    mock.register_uri('GET',
+                      'mock://test.cluster.mesos/secrets/v1/secret/default/foo/deeper/?list=true',
+                      json={"array": ["two"]})
+    for path in ["top", "foo/one", "foo/deeper/two"]:
+        secret(path)
+
+
+@requests_mock.Mocker(kw='mock')
+def test_secret_walk(conf, **kwargs):
+    register_tree(kwargs['mock'])
+
+    secrets = run_async(DCOSClient(toml_config=conf), lambda sec: sec.walk_async())
+    assert secrets == [("", "top"), ("foo", "one"), ("foo/deeper", "two")]
+
+
+@requests_mock.Mocker(kw='mock')
+def test_secret_backup_streaming_resume(conf, tmpdir, **kwargs):
+    register_tree(kwargs['mock'])
+    client = DCOSClient(toml_config=conf)
+    target = BackupList(path=str(tmpdir))
+
+    backup = SecretPlugin().backup(client, backupList=target)
+
+    assert [b.name for b in backup] == ["top", "foo-one", "foo-deeper-two"]
+    assert [b.data['key'] for b in backup] == ["top", "one", "two"]
+    # written while fetching, not by the caller
+    assert tmpdir.join("secret", "foo-deeper-two.Backup.json").check()
+    assert len(target) == 0
+
+    tmpdir.join("secret", "top.Backup.json").remove()
+    kwargs['mock'].reset_mock()
+
+    s = SecretPlugin()
+    s.config = {"secret": {"resume": True}}
+    resumed = s.backup(client, backupList=target)
+
+    assert sorted(b.name for b in resumed) == sorted(b.name for b in backup)
+    fetched = [r.path for r in kwargs['mock'].request_history if "list=true" not in r.url]
+    assert fetched == ["/secrets/v1/secret/default/top"]
+
+
+@requests_mock.Mocker(kw='mock')
+def test_secret_backup_bounded(conf, tmpdir, monkeypatch, **kwargs):
+    register_tree(kwargs['mock'])
+    in_flight = []
+    running = []
+    store_threads = []
+
+    async def get_async(self, path, key):
+        running.append(key)
+        in_flight.append(len(running))
+        await asyncio.sleep(0.01)
+        running.remove(key)
+        return {"path": path, "key": key, "type": "text", "value": ""}
+
+    store_item = BackupList.store_item
+    monkeypatch.setattr(AsyncDCOSSecretsService, "get_async", get_async)
+    monkeypatch.setattr(BackupList, "store_item",
+                        lambda self, b: store_threads.append(threading.current_thread().name) or store_item(self, b))
+
+    s = SecretPlugin()
+    s.config = {"secret": {"concurrency": 2}}
+    backup = s.backup(DCOSClient(toml_config=conf), backupList=BackupList(path=str(tmpdir)))
+
+    assert [b.name for b in backup] == ["top", "foo-one", "foo-deeper-two"]
+    assert max(in_flight) == 2
+    # files are written by the worker threads of the client, not in the event loop
+    assert len(store_threads) == 3 and all(t.startswith("async-dcos-client") for t in store_threads)
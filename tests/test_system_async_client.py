@@ -0,0 +1,136 @@
+import asyncio
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+from dcos import config
+from dcos.errors import DCOSHTTPException
+
+from dcos_migrate.plugins.plugin import MigratePlugin, backup_sync
+from dcos_migrate.system import AsyncDCOSClient, BackupList, Backup, DCOSClient
+
+
+class StandIn(BaseHTTPRequestHandler):
+    """minimal DC/OS API answering every GET with its path and the auth header"""
+    lock = threading.Lock()
+    in_flight = 0
+    max_in_flight = 0
+
+    def do_GET(self):
+        cls = type(self)
+        with cls.lock:
+            cls.in_flight += 1
+            cls.max_in_flight = max(cls.max_in_flight, cls.in_flight)
+        time.sleep(0.01)
+        with cls.lock:
+            cls.in_flight -= 1
+
+        if self.path == '/missing':
+            self.send_response(404)
+            self.end_headers()
+            return
+        self.send_json({"path": self.path, "auth": self.headers.get('Authorization')})
+
+    def do_DELETE(self):
+        length = int(self.headers.get('Content-Length', 0))
+        self.send_json({"path": self.path, "body": self.rfile.read(length).decode('utf-8')})
+
+    def send_json(self, data):
+        body = json.dumps(data).encode('utf-8')
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def server():
+    StandIn.max_in_flight = 0
+    httpd = ThreadingHTTPServer(('127.0.0.1', 0), StandIn)
+    thread = threading.Thread(target=httpd.serve_forever, daemon=True)
+    thread.start()
+    yield httpd
+    httpd.shutdown()
+    httpd.server_close()
+
+
+@pytest.fixture
+def client(server):
+    return DCOSClient(toml_config=config.Toml({
+        "core": {
+            "dcos_url": "http://127.0.0.1:{}".format(server.server_address[1]),
+            "ssl_verify": "false",
+            "dcos_acs_token": "im-a-fake-token"
+        }
+    }))
+
+
+def test_async_client_get(client):
+    async def run():
+        async with AsyncDCOSClient(client, concurrency=4) as c:
+            return await asyncio.gather(*[c.get(c.full_dcos_url("item/{}".format(i))) for i in range(40)])
+
+    responses = asyncio.run(run())
+
+    assert [r.json()["path"] for r in responses] == ["/item/{}".format(i) for i in range(40)]
+    assert responses[0].json()["auth"] == "token=im-a-fake-token"
+    assert 1 < StandIn.max_in_flight <= 4
+
+
+def test_async_client_errors(client):
+    async def run():
+        async with AsyncDCOSClient(client) as c:
+            await c.get(c.full_dcos_url("missing"))
+
+    with pytest.raises(DCOSHTTPException) as e:
+        asyncio.run(run())
+    assert e.value.status() == 404
+
+
+def test_async_client_delete_sends_data(client):
+    async def run():
+        async with AsyncDCOSClient(client) as c:
+            return await c.delete(c.full_dcos_url("item/1"), data="force=true")
+
+    assert asyncio.run(run()).json() == {"path": "/item/1", "body": "force=true"}
+
+
+class SyncPlugin(MigratePlugin):
+    plugin_name = "sync"
+
+    def backup(self, client, backupList, **kwargs):
+        bl = BackupList()
+        bl.append(Backup(self.plugin_name, "item", data=client.get(client.full_dcos_url("sync")).json()))
+        return bl
+
+
+class AsyncPlugin(MigratePlugin):
+    plugin_name = "async"
+
+    def backup(self, client, backupList, **kwargs):
+        return backup_sync(self, client, backupList, concurrency=8)
+
+    async def backup_async(self, client, backupList, **kwargs):
+        responses = await asyncio.gather(*[client.get(client.full_dcos_url("async/{}".format(i))) for i in range(5)])
+        bl = BackupList()
+        for i, r in enumerate(responses):
+            bl.append(Backup(self.plugin_name, str(i), data=r.json()))
+        return bl
+
+
+def test_plugin_adapters(client):
+    bl = AsyncPlugin().backup(client=client, backupList=BackupList())
+    assert [b.data["path"] for b in bl] == ["/async/{}".format(i) for i in range(5)]
+
+    async def run():
+        async with AsyncDCOSClient(client) as c:
+            return await SyncPlugin().backup_async(client=c, backupList=BackupList())
+
+    bl = asyncio.run(run())
+    assert bl[0].data["path"] == "/sync"
@@ -0,0 +1,127 @@
+import threading
+
+from dcos_migrate.system import Backup, BackupList
+
+
+def create_list():
+    bl = BackupList()
+    bl.append(Backup(pluginName="marathon", backupName="a"))
+    bl.extend([Backup(pluginName="secret", backupName="s"), Backup(pluginName="marathon", backupName="b")])
+    return bl
+
+
+def test_backup_list_index():
+    bl = create_list()
+    view = bl.backups("marathon")
+
+    assert [b.name for b in view] == ["a", "b"]
+    assert bl.backup("marathon", "b") is view[1]
+    assert bl.backup("secret", "a") is None
+    assert view.backup("a") is bl[0]
+
+    # views follow the list
+    bl += [Backup(pluginName="marathon", backupName="c")]
+    assert [b.name for b in view] == ["a", "b", "c"]
+
+    bl.sort(key=lambda b: b.name, reverse=True)
+    assert [b.name for b in view] == ["c", "b", "a"]
+
+    del bl[0]
+    assert bl.backup("secret", "s") is None
+    bl.remove(bl.backup("marathon", "a"))
+    bl.pop(0)
+    assert [b.name for b in view] == ["b"]
+    assert bl.backup("marathon", "c") is None
+    assert len(bl.backups("unknown")) == 0
+
+
+def test_backup_list_index_duplicates():
+    bl = create_list()
+    first = bl.backup("marathon", "a")
+    bl.append(Backup(pluginName="marathon", backupName="a"))
+
+    assert len(bl.backups("marathon")) == 3
+    assert bl.backup("marathon", "a") is first
+
+
+def test_backup_list_index_load(tmpdir):
+    bl = create_list()
+    bl._path = str(tmpdir)
+    bl.store()
+
+    loaded = BackupList(path=str(tmpdir)).load()
+    assert sorted([b.name for b in loaded.backups("marathon")]) == ["a", "b"]
+    assert loaded.backup("secret", "s") is not None
+
+
+def create_apps():
+    bl = BackupList()
+    bl.append(Backup(pluginName="marathon", backupName="jenkins", data={"labels": {"DCOS_PACKAGE_NAME": "jenkins"}}))
+    bl.append(Backup(pluginName="marathon", backupName="web", data={"container": {"docker": {"image": "nginx"}}}))
+    bl.append(Backup(pluginName="secret", backupName="s", data={"labels": {"DCOS_PACKAGE_NAME": "jenkins"}}))
+    return bl
+
+
+def test_backup_list_match_jsonpath(monkeypatch):
+    bl = create_apps()
+    scans = []
+    matches = BackupList._matches
+    monkeypatch.setattr(BackupList, "_matches", staticmethod(lambda p, b: scans.append(b) or matches(p, b)))
+
+    query = "[*].labels.DCOS_PACKAGE_NAME"
+    assert [b.name for b in bl.match_jsonpath(query)] == ["jenkins", "s"]
+    assert len(scans) == 3
+    assert [b.name for b in bl.match_jsonpath(query)] == ["jenkins", "s"]
+    assert len(scans) == 3
+
+    # appended backups are matched on their own by the next query
+    bl.append(Backup(pluginName="marathon", backupName="other", data={"labels": {"DCOS_PACKAGE_NAME": "kafka"}}))
+    assert len(scans) == 3
+    assert [b.name for b in bl.match_jsonpath(query)] == ["jenkins", "s", "other"]
+    assert len(scans) == 4
+
+    bl.remove(bl.backup("secret", "s"))
+    assert [b.name for b in bl.match_jsonpath(query)] == ["jenkins", "other"]
+
+
+def test_backup_list_match_field():
+    bl = create_apps()
+
+    assert [b.name for b in bl.match_field("labels.DCOS_PACKAGE_NAME", "jenkins")] == ["jenkins", "s"]
+    assert [b.name for b in bl.match_field("labels.DCOS_PACKAGE_NAME", "jenkins", pluginName="secret")] == ["s"]
+    assert [b.name for b in bl.match_field(["container", "docker", "image"], "nginx")] == ["web"]
+    assert len(bl.match_field("container.docker.image", "alpine")) == 0
+    assert [b.name for b in bl.match_field("container.docker", {"image": "nginx"})] == ["web"]
+
+    index = bl.index_field("labels.DCOS_PACKAGE_NAME")
+    bl.append(Backup(pluginName="marathon", backupName="j2", data={"labels": {"DCOS_PACKAGE_NAME": "jenkins"}}))
+    assert bl.index_field("labels.DCOS_PACKAGE_NAME") is index
+    assert [b.name for b in bl.match_field("labels.DCOS_PACKAGE_NAME", "jenkins")] == ["jenkins", "s", "j2"]
+
+    bl.sort(key=lambda b: b.name)
+    assert bl.index_field("labels.DCOS_PACKAGE_NAME") is not index
+    assert [b.name for b in bl.match_field("labels.DCOS_PACKAGE_NAME", "jenkins")] == ["j2", "jenkins", "s"]
+
+
+def test_backup_list_concurrent_queries():
+    bl = create_apps()
+    errors = []
+
+    def query(i):
+        try:
+            for j in range(20):
+                bl.match_jsonpath("[*].labels.k{}".format(i * 20 + j))
+        except Exception as e:
+            errors.append(e)
+
+    threads = [threading.Thread(target=query, args=(i, )) for i in range(4)]
+    for t in threads:
+        t.start()
+    # results of plugins are added while other plugins query the list
+    for i in range(500):
+        bl.append(Backup(pluginName="marathon", backupName=str(i), data={"labels": {"k{}".format(i % 80): "v"}}))
+    for t in threads:
+        t.join()
+
+    assert not errors
+    assert [b.name for b in bl.match_jsonpath("[*].labels.k3")] == [str(i) for i in range(3, 500, 80)]
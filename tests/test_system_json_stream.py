@@ -0,0 +1,52 @@
+import json
+
+import pytest
+
+from dcos_migrate.system.json_stream import iter_array
+
+
+def chunked(data, size):
+    encoded = data.encode('utf-8')
+    return [encoded[i:i + size] for i in range(0, len(encoded), size)]
+
+
+DOCUMENT = {
+    "before": {
+        "apps": [1, 2],
+        "s": "]}"
+    },
+    "apps": [{
+        "id": "/ä/ü",
+        "cpus": 0.25,
+        "instances": 12345,
+        "cmd": "echo \"[\" \\\\ }"
+    }, [], "x", 1e3, None, True, {
+        "nested": {
+            "apps": []
+        }
+    }],
+    "after": 1234567
+}
+
+
+@pytest.mark.parametrize("size", [1, 2, 3, 7, 64, 4096])
+def test_iter_array_chunk_boundaries(size):
+    data = json.dumps(DOCUMENT, ensure_ascii=False, indent=1)
+    assert list(iter_array(chunked(data, size), "apps")) == DOCUMENT["apps"]
+
+
+def test_iter_array_trailing_number():
+    # a number ending at a chunk boundary continues in the next chunk
+    assert list(iter_array([b'{"apps": [12', b'34, 5', b'6]}'], "apps")) == [1234, 56]
+
+
+def test_iter_array_empty():
+    assert list(iter_array([b'{}'], "apps")) == []
+    assert list(iter_array([b' { "apps" : [ ] } '], "apps")) == []
+    assert list(iter_array([b'{"other": 1}'], "apps")) == []
+
+
+@pytest.mark.parametrize("data", [b'', b'[]', b'{"apps": [1, 2', b'{"apps": [1 2]}', b'{"apps": {}}', b'{"apps": [1], }'])
+def test_iter_array_malformed(data):
+    with pytest.raises(ValueError):
+        list(iter_array(chunked(data.decode('utf-8'), 3), "apps"))
@@ -0,0 +1,51 @@
+import pytest
+from jsonpath_ng.ext import parse
+
+from dcos_migrate.system import Migrator
+from dcos_migrate.system.migrator import DottedPath, JSONPath, compile_key
+
+DATA = {
+    "id": "job",
+    "labels": {
+        "a": "1",
+        "b": None
+    },
+    "run": {
+        "cpus": 0.5,
+        "env": None,
+        "args": ["a", "b"],
+        "docker": ["not", "a", "dict"],
+        "restart": {
+            "activeDeadlineSeconds": 30
+        },
+    },
+    "schedules": [{
+        "id": "s1"
+    }],
+}
+
+
+@pytest.mark.parametrize('key', [
+    "id", "run.cpus", "run.env", "run.args", "run.docker.image", "run.restart.activeDeadlineSeconds", "missing",
+    "run.missing.deeper", "labels.*", "schedules[0]", "dependencies|run.cpus"
+])
+def test_compile_key_matches_jsonpath(key):
+    expected = [(str(m.path), m.value, str(m.full_path)) for m in parse(key).find(DATA)]
+    assert compile_key(key).find(DATA) == expected
+
+
+def test_compile_key_fast_path():
+    assert isinstance(compile_key("run.restart.activeDeadlineSeconds"), DottedPath)
+    assert isinstance(compile_key("labels.*"), JSONPath)
+    assert compile_key("run.cpus") is compile_key("run.cpus")
+
+
+def test_migrate_calls_translate():
+    calls = []
+    m = Migrator(object=DATA)
+    m.translate = {
+        "run.cpus": lambda *args: calls.append(args),
+        "labels.*": lambda *args: calls.append(args),
+    }
+    m.migrate()
+    assert calls == [("cpus", 0.5, "run.cpus"), ("a", "1", "labels.a"), ("b", None, "labels.b")]
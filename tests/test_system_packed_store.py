@@ -0,0 +1,97 @@
+import os
+
+from dcos_migrate.cmd import convert_storage
+from dcos_migrate.system import Backup, BackupList, Manifest, ManifestList, StorableList
+from kubernetes.client.models import V1ConfigMap, V1ObjectMeta
+
+
+def example_list(path: str) -> StorableList:
+    sl = StorableList(path)
+    sl.append(Backup(pluginName="marathon", backupName="app1", data={"id": "/app1", "version": "1"}))
+    sl.append(Backup(pluginName="secret", backupName="s1", data={"value": "foo"}))
+    sl.append(
+        Manifest(pluginName="marathon",
+                 manifestName="app1",
+                 data=[
+                     V1ConfigMap(api_version="v1",
+                                 kind="ConfigMap",
+                                 metadata=V1ObjectMeta(name="app1"),
+                                 data={"foo": "bar"})
+                 ]))
+    return sl
+
+
+def files(root: str):
+    res = {}
+    for dirpath, _, filenames in os.walk(root):
+        for f in filenames:
+            with open(os.path.join(dirpath, f), 'rt') as file:
+                res[os.path.relpath(os.path.join(dirpath, f), root)] = file.read()
+    return res
+
+
+def test_packed_round_trip(tmpdir):
+    src = str(tmpdir.join("src"))
+    example_list(src).store()
+
+    packed = str(tmpdir.join("packed.sqlite"))
+    assert len(convert_storage(src, packed).written) == 3
+    assert os.path.isfile(packed)
+
+    dst = str(tmpdir.join("dst"))
+    assert len(convert_storage(packed, dst).written) == 3
+    assert files(dst) == files(src)
+
+    loaded = StorableList(packed).load()
+    # packed files keep the order items were stored in
+    assert [(b.plugin_name, b.name) for b in loaded] == [(b.plugin_name, b.name) for b in StorableList(src).load()]
+    backups = [b for b in loaded if isinstance(b, Backup)]
+    assert [b.data for b in backups if b.plugin_name == "marathon"] == [{"id": "/app1", "version": "1"}]
+    assert [m for m in loaded if isinstance(m, Manifest)][0][0].metadata.name == "app1"
+
+
+def test_packed_store_summary(tmpdir):
+    path = str(tmpdir.join("backup.sqlite"))
+    bl = BackupList(path=path)
+    bl.append(Backup(pluginName="secret", backupName="s1", data={"value": "foo"}))
+    bl.append(Backup(pluginName="secret", backupName="s2", data={"value": "bar"}))
+    assert len(bl.store().written) == 2
+
+    bl.backup("secret", "s1").data["value"] = "changed"
+    bl.pop()
+    summary = bl.store(prune=True)
+    assert len(summary.written) == 1
+    assert summary.removed == [os.path.join(path, "secret", "s2.Backup.*")]
+
+    loaded = BackupList(path=path).load()
+    assert [b.name for b in loaded] == ["s1"]
+    assert loaded[0].data == {"value": "changed"}
+
+    # untouched items of other plugins are never pruned
+    other = BackupList(path=path)
+    other.append(Backup(pluginName="marathon", backupName="app1", data={}))
+    other.store(prune=True)
+    assert sorted([b.name for b in BackupList(path=path).load()]) == ["app1", "s1"]
+
+
+def test_packed_single_items(tmpdir):
+    path = str(tmpdir.join("migrate.sqlite"))
+    ml = ManifestList(path=path)
+    m = Manifest(pluginName="secret", manifestName="s1", data=[V1ConfigMap(metadata=V1ObjectMeta(name="s1"))])
+
+    ml.store_item(m)
+
+    loaded = Manifest(pluginName="secret", manifestName="s1")
+    assert ml.load_item(loaded)
+    assert loaded.serialize() == m.serialize()
+    assert not ml.load_item(Manifest(pluginName="secret", manifestName="missing"))
+
+    assert ml.remove_item(m)
+    assert not ml.remove_item(m)
+    assert len(ManifestList(path=path).load()) == 0
+
+
+def test_packed_load_missing(tmpdir):
+    path = str(tmpdir.join("missing.sqlite"))
+    assert len(BackupList(path=path).load()) == 0
+    assert not os.path.exists(path)
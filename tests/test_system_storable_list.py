@@ -33,3 +33,63 @@ def test_load(tmpdir):
     assert len(list) == len(list2)
     # and data
     assert list[0].data == list2[0].data
+
+
+def test_load_lazy(tmpdir):
+    dir = tmpdir.mkdir("test")
+    list, p, b, d = create_example_list(str(dir))
+    stored = dir.join(p, "{}.Backup.json".format(b)).read()
+
+    list2 = StorableList(str(dir)).load(workers=4)
+    # not parsed before it is used, stored data is written back as is
+    assert list2[0]._raw == stored
+    assert list2[0].serialize() == stored
+    assert list2[0].data == d
+    assert list2[0]._raw is None
+
+    list3 = StorableList(str(dir)).load(lazy=False)
+    assert list3[0]._raw is None
+    assert list3[0].data == d
+
+
+def test_store_summary(tmpdir):
+    dir = tmpdir.mkdir("test")
+    list, p, b, d = create_example_list(str(dir))
+    path = dir.join(p, "{}.Backup.json".format(b))
+    stale = dir.join(p, "gone.Backup.json")
+    stale.write("{}")
+
+    list.append(Backup(pluginName=p, backupName="other", data={"a": 1}))
+    summary = list.store(prune=True, workers=2)
+    assert summary.written == [str(dir.join(p, "other.Backup.json"))]
+    assert summary.skipped == [str(path)]
+    assert summary.removed == [str(stale)]
+    assert not stale.check()
+    assert str(summary) == "1 written, 1 unchanged, 1 removed"
+
+    list[0].data["foo"] = "changed"
+    assert list.store().written == [str(path)]
+    assert path.read() == list[0].serialize()
+    # no temp files left behind
+    assert sorted(f.basename for f in dir.join(p).listdir()) == ["foobar.Backup.json", "other.Backup.json"]
+
+
+def test_store_skips_stored_items(tmpdir, monkeypatch):
+    dir = tmpdir.mkdir("test")
+    streamed = StorableList(str(dir))
+    b = Backup(pluginName="testPlugin", backupName="foobar", data={"foo": "bar"})
+    path, data = streamed.store_item(b)
+    b.deserialize(data, lazy=True)
+
+    checks = []
+    is_stored = StorableList._is_stored
+    monkeypatch.setattr(StorableList, "_is_stored", staticmethod(lambda f, e, d: checks.append(f) or is_stored(f, e, d)))
+
+    # items written during streaming are not read back
+    list = StorableList(str(dir))
+    list.append(b)
+    assert list.store(prune=True).skipped == [path]
+    assert checks == []
+
+    b.data["foo"] = "changed"
+    assert list.store().written == [path]
@@ -0,0 +1,82 @@
+import json
+
+import pytest
+import requests
+import requests_mock
+
+from dcos_migrate.system.transport import Transport, endpoint_name
+
+
+def test_endpoint_name():
+    assert endpoint_name("get", "https://dcos/secrets/v1/secret/default/foo?list=true") == 'GET /secrets/v1/secret'
+    assert endpoint_name("post", "https://dcos/marathon/v2/apps") == 'POST /marathon/v2/apps'
+
+
+@requests_mock.Mocker(kw='mock')
+def test_transport_retries_idempotent(**kwargs):
+    kwargs['mock'].get('mock://cluster/service/v1/items/a', [
+        {'status_code': 503},
+        {'status_code': 429, 'headers': {'Retry-After': '0'}},
+        {'text': 'ok', 'headers': {'Content-Length': '2'}},
+    ])
+    t = Transport(retries=3, backoff=0)
+
+    resp = t.send("get", 'mock://cluster/service/v1/items/a')
+    assert resp.status_code == 200
+    assert kwargs['mock'].call_count == 3
+
+    stats = t.metrics.as_dict()['GET /service/v1/items']
+    assert stats['requests'] == 3
+    assert stats['retries'] == 2
+    assert stats['bytes'] == 2
+    assert stats['status_codes'] == {'200': 1, '429': 1, '503': 1}
+
+
+@requests_mock.Mocker(kw='mock')
+def test_transport_does_not_retry_post(**kwargs):
+    kwargs['mock'].post('mock://cluster/service/v1/items', status_code=503)
+    t = Transport(retries=3, backoff=0)
+
+    assert t.send("post", 'mock://cluster/service/v1/items').status_code == 503
+    assert kwargs['mock'].call_count == 1
+    assert t.metrics.as_dict()['POST /service/v1/items']['retries'] == 0
+
+
+@requests_mock.Mocker(kw='mock')
+def test_transport_connection_errors(tmpdir, **kwargs):
+    kwargs['mock'].get('mock://cluster/down', exc=requests.exceptions.ConnectTimeout)
+    t = Transport(retries=2, backoff=0)
+
+    with pytest.raises(requests.exceptions.ConnectTimeout):
+        t.send("get", 'mock://cluster/down')
+    assert kwargs['mock'].call_count == 3
+
+    path = str(tmpdir.join("metrics.json"))
+    t.metrics.dump(path)
+    with open(path) as f:
+        stats = json.load(f)
+    assert stats['GET /down']['errors'] == {'ConnectTimeout': 3}
+    assert 'GET /down' in t.metrics.report()
+
+
+@requests_mock.Mocker(kw='mock')
+def test_transport_does_not_retry_ssl_errors(**kwargs):
+    kwargs['mock'].get('mock://cluster/secure', exc=requests.exceptions.SSLError)
+    t = Transport(retries=3, backoff=0)
+
+    with pytest.raises(requests.exceptions.SSLError):
+        t.send("get", 'mock://cluster/secure')
+    assert kwargs['mock'].call_count == 1
+    assert t.metrics.as_dict()['GET /secure']['errors'] == {'SSLError': 1}
+
+
+def test_transport_resize_pool_closes_previous_adapter(monkeypatch):
+    t = Transport(pool_size=2)
+    previous = t.session.adapters["https://"]
+    closed = []
+    monkeypatch.setattr(previous, "close", lambda: closed.append(previous))
+
+    t.resize_pool(8)
+    assert closed == [previous]
+    assert t.session.adapters["https://"] is t.session.adapters["http://"] is not previous
+    assert t.session.adapters["https://"]._pool_maxsize == 8